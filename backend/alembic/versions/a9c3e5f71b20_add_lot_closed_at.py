@@ -0,0 +1,33 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'a9c3e5f71b20'
+down_revision: Union[str, Sequence[str], None] = 'f2b7d4e81a6c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    # Nullable without a default: a catalog-only change, no table rewrite.
+    op.add_column('lots', sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True))
+    # Open timed lots, read by the lot timer on startup and resync.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_lots_open_end_time',
+            'lots',
+            ['end_time'],
+            postgresql_where=sa.text('closed_at IS NULL AND end_time IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_lots_open_end_time',
+            table_name='lots',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('lots', 'closed_at')
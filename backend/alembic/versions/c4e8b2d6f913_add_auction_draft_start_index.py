@@ -0,0 +1,30 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'c4e8b2d6f913'
+down_revision: Union[str, Sequence[str], None] = 'a9c3e5f71b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    # Drafts due to start, polled by the schedule sweep.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_auctions_draft_start_time',
+            'auctions',
+            ['start_time'],
+            postgresql_where=sa.text("status = 'draft'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_auctions_draft_start_time',
+            table_name='auctions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,53 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'd7f3a9c2e4b1'
+down_revision: Union[str, Sequence[str], None] = '1e9238b4e127'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Built CONCURRENTLY so a large bids table stays writable while this runs;
+# that cannot happen inside a transaction, hence the autocommit block.
+INDEXES = [
+    # Bid log and per-lot history, newest first; covers every bids column so
+    # the per-lot scans are index-only.
+    ('ix_bids_lot_id_placed_at', 'bids', [sa.text('lot_id'), sa.text('placed_at DESC')],
+     dict(postgresql_include=['id', 'amount', 'participant_id'])),
+    # Top bid per lot (bid engine recovery, winner lookups).
+    ('ix_bids_lot_id_amount', 'bids', [sa.text('lot_id'), sa.text('amount DESC'), sa.text('placed_at DESC')],
+     {}),
+    ('ix_bids_participant_id', 'bids', ['participant_id'], {}),
+    # Time-window analytics (last 24h, daily series).
+    ('ix_bids_placed_at', 'bids', ['placed_at'], {}),
+    # Lot listing order and create_lot's MAX(lot_number).
+    ('ix_lots_auction_id_lot_number', 'lots', ['auction_id', 'lot_number'], {}),
+    ('ix_lots_current_leader', 'lots', ['current_leader'],
+     dict(postgresql_where=sa.text('current_leader IS NOT NULL'))),
+    ('ix_participants_auction_id_blocked', 'participants', ['auction_id', 'blocked'], {}),
+    ('ix_participants_vendor_id', 'participants', ['vendor_id'], {}),
+    # Only a handful of auctions are live at a time; the scheduler and status
+    # refresher look them up by end time.
+    ('ix_auctions_live_end_time', 'auctions', ['end_time'],
+     dict(postgresql_where=sa.text("status = 'live'"))),
+]
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+    for table in {table for _, table, _, _ in INDEXES}:
+        op.execute(f'ANALYZE {table}')
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,54 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'e4a8c1d93f27'
+down_revision: Union[str, Sequence[str], None] = 'd7f3a9c2e4b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The tables start empty; the worker's first refresh does a full rebuild.
+def upgrade() -> None:
+    op.create_table('rollup_state',
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('rebuilt_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('bid_rollup_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('auction_id', sa.UUID(), nullable=False),
+        sa.Column('bid_count', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['auction_id'], ['auctions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('day', 'auction_id')
+    )
+    op.create_table('bid_rollup_lot',
+        sa.Column('lot_id', sa.UUID(), nullable=False),
+        sa.Column('auction_id', sa.UUID(), nullable=False),
+        sa.Column('bid_count', sa.BigInteger(), nullable=False),
+        sa.Column('last_bid_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['auction_id'], ['auctions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['lot_id'], ['lots.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('lot_id')
+    )
+    op.create_index('ix_bid_rollup_lot_auction_id', 'bid_rollup_lot', ['auction_id'])
+    op.create_table('bid_rollup_participant',
+        sa.Column('participant_id', sa.UUID(), nullable=False),
+        sa.Column('auction_id', sa.UUID(), nullable=False),
+        sa.Column('vendor_id', sa.UUID(), nullable=False),
+        sa.Column('bid_count', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['auction_id'], ['auctions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['participant_id'], ['participants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['vendor_id'], ['vendors.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('participant_id')
+    )
+    op.create_index('ix_bid_rollup_participant_auction_id', 'bid_rollup_participant', ['auction_id'])
+    op.create_index('ix_bid_rollup_participant_vendor_id', 'bid_rollup_participant', ['vendor_id'])
+
+def downgrade() -> None:
+    op.drop_table('bid_rollup_participant')
+    op.drop_table('bid_rollup_lot')
+    op.drop_table('bid_rollup_daily')
+    op.drop_table('rollup_state')
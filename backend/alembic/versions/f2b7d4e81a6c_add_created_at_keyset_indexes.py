@@ -0,0 +1,30 @@
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = 'f2b7d4e81a6c'
+down_revision: Union[str, Sequence[str], None] = 'e4a8c1d93f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Keyset pages of the admin auction and vendor lists, newest first.
+INDEXES = [
+    ('ix_auctions_created_at_id', 'auctions', ['created_at', 'id']),
+    ('ix_vendors_created_at_id', 'vendors', ['created_at', 'id']),
+]
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -1,12 +1,31 @@
 
-from typing import List
+from typing import List, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
 
     database_url: str
+    database_replica_url: str = ""
+    replica_max_lag_sec: float = 5.0
+    replica_check_sec: float = 5.0
+    replica_check_timeout_sec: float = 2.0
+
+    db_max_connections: int = 10
+    db_bids_share: float = 0.3
+    db_websocket_share: float = 0.2
+    db_pool_timeout_sec: float = 10.0
+    db_pool_recycle_sec: int = 1800
+    db_pool_pre_ping: bool = False
+    db_ssl: str = "require"
+    db_statement_cache_size: int = 100
+    db_application_name: str = "auction-backend"
+    db_statement_timeout_ms: int = 0
+    db_idle_in_transaction_timeout_ms: int = 0
 
     redis_url: str = "redis://redis:6379/0"
+    socketio_message_queue: bool = True
+    socketio_channel: str = "auction-socketio"
+    json_backend: Literal["auto", "orjson", "msgspec", "stdlib"] = "auto"
 
     admin_token: str
     jwt_secret: str = "change-me-in-production"
@@ -17,6 +36,47 @@ class Settings(BaseSettings):
     master_admin_username: str = "admin"
     master_admin_password: str = "admin"
 
+    bid_acceptance_mode: Literal["locking", "cas", "memory"] = "locking"
+    bid_engine_status_refresh_sec: float = 1.0
+    bid_writer_flush_ms: int = 20
+    bid_writer_batch_size: int = 200
+    bid_ack_durable: bool = False
+
+    broadcast_tick_ms: int = 50
+
+    lot_timer_enabled: bool = True
+    lot_timer_batch_size: int = 500
+    lot_timer_resync_sec: float = 30.0
+
+    scheduler_mode: Literal["jobs", "sweep"] = "jobs"
+    schedule_sweep_interval_sec: float = 1.0
+    schedule_sweep_batch_size: int = 500
+
+    bid_export_batch_size: int = 2000
+    lot_import_max_rows: int = 10_000
+
+    worker_concurrency: int = 32
+
+    state_cache_ttl_sec: float = 5.0
+    state_delta_buffer: int = 256
+    state_catchup: bool = True
+    api_heartbeat_sec: float = 5.0
+
+    participant_cache_size: int = 10_000
+    participant_cache_ttl_sec: float = 30.0
+
+    rollup_refresh_sec: float = 60.0
+    rollup_overlap_sec: float = 300.0
+    rollup_rebuild_sec: float = 24 * 60 * 60
+
+    live_counters: bool = True
+    live_counters_flush_ms: int = 100
+    live_counters_reconcile_sec: float = 300.0
+
+    analytics_max_connections: int = 3
+    analytics_cache_ttl_sec: float = 10.0
+    analytics_cache_stale_sec: float = 60.0
+
     app_title: str = "Auction Backend"
     debug: bool = False
 
@@ -1,16 +1,108 @@
-
 import json
 import datetime
+import uuid
 from decimal import Decimal
+from typing import Any, Callable, Tuple
 from uuid import UUID
 
+from app.config import settings
+
 class CustomJSONEncoder(json.JSONEncoder):
 
     def default(self, o):
-        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
-            return o.isoformat()
-        if isinstance(o, Decimal):
-            return str(o)
-        if isinstance(o, UUID):
-            return str(o)
-        return super().default(o)
+        return _default(o)
+
+def _default(o):
+    if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return str(o)
+    if isinstance(o, UUID):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+# Already-encoded JSON that dumps() splices in verbatim, so a payload shared
+# by many messages is only serialized once.
+class RawJSON:
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"RawJSON({self.text[:40]!r})"
+
+def _stdlib_backend() -> Tuple[Callable[..., str], Callable[..., Any]]:
+    # The stdlib encoder has no raw passthrough, so RawJSON values go out as
+    # unique placeholder strings that are swapped for their text afterwards.
+    nonce = uuid.uuid4().hex
+
+    def dumps(obj: Any, **kwargs) -> str:
+        raws = []
+
+        def default(o):
+            if isinstance(o, RawJSON):
+                raws.append(o.text)
+                return f"{nonce}:{len(raws) - 1}"
+            return _default(o)
+
+        text = json.dumps(obj, default=default, **kwargs)
+        for i, raw in enumerate(raws):
+            text = text.replace(f'"{nonce}:{i}"', raw, 1)
+        return text
+
+    return dumps, json.loads
+
+def _orjson_backend() -> Tuple[Callable[..., str], Callable[..., Any]]:
+    import orjson
+
+    def default(o):
+        if isinstance(o, RawJSON):
+            return orjson.Fragment(o.text)
+        return _default(o)
+
+    def dumps(obj: Any, **kwargs) -> str:
+        return orjson.dumps(obj, default=default).decode()
+
+    return dumps, orjson.loads
+
+def _msgspec_backend() -> Tuple[Callable[..., str], Callable[..., Any]]:
+    import msgspec
+
+    def enc_hook(o):
+        if isinstance(o, RawJSON):
+            return msgspec.Raw(o.text.encode())
+        return _default(o)
+
+    encoder = msgspec.json.Encoder(enc_hook=enc_hook, decimal_format="string")
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any, **kwargs) -> str:
+        return encoder.encode(obj).decode()
+
+    return dumps, decoder.decode
+
+BACKENDS = {
+    "orjson": _orjson_backend,
+    "msgspec": _msgspec_backend,
+    "stdlib": _stdlib_backend,
+}
+
+def load_backend(name: str) -> Tuple[Callable[..., str], Callable[..., Any]]:
+    if name != "auto":
+        return BACKENDS[name]()
+    for candidate in ("orjson", "msgspec"):
+        try:
+            return BACKENDS[candidate]()
+        except ImportError:
+            continue
+    return BACKENDS["stdlib"]()
+
+# Module-level dumps/loads so this module can be handed to python-socketio as
+# its `json` implementation. Fast backends always emit compact output, which
+# is what socketio asks for anyway, so formatting kwargs are ignored there.
+dumps, loads = load_backend(settings.json_backend)
+
+def encode_once(obj: Any) -> RawJSON:
+    return RawJSON(dumps(obj))
@@ -1,18 +1,208 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    create_async_engine,
+    async_sessionmaker,
+    AsyncSession,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app import metrics
 from app.config import settings
 
-engine = create_async_engine(
-    settings.database_url,
-    pool_size=5,
-    max_overflow=5,
-    connect_args={
-        "ssl": "require"
-    },
-    echo=settings.debug,
+logger = logging.getLogger("auction.db")
+
+db_statements = metrics.counter("db.statements")
+replica_reads = metrics.counter("db.replica.reads")
+replica_fallbacks = metrics.counter("db.replica.fallbacks")
+replica_lag = metrics.gauge("db.replica.lag_sec")
+replica_healthy = metrics.gauge("db.replica.healthy")
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    db_statements.inc()
+
+def _pool_class(name: str):
+    wait_ms = metrics.histogram(f"db.pool.{name}.wait_ms")
+    timeouts = metrics.counter(f"db.pool.{name}.timeouts")
+    checked_out = metrics.gauge(f"db.pool.{name}.checked_out")
+    overflow = metrics.gauge(f"db.pool.{name}.overflow")
+    overflow_connects = metrics.counter(f"db.pool.{name}.overflow_connects")
+
+    class InstrumentedPool(AsyncAdaptedQueuePool):
+
+        def _update(self) -> None:
+            checked_out.set(self.checkedout())
+            overflow.set(max(self.overflow(), 0))
+
+        # Time to hand out a connection: waiting for a free one, or opening
+        # (and pinging) a new one.
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                timeouts.inc()
+                raise
+            finally:
+                wait_ms.observe((time.perf_counter() - started) * 1000)
+                self._update()
+
+        def _create_connection(self):
+            # Overflow connections are closed again on return, so a steady
+            # rate of these means the pool is too small for its load.
+            if self.overflow() > 0:
+                overflow_connects.inc()
+            return super()._create_connection()
+
+        def _do_return_conn(self, record) -> None:
+            super()._do_return_conn(record)
+            self._update()
+
+    return InstrumentedPool
+
+def _create_engine(
+    url: str, name: str, pool_size: int, max_overflow: int
+) -> AsyncEngine:
+    server_settings = {"application_name": f"{settings.db_application_name}:{name}"}
+    if settings.db_statement_timeout_ms:
+        server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+    if settings.db_idle_in_transaction_timeout_ms:
+        server_settings["idle_in_transaction_session_timeout"] = str(
+            settings.db_idle_in_transaction_timeout_ms
+        )
+
+    engine = create_async_engine(
+        url,
+        poolclass=_pool_class(name),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout_sec,
+        pool_recycle=settings.db_pool_recycle_sec,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            "ssl": settings.db_ssl,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "server_settings": server_settings,
+        },
+        echo=settings.debug,
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_statement)
+    return engine
+
+def _split(connections: int):
+    # Half kept open, the rest opened on demand and closed again on return.
+    connections = max(connections, 1)
+    pool_size = (connections + 1) // 2
+    return pool_size, connections - pool_size
+
+# Each path gets its own pool, so a websocket connect storm or a burst of
+# admin requests queues on its own connections and never on the bid path's.
+# Together they hold at most db_max_connections to the primary.
+BIDS_CONNECTIONS = max(round(settings.db_max_connections * settings.db_bids_share), 1)
+WEBSOCKET_CONNECTIONS = max(
+    round(settings.db_max_connections * settings.db_websocket_share), 1
+)
+API_CONNECTIONS = max(
+    settings.db_max_connections - BIDS_CONNECTIONS - WEBSOCKET_CONNECTIONS, 1
+)
+
+engine = _create_engine(settings.database_url, "api", *_split(API_CONNECTIONS))
+bids_engine = _create_engine(settings.database_url, "bids", *_split(BIDS_CONNECTIONS))
+websocket_engine = _create_engine(
+    settings.database_url, "websocket", *_split(WEBSOCKET_CONNECTIONS)
+)
+
+# Optional read-only replica for reporting and listing queries, so they never
+# take connections from the primary. Sized like the API pool it stands in for.
+replica_engine: Optional[AsyncEngine] = (
+    _create_engine(settings.database_replica_url, "replica", *_split(API_CONNECTIONS))
+    if settings.database_replica_url
+    else None
 )
 
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+BidSessionLocal = async_sessionmaker(
+    bids_engine, expire_on_commit=False, class_=AsyncSession
+)
+WebsocketSessionLocal = async_sessionmaker(
+    websocket_engine, expire_on_commit=False, class_=AsyncSession
+)
+
+# A replica that has replayed everything it received is current, however old
+# its last replayed transaction is (an idle primary writes nothing to replay).
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+class ReplicaRouter:
+
+    def __init__(self):
+        self.lag_sec: Optional[float] = None
+        self.healthy = False
+        self._checked_at: Optional[float] = None
+        self._check: Optional[asyncio.Future] = None
+
+    async def read_engine(self) -> AsyncEngine:
+        if replica_engine is None:
+            return engine
+
+        # Lag is measured at most every replica_check_sec; concurrent readers
+        # share one measurement.
+        if (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at >= settings.replica_check_sec
+        ):
+            if self._check is None or self._check.done():
+                self._check = asyncio.ensure_future(self._measure())
+            await asyncio.shield(self._check)
+
+        if self.healthy:
+            replica_reads.inc()
+            return replica_engine
+        replica_fallbacks.inc()
+        return engine
+
+    async def _query_lag(self):
+        async with replica_engine.connect() as conn:
+            return await conn.scalar(REPLICA_LAG_SQL)
+
+    async def _measure(self) -> None:
+        try:
+            lag = await asyncio.wait_for(
+                self._query_lag(), settings.replica_check_timeout_sec
+            )
+            self.lag_sec = None if lag is None else float(lag)
+        except Exception as e:
+            logger.warning(f"Replica lag check failed, reading from primary: {e}")
+            self.lag_sec = None
+
+        healthy = self.lag_sec is not None and self.lag_sec <= settings.replica_max_lag_sec
+        if healthy != self.healthy:
+            logger.info(
+                f"Replica {'healthy' if healthy else 'unavailable'}: lag={self.lag_sec}"
+            )
+        self.healthy = healthy
+        self._checked_at = time.monotonic()
+        replica_lag.set(self.lag_sec)
+        replica_healthy.set(int(healthy))
+
+replica = ReplicaRouter()
 
 async def get_session() -> AsyncSession:
     async with SessionLocal() as session:
         yield session
+
+# Read-only requests that tolerate replica_max_lag_sec of staleness.
+async def get_read_session() -> AsyncSession:
+    async with SessionLocal(bind=await replica.read_engine()) as session:
+        yield session
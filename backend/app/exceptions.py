@@ -23,6 +23,10 @@ class LotNotLiveError(AuctionException):
 
     pass
 
+class LotClosedError(LotNotLiveError):
+
+    pass
+
 class InvalidStatusTransitionError(AuctionException):
 
     pass
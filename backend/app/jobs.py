@@ -1,14 +1,124 @@
 
 import asyncio
-from datetime import datetime, timezone
-from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+import redis
+import socketio
+from redis.client import Pipeline
+from redis.exceptions import WatchError
+from rq import Queue
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+from app import custom_json
+from app.config import settings
 from app.db import SessionLocal
 from app.models import Auction
 from app.enums import AuctionStatus
+from app.services.live_counters import live_counters
+from app.services.lot_timer import lot_timer
+from app.services.response_cache import analytics_cache
+from app.services.rollups import refresh_bid_rollups
+from app.services.state_cache import state_cache
 import logging
 
 logger = logging.getLogger("auction.jobs")
 
+_emitter = None
+_queue = None
+
+def get_emitter() -> socketio.AsyncRedisManager:
+    # Jobs run in the RQ worker, which has no connected clients; publish to the
+    # Socket.IO message queue so every API process delivers to its own rooms.
+    global _emitter
+    if _emitter is None:
+        _emitter = socketio.AsyncRedisManager(
+            settings.redis_url,
+            channel=settings.socketio_channel,
+            write_only=True,
+            json=custom_json,
+        )
+    return _emitter
+
+def get_queue() -> Queue:
+    global _queue
+    if _queue is None:
+        _queue = Queue("scheduler", connection=redis.from_url(settings.redis_url))
+    return _queue
+
+def schedule_job(
+    pipe: Pipeline, queue: Queue, at: datetime, func, *args, job_id: str, **kwargs
+) -> None:
+    # What enqueue_at does, but with the registry entry on the pipeline too
+    # (ScheduledJobRegistry.schedule writes straight to Redis), so a
+    # transaction that aborts leaves nothing behind.
+    job = queue.create_job(
+        func, args=args, kwargs=kwargs, job_id=job_id, status=JobStatus.SCHEDULED
+    )
+    pipe.sadd(queue.redis_queues_keys, queue.key)
+    job.save(pipeline=pipe)
+    pipe.zadd(queue.scheduled_job_registry.key, {job_id: int(at.timestamp())})
+
+def schedule_periodic(job, delay_sec: float = 0, after: Optional[str] = None) -> None:
+    # Every run has its own job id, so one finishing never saves over the next
+    # run's hash. periodic:<name> holds the id of the pending run: it is only
+    # replaced by that run (after=its id) or once it is gone, which keeps a
+    # single chain however many workers start.
+    queue = get_queue()
+    key = f"periodic:{job.__name__}"
+    with queue.connection.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+            current = pipe.get(key)
+            current = current.decode() if current else None
+            if current is not None and current != after and _alive(current):
+                return
+            run_id = f"periodic_{job.__name__}_{uuid4().hex}"
+            at = datetime.now(timezone.utc) + timedelta(seconds=delay_sec)
+            pipe.multi()
+            schedule_job(pipe, queue, at, job, job_id=run_id, run_id=run_id)
+            pipe.set(key, run_id)
+            pipe.execute()
+        except WatchError:
+            # Another worker scheduled it first.
+            pass
+
+def _alive(job_id: str) -> bool:
+    try:
+        status = Job.fetch(job_id, connection=get_queue().connection).get_status()
+    except NoSuchJobError:
+        return False
+    return status in (
+        JobStatus.SCHEDULED, JobStatus.QUEUED, JobStatus.DEFERRED, JobStatus.STARTED
+    )
+
+async def refresh_rollups(run_id: Optional[str] = None):
+    try:
+        async with SessionLocal() as session:
+            stats = await refresh_bid_rollups(session)
+        logger.info(f"Bid rollups refreshed: {stats}")
+    except Exception as e:
+        logger.error(f"Bid rollup refresh failed: {e}", exc_info=True)
+    finally:
+        schedule_periodic(refresh_rollups, settings.rollup_refresh_sec, run_id)
+
+async def reconcile_live_counters(run_id: Optional[str] = None):
+    if not settings.live_counters:
+        return
+    try:
+        async with SessionLocal() as session:
+            stats = await live_counters.reconcile(session)
+        if stats["drift"]:
+            logger.warning(f"Live counters drifted, corrected: {stats}")
+        else:
+            logger.info(f"Live counters reconciled: {stats}")
+    except Exception as e:
+        logger.error(f"Live counter reconciliation failed: {e}", exc_info=True)
+    finally:
+        schedule_periodic(
+            reconcile_live_counters, settings.live_counters_reconcile_sec, run_id
+        )
+
 async def activate_auction(auction_id: str):
     try:
         auction_uuid = UUID(auction_id)
@@ -23,24 +133,32 @@ async def activate_auction(auction_id: str):
             return
 
         if auction.status in (AuctionStatus.DRAFT.value, AuctionStatus.PAUSED.value):
+            previous, scheduled = auction.status, auction.start_time is not None
             auction.status = AuctionStatus.LIVE.value
             auction.start_time = datetime.now(timezone.utc)
             await session.commit()
+            live_counters.auction_status_changed(previous, auction.status)
+            if not scheduled:
+                live_counters.auction_scheduled()
+            await live_counters.flush()
+            await analytics_cache.invalidate_everywhere()
+            await state_cache.status_changed(auction_uuid, auction.status)
+            await lot_timer.auctions_started([auction_uuid])
             logger.info(
                 f"Auction {auction_id} auto-started at {datetime.now(timezone.utc)}"
             )
 
             try:
-                from app.main import sio
+                from app.websocket import AUCTION_NS
 
-                await sio.emit(
+                await get_emitter().emit(
                     "status",
                     {
                         "status": AuctionStatus.LIVE.value,
                         "started_at": auction.start_time.isoformat(),
                     },
                     room=auction.slug,
-                    namespace="/auction",
+                    namespace=AUCTION_NS,
                 )
                 logger.info(f"WebSocket status update sent for auction {auction.slug}")
             except Exception as e:
@@ -66,14 +184,20 @@ async def end_auction(auction_id: str):
         if auction.status == AuctionStatus.LIVE.value:
             auction.status = AuctionStatus.ENDED.value
             await session.commit()
+            live_counters.auction_status_changed(
+                AuctionStatus.LIVE.value, auction.status
+            )
+            await live_counters.flush()
+            await analytics_cache.invalidate_everywhere()
+            await state_cache.status_changed(auction_uuid, auction.status)
             logger.info(
                 f"Auction {auction_id} auto-ended at {datetime.now(timezone.utc)}"
             )
 
             try:
-                from app.websocket import sio, AUCTION_NS
+                from app.websocket import AUCTION_NS
 
-                await sio.emit(
+                await get_emitter().emit(
                     "status",
                     {"status": AuctionStatus.ENDED.value},
                     room=auction.slug,
@@ -7,8 +7,14 @@ import socketio
 from app.config import settings
 from app.logging_config import setup_logging
 from app.routes import admin, public, auth
-from app.websocket import sio
+from app.websocket import room_broadcaster, sio
 from app.db import SessionLocal
+from app.services.api_processes import api_processes
+from app.services.live_counters import live_counters
+from app.services.lot_timer import lot_timer
+from app.services.response_cache import analytics_cache
+from app.services.schedule_sweep import schedule_sweep
+from app.services.state_cache import state_cache
 
 logger = logging.getLogger("auction.main")
 
@@ -22,8 +28,38 @@ async def lifespan(app: FastAPI):
         await ensure_master_admin(db)
         logger.info("Application startup complete")
 
+    await api_processes.start()
+
+    if settings.bid_acceptance_mode == "memory":
+        from app.services.bid_engine import bid_engine
+
+        await bid_engine.start()
+
+    if settings.lot_timer_enabled:
+        await lot_timer.start()
+
+    await analytics_cache.start()
+    await state_cache.start()
+
+    if settings.scheduler_mode == "sweep":
+        await schedule_sweep.start()
+
     yield
 
+    if settings.scheduler_mode == "sweep":
+        await schedule_sweep.stop()
+
+    if settings.lot_timer_enabled:
+        await lot_timer.stop()
+
+    await state_cache.stop()
+    await analytics_cache.stop()
+    await room_broadcaster.close()
+    await live_counters.close()
+    if settings.bid_acceptance_mode == "memory":
+        await bid_engine.stop()
+
+    await api_processes.stop()
     logger.info("Application shutdown")
 
 app = FastAPI(title=settings.app_title, debug=settings.debug, lifespan=lifespan)
@@ -34,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Age"],
 )
 
 @app.get("/health")
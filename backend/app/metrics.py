@@ -0,0 +1,80 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence, Union
+
+DEFAULT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class Counter:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> dict:
+        return {"type": "counter", "value": self.value}
+
+class Gauge:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+
+    def set(self, value) -> None:
+        self.value = value
+
+    def snapshot(self) -> dict:
+        return {"type": "gauge", "value": self.value}
+
+class Histogram:
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict:
+        bounds = [str(b) for b in self.buckets] + ["+Inf"]
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(bounds, self._counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            "type": "histogram",
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "avg": round(self.total / self.count, 3) if self.count else 0,
+            "max": round(self.max, 3),
+            "buckets": buckets,
+        }
+
+_registry: Dict[str, Union[Counter, Gauge, Histogram]] = {}
+
+def counter(name: str) -> Counter:
+    return _registry.setdefault(name, Counter(name))
+
+def gauge(name: str) -> Gauge:
+    return _registry.setdefault(name, Gauge(name))
+
+def histogram(name: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _registry.setdefault(name, Histogram(name, buckets))
+
+def snapshot() -> dict:
+    return {name: metric.snapshot() for name, metric in sorted(_registry.items())}
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import List, Optional
 from uuid import uuid4, UUID as UUID_T
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy import (
     String,
@@ -12,6 +12,10 @@ from sqlalchemy import (
     func,
     Integer,
     Boolean,
+    BigInteger,
+    Date,
+    Index,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -35,6 +39,7 @@ class AdminUser(Base):
 
 class Vendor(Base):
     __tablename__ = "vendors"
+    __table_args__ = (Index("ix_vendors_created_at_id", "created_at", "id"),)
 
     id: Mapped[UUID_T] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid4
@@ -50,6 +55,19 @@ class Vendor(Base):
 
 class Auction(Base):
     __tablename__ = "auctions"
+    __table_args__ = (
+        Index(
+            "ix_auctions_live_end_time",
+            "end_time",
+            postgresql_where=text("status = 'live'"),
+        ),
+        Index(
+            "ix_auctions_draft_start_time",
+            "start_time",
+            postgresql_where=text("status = 'draft'"),
+        ),
+        Index("ix_auctions_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[UUID_T] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid4
@@ -76,6 +94,10 @@ class Auction(Base):
 
 class Participant(Base):
     __tablename__ = "participants"
+    __table_args__ = (
+        Index("ix_participants_auction_id_blocked", "auction_id", "blocked"),
+        Index("ix_participants_vendor_id", "vendor_id"),
+    )
 
     id: Mapped[UUID_T] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid4
@@ -101,6 +123,19 @@ class Participant(Base):
 
 class Lot(Base):
     __tablename__ = "lots"
+    __table_args__ = (
+        Index("ix_lots_auction_id_lot_number", "auction_id", "lot_number"),
+        Index(
+            "ix_lots_current_leader",
+            "current_leader",
+            postgresql_where=text("current_leader IS NOT NULL"),
+        ),
+        Index(
+            "ix_lots_open_end_time",
+            "end_time",
+            postgresql_where=text("closed_at IS NULL AND end_time IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[UUID_T] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid4
@@ -128,6 +163,7 @@ class Lot(Base):
     )
     end_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     extension_sec: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    closed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
     auction: Mapped["Auction"] = relationship(back_populates="lots")
     bids: Mapped[List["Bid"]] = relationship(
@@ -136,6 +172,22 @@ class Lot(Base):
 
 class Bid(Base):
     __tablename__ = "bids"
+    __table_args__ = (
+        Index(
+            "ix_bids_lot_id_placed_at",
+            "lot_id",
+            text("placed_at DESC"),
+            postgresql_include=["id", "amount", "participant_id"],
+        ),
+        Index(
+            "ix_bids_lot_id_amount",
+            "lot_id",
+            text("amount DESC"),
+            text("placed_at DESC"),
+        ),
+        Index("ix_bids_participant_id", "participant_id"),
+        Index("ix_bids_placed_at", "placed_at"),
+    )
 
     id: Mapped[UUID_T] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid4
@@ -154,3 +206,65 @@ class Bid(Base):
     )
 
     lot: Mapped["Lot"] = relationship(back_populates="bids")
+
+# Bid aggregates kept up to date by the worker (app/services/rollups.py), so
+# analytics never has to scan the bids table.
+class BidRollupDaily(Base):
+    __tablename__ = "bid_rollup_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    auction_id: Mapped[UUID_T] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("auctions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    bid_count: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+class BidRollupLot(Base):
+    __tablename__ = "bid_rollup_lot"
+    __table_args__ = (Index("ix_bid_rollup_lot_auction_id", "auction_id"),)
+
+    lot_id: Mapped[UUID_T] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("lots.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    auction_id: Mapped[UUID_T] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("auctions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    bid_count: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    last_bid_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+class BidRollupParticipant(Base):
+    __tablename__ = "bid_rollup_participant"
+    __table_args__ = (
+        Index("ix_bid_rollup_participant_auction_id", "auction_id"),
+        Index("ix_bid_rollup_participant_vendor_id", "vendor_id"),
+    )
+
+    participant_id: Mapped[UUID_T] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("participants.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    auction_id: Mapped[UUID_T] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("auctions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    vendor_id: Mapped[UUID_T] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("vendors.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    bid_count: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+class RollupState(Base):
+    __tablename__ = "rollup_state"
+
+    name: Mapped[str] = mapped_column(Text, primary_key=True)
+    watermark: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    rebuilt_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    refreshed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
@@ -1,9 +1,10 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from uuid import UUID
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from app.models import Auction, Participant, Lot, Bid
+from app.services.auctions import list_auction_summaries
 
 class AuctionRepository:
 
@@ -24,15 +25,8 @@ class AuctionRepository:
         )
         return result.scalar_one_or_none()
 
-    async def list_all(self, skip: int = 0, limit: int = 10) -> List[Auction]:
-        result = await self.db.execute(
-            select(Auction)
-            .options(selectinload(Auction.lots))
-            .order_by(Auction.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+    async def list_all(self, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+        return await list_auction_summaries(self.db, limit, skip=skip)
 
     async def create(self, auction: Auction) -> Auction:
         self.db.add(auction)
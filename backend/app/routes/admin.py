@@ -1,23 +1,33 @@
+import csv
+import io
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import List
-
-import redis
-from rq import Queue
-from rq.job import Job
-from rq.exceptions import NoSuchJobError
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    File,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 
+from app import metrics
 from app.config import settings
-from app.db import get_session
+from app.db import get_read_session, get_session
 from app.deps import require_admin
-from app.models import Auction, Participant, Vendor, Bid, Lot
+from app.models import Auction, Participant, Lot
 from app.schemas import (
+    AuctionBulkCreate,
     AuctionCreate,
-    AuctionRead,
+    AuctionSummary,
     LotCreate,
     LotRead,
     ParticipantCreate,
@@ -34,6 +44,10 @@ from app.schemas import (
 )
 from app.services.auctions import (
     create_auction,
+    create_auctions,
+    create_lots,
+    list_auction_summaries,
+    list_participants,
     get_auction_by_slug,
     create_participant,
     create_lot,
@@ -47,36 +61,57 @@ from app.services.vendors import (
     delete_vendor,
 )
 from app.services import analytics
-from app.jobs import activate_auction, end_auction
+from app.services.bid_engine import bid_engine
+from app.services.bids import export_bids, recent_bids_query
+from app.services.live_counters import live_counters
+from app.services.lot_timer import lot_timer
+from app.services.pagination import Cursor, decode_cursor, next_cursor
+from app.services.participant_cache import participant_cache
+from app.services.response_cache import analytics_cache
+from app.services.scheduling import auction_scheduler
+from app.services.state_cache import state_cache
+from app.jobs import activate_auction
 
 logger = logging.getLogger("auction.routes.admin")
 
-r = redis.from_url(settings.redis_url)
-q = Queue("scheduler", connection=r)
-
 router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
 
-@router.get("/auctions", response_model=List[AuctionRead])
+def _parse_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+def _set_next_cursor(response: Response, rows, limit: int, key) -> None:
+    cursor = next_cursor(rows, limit, key)
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+
+@router.get(
+    "/auctions",
+    response_model=List[AuctionSummary],
+    response_model_exclude_unset=True,
+)
 async def list_auctions(
-    db: AsyncSession = Depends(get_session),
-    skip: int = Query(0, ge=0),
+    response: Response,
+    db: AsyncSession = Depends(get_read_session),
+    cursor: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0, deprecated=True),
     limit: int = Query(10, ge=1, le=100),
+    include: Optional[Literal["lots"]] = Query(None),
 ):
-    rows = (
-        (
-            await db.execute(
-                select(Auction)
-                .options(selectinload(Auction.lots))
-                .order_by(Auction.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-            )
-        )
-        .scalars()
-        .all()
+    rows = await list_auction_summaries(
+        db,
+        limit,
+        before=_parse_cursor(cursor),
+        skip=skip,
+        include_lots=include == "lots",
     )
+    _set_next_cursor(response, rows, limit, lambda row: (row["created_at"], row["id"]))
     logger.info(f"Admin listed auctions: skip={skip}, limit={limit}, count={len(rows)}")
-    return list(rows)
+    return rows
 
 @router.post("/auctions")
 async def create_new_auction(
@@ -86,42 +121,30 @@ async def create_new_auction(
     auction = await create_auction(
         db, payload.title, payload.description, payload.start_time, payload.end_time
     )
+    auction_scheduler.schedule([(auction.id, auction.start_time, auction.end_time)])
+    logger.info(
+        f"Auction {auction.id} created: start={auction.start_time}, end={auction.end_time}"
+    )
+    return _created(auction.id, auction.slug)
 
-    if payload.start_time:
-        delay = (payload.start_time - datetime.now(timezone.utc)).total_seconds()
-        if delay < 0:
-            delay = 0
-        q.enqueue_in(
-            timedelta(seconds=delay),
-            activate_auction,
-            str(auction.id),
-            job_id=f"auction_{auction.id}",
-        )
-        logger.info(
-            f"Auction {auction.id} created and scheduled to start in {delay}s"
-        )
-    else:
-        logger.info(f"Auction {auction.id} created without scheduled start")
-
-    if payload.end_time:
-        end_delay = (payload.end_time - datetime.now(timezone.utc)).total_seconds()
-        if end_delay < 0:
-            end_delay = 0
-        q.enqueue_in(
-            timedelta(seconds=end_delay),
-            end_auction,
-            str(auction.id),
-            job_id=f"auction_end_{auction.id}",
-        )
-        logger.info(
-            f"Auction {auction.id} scheduled to end in {end_delay}s"
-        )
+@router.post("/auctions/bulk")
+async def create_auctions_bulk(
+    payload: AuctionBulkCreate,
+    db: AsyncSession = Depends(get_session),
+):
+    rows = await create_auctions(db, [a.model_dump() for a in payload.auctions])
+    auction_scheduler.schedule(
+        (row["id"], row["start_time"], row["end_time"]) for row in rows
+    )
+    logger.info(f"Auctions created in bulk: count={len(rows)}")
+    return [_created(row["id"], row["slug"]) for row in rows]
 
+def _created(auction_id, slug: str) -> dict:
     return {
-        "id": str(auction.id),
-        "slug": auction.slug,
-        "public_url": f"/a/{auction.slug}",
-        "admin_ws_url": f"/socket.io?EIO=4&transport=websocket&ns=/admin&slug={auction.slug}",
+        "id": str(auction_id),
+        "slug": slug,
+        "public_url": f"/a/{slug}",
+        "admin_ws_url": f"/socket.io?EIO=4&transport=websocket&ns=/admin&slug={slug}",
     }
 
 @router.post("/auctions/{slug}/lots", response_model=LotRead)
@@ -142,16 +165,96 @@ async def create_auction_lot(
         payload.min_increment,
         payload.currency.value,
         payload.image_url,
+        payload.end_time,
+        payload.extension_sec,
     )
     logger.info(f"Lot created: auction={slug}, lot_number={lot.lot_number}")
+    await _lots_added(auction, [lot])
+    return lot
 
-    from app.websocket import sio, AUCTION_NS
-    from app.services.auctions import auction_state_payload
+@router.post("/auctions/{slug}/lots/bulk", response_model=List[LotRead])
+async def import_auction_lots(
+    slug: str,
+    request: Request,
+    db: AsyncSession = Depends(get_session),
+):
+    auction = await get_auction_by_slug(db, slug)
+    if not auction:
+        raise HTTPException(404, "Auction not found")
 
-    state = await auction_state_payload(db, auction)
-    await sio.emit("state", state, room=slug, namespace=AUCTION_NS)
+    payloads = _validate_lots(await _lot_rows(request))
+    lots = await create_lots(
+        db,
+        auction.id,
+        [{**p.model_dump(), "currency": p.currency.value} for p in payloads],
+    )
+    logger.info(f"Lots imported: auction={slug}, count={len(lots)}")
+    await _lots_added(auction, lots)
+    return lots
+
+async def _lot_rows(request: Request):
+    # A JSON array of LotCreate objects, or a CSV file (multipart field
+    # "file") with LotCreate field names as its header; empty cells take the
+    # defaults. Uploads are spooled to disk by the form parser and read a row
+    # at a time.
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        rows = await request.json()
+        if not isinstance(rows, list):
+            raise HTTPException(422, "Expected a JSON array of lots")
+        return rows
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(422, "Expected a CSV file in the 'file' field")
+        reader = csv.DictReader(
+            io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        )
+        return (
+            {key: value for key, value in row.items() if key and value}
+            for row in reader
+        )
+    raise HTTPException(415, "Send a JSON array or a multipart CSV upload")
 
-    return lot
+def _validate_lots(rows) -> List[LotCreate]:
+    lots, errors = [], []
+    try:
+        for number, row in enumerate(rows, 1):
+            if number > settings.lot_import_max_rows:
+                raise HTTPException(
+                    413, f"At most {settings.lot_import_max_rows} lots per import"
+                )
+            try:
+                lots.append(LotCreate.model_validate(row))
+            except ValidationError as e:
+                details = e.errors(
+                    include_url=False, include_context=False, include_input=False
+                )
+                errors.append({"row": number, "errors": details})
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(422, f"Unreadable CSV: {e}")
+    if errors:
+        raise HTTPException(422, errors[:100])
+    if not lots:
+        raise HTTPException(422, "No lots to import")
+    return lots
+
+async def _lots_added(auction: Auction, lots: List[Lot]) -> None:
+    # One lots_updated event and one delta however many lots were added.
+    from app.websocket import room_broadcaster
+    from app.services.auctions import lot_state
+
+    if auction.status == "live":
+        for lot in lots:
+            lot_timer.schedule(lot.id, lot.end_time)
+
+    states = [lot_state(lot) for lot in lots]
+    seq = state_cache.add_lots(auction.id, states)
+    event = {"lots": states}
+    if seq is not None:
+        event.update(state_cache.peek_by_id(auction.id).stamp(seq))
+    await room_broadcaster.send(auction.slug, "lots_updated", event)
 
 @router.post("/upload/image")
 async def upload_image(
@@ -188,39 +291,41 @@ async def delete_image(url: str = Query(...)):
 @router.get("/auctions/{slug}/bids", response_model=List[BidLogEntry])
 async def get_auction_bids(
     slug: str,
-    db: AsyncSession = Depends(get_session),
+    response: Response,
+    db: AsyncSession = Depends(get_read_session),
+    cursor: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=200),
 ):
+    before = _parse_cursor(cursor)
     auction = await get_auction_by_slug(db, slug)
     if not auction:
         raise HTTPException(404, "Auction not found")
 
-    result = await db.execute(
-        select(Bid, Lot, Participant, Vendor)
-        .join(Lot, Bid.lot_id == Lot.id)
-        .join(Participant, Bid.participant_id == Participant.id)
-        .join(Vendor, Participant.vendor_id == Vendor.id)
-        .where(Lot.auction_id == auction.id)
-        .order_by(Bid.placed_at.desc())
-        .limit(limit)
-    )
-
-    bids = []
-    for bid, lot, participant, vendor in result.all():
-        bids.append(BidLogEntry(
-            id=bid.id,
-            lot_id=lot.id,
-            lot_number=lot.lot_number,
-            lot_name=lot.name,
-            vendor_name=vendor.name,
-            amount=bid.amount,
-            currency=lot.currency,
-            placed_at=bid.placed_at,
-        ))
+    bids = (await db.execute(recent_bids_query(auction.id, limit, before))).all()
 
+    _set_next_cursor(response, bids, limit, lambda bid: (bid.placed_at, bid.id))
     logger.info(f"Bid log requested: auction={slug}, count={len(bids)}")
     return bids
 
+@router.get("/auctions/{slug}/bids/export")
+async def export_auction_bids(
+    slug: str,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    db: AsyncSession = Depends(get_read_session),
+):
+    auction = await get_auction_by_slug(db, slug)
+    if not auction:
+        raise HTTPException(404, "Auction not found")
+
+    logger.info(f"Bid export requested: auction={slug}, format={format}")
+    return StreamingResponse(
+        export_bids(auction.id, format),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="{slug}-bids.{format}"'
+        },
+    )
+
 @router.get("/auctions/{slug}/participants")
 async def list_auction_participants(
     slug: str,
@@ -230,27 +335,7 @@ async def list_auction_participants(
     if not auction:
         raise HTTPException(404, "Auction not found")
 
-    participants = (
-        await db.execute(
-            select(Participant)
-            .where(Participant.auction_id == auction.id)
-            .options(selectinload(Participant.vendor))
-        )
-    ).scalars().all()
-
-    return [
-        {
-            "id": str(p.id),
-            "join_url": f"/a/{slug}?t={p.invite_token}",
-            "invite_token": p.invite_token,
-            "vendor": {
-                "id": str(p.vendor.id),
-                "name": p.vendor.name,
-                "email": p.vendor.email,
-            },
-        }
-        for p in participants
-    ]
+    return await list_participants(db, auction.id, slug)
 
 @router.post("/auctions/{slug}/participants")
 async def create_auction_participant(
@@ -267,6 +352,7 @@ async def create_auction_participant(
         raise HTTPException(404, "Vendor not found")
 
     p = await create_participant(db, auction.id, payload.vendor_id)
+    state_cache.invalidate(auction.id)
     logger.info(f"Participant created: auction={slug}, vendor_id={payload.vendor_id}")
 
     await db.refresh(p, attribute_names=["vendor"])
@@ -310,6 +396,9 @@ async def delete_auction_participant(
 
     await db.delete(participant)
     await db.commit()
+    live_counters.participant_deleted(participant.blocked)
+    state_cache.invalidate(auction.id)
+    participant_cache.invalidate(participant_uuid)
     logger.info(f"Participant deleted: auction={slug}, id={participant_id}")
 
     return {"success": True, "id": participant_id}
@@ -323,56 +412,64 @@ async def update_auction_status(
     auction = await get_auction_by_slug(db, slug)
     if not auction:
         raise HTTPException(404, "Auction not found")
+    if payload.status.value == "live":
+        _check_not_over(auction)
 
     auction = await change_auction_status(db, auction, payload.status.value)
+    bid_engine.set_auction_status(auction.id, auction.status)
+    seq = await state_cache.status_changed(auction.id, auction.status)
+    await analytics_cache.invalidate_everywhere()
     logger.info(f"Auction status changed: {slug} -> {auction.status}")
+    if auction.status == "live":
+        await lot_timer.auctions_started([auction.id])
 
-    if payload.status.value == "live" and auction.end_time:
-        end_delay = (auction.end_time - datetime.now(timezone.utc)).total_seconds()
-        if end_delay > 0:
-            try:
-                job = Job.fetch(f"auction_end_{auction.id}", connection=r)
-                job.cancel()
-            except NoSuchJobError:
-                pass
-            q.enqueue_in(
-                timedelta(seconds=end_delay),
-                end_auction,
-                str(auction.id),
-                job_id=f"auction_end_{auction.id}",
-            )
-            logger.info(f"Scheduled auto-end for auction {slug} in {end_delay}s")
+    if payload.status.value == "live":
+        # Started by hand: its start job is moot.
+        auction_scheduler.reschedule([(auction.id, None, auction.end_time)])
+        logger.info(f"Rescheduled auction {slug}: end={auction.end_time}")
 
     if payload.status.value == "ended":
-        try:
-            job = Job.fetch(f"auction_end_{auction.id}", connection=r)
-            job.cancel()
-            logger.info(f"Canceled scheduled end job for auction {slug}")
-        except NoSuchJobError:
-            pass
+        auction_scheduler.cancel([auction.id])
+        logger.info(f"Canceled scheduled jobs for auction {slug}")
 
-    from app.websocket import sio, AUCTION_NS
+    from app.websocket import room_broadcaster
 
-    await sio.emit(
-        "status", {"status": auction.status}, room=slug, namespace=AUCTION_NS
-    )
+    event = {"status": auction.status}
+    if seq is not None:
+        event.update(state_cache.peek_by_id(auction.id).stamp(seq))
+    await room_broadcaster.send(slug, "status", event)
 
     return {"status": auction.status}
 
 @router.post("/auctions/{auction_id}/start-manual")
-async def start_auction_manually(auction_id: str):
+async def start_auction_manually(
+    auction_id: str,
+    db: AsyncSession = Depends(get_session),
+):
+    from uuid import UUID
     try:
-        job = Job.fetch(f"auction_{auction_id}", connection=r)
-        job.cancel()
-        logger.info(f"Canceled scheduled start for auction {auction_id}")
-    except NoSuchJobError:
-        pass
+        auction_uuid = UUID(auction_id)
+    except ValueError:
+        raise HTTPException(400, "Invalid auction ID")
 
-    activate_auction(auction_id)
+    auction = await db.get(Auction, auction_uuid)
+    if not auction:
+        raise HTTPException(404, "Auction not found")
+    _check_not_over(auction)
+
+    auction_scheduler.cancel([auction_id], end=False)
+    logger.info(f"Canceled scheduled start for auction {auction_id}")
+
+    await activate_auction(auction_id)
     logger.info(f"Manually started auction {auction_id}")
 
     return {"status": "live", "manual_start": True}
 
+def _check_not_over(auction: Auction) -> None:
+    # A live auction past its end time would be ended again at once.
+    if auction.end_time and auction.end_time <= datetime.now(timezone.utc):
+        raise HTTPException(400, "Auction end time has passed")
+
 @router.delete("/auctions/{slug}")
 async def delete_auction(
     slug: str,
@@ -382,17 +479,17 @@ async def delete_auction(
     if not auction:
         raise HTTPException(404, "Auction not found")
 
-    for job_id in [f"auction_{auction.id}", f"auction_end_{auction.id}"]:
-        try:
-            job = Job.fetch(job_id, connection=r)
-            job.cancel()
-            logger.info(f"Canceled scheduled job {job_id} for deleted auction {auction.id}")
-        except NoSuchJobError:
-            pass
+    auction_scheduler.cancel([auction.id])
+    logger.info(f"Canceled scheduled jobs for deleted auction {auction.id}")
 
     from app.repositories import AuctionRepository
     repo = AuctionRepository(db)
     await repo.delete(auction)
+    live_counters.auction_deleted(auction.status, auction.start_time is not None)
+    bid_engine.evict_auction(auction.id)
+    state_cache.invalidate(auction.id)
+    participant_cache.invalidate_auction(auction.id)
+    await analytics_cache.invalidate_everywhere()
 
     logger.info(f"Auction deleted: {slug}")
 
@@ -400,11 +497,14 @@ async def delete_auction(
 
 @router.get("/vendors", response_model=List[VendorRead])
 async def list_all_vendors(
-    db: AsyncSession = Depends(get_session),
-    skip: int = Query(0, ge=0),
+    response: Response,
+    db: AsyncSession = Depends(get_read_session),
+    cursor: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0, deprecated=True),
     limit: int = Query(100, ge=1, le=1000),
 ):
-    vendors = await list_vendors(db, skip=skip, limit=limit)
+    vendors = await list_vendors(db, skip=skip, limit=limit, before=_parse_cursor(cursor))
+    _set_next_cursor(response, vendors, limit, lambda vendor: (vendor.created_at, vendor.id))
     logger.info(f"Admin listed vendors: skip={skip}, limit={limit}, count={len(vendors)}")
     return vendors
 
@@ -451,6 +551,7 @@ async def update_existing_vendor(
     )
     if not vendor:
         raise HTTPException(404, "Vendor not found")
+    participant_cache.invalidate_vendor(vendor_uuid)
 
     logger.info(f"Vendor updated: id={vendor_id}")
     return vendor
@@ -469,49 +570,85 @@ async def delete_existing_vendor(
     success = await delete_vendor(db, vendor_uuid)
     if not success:
         raise HTTPException(404, "Vendor not found")
+    participant_cache.invalidate_vendor(vendor_uuid)
 
     logger.info(f"Vendor deleted: id={vendor_id}")
     return {"success": True, "id": vendor_id}
 
-@router.get("/analytics/dashboard", response_model=DashboardSummary)
-async def get_dashboard_analytics(
-    db: AsyncSession = Depends(get_session),
-):
+@router.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+async def _analytics_response(key, report, response: Response, debug: bool) -> dict:
+    # Debug requests bypass the cache so their timings are real.
+    if debug:
+        return await analytics.run(report, debug=True)
+    entry = await analytics.cached(key, report)
+    response.headers["Age"] = str(int(entry.age))
+    return {**entry.value, "cache_age_sec": round(entry.age, 2)}
+
+@router.get(
+    "/analytics/dashboard",
+    response_model=DashboardSummary,
+    response_model_exclude_unset=True,
+)
+async def get_dashboard_analytics(response: Response, debug: bool = False):
     logger.info("Dashboard analytics requested")
-    return await analytics.get_dashboard_summary(db)
+    return await _analytics_response(
+        "dashboard", analytics.get_dashboard_summary, response, debug
+    )
 
-@router.get("/analytics/auctions", response_model=AuctionAnalytics)
-async def get_auction_analytics(
-    db: AsyncSession = Depends(get_session),
-):
+@router.get(
+    "/analytics/auctions",
+    response_model=AuctionAnalytics,
+    response_model_exclude_unset=True,
+)
+async def get_auction_analytics(response: Response, debug: bool = False):
     logger.info("Auction analytics requested")
-    return await analytics.get_auction_analytics(db)
+    return await _analytics_response(
+        "auctions", analytics.get_auction_analytics, response, debug
+    )
 
-@router.get("/analytics/bids", response_model=BidAnalytics)
-async def get_bid_analytics(
-    db: AsyncSession = Depends(get_session),
-):
+@router.get(
+    "/analytics/bids",
+    response_model=BidAnalytics,
+    response_model_exclude_unset=True,
+)
+async def get_bid_analytics(response: Response, debug: bool = False):
     logger.info("Bid analytics requested")
-    return await analytics.get_bid_analytics(db)
+    return await _analytics_response(
+        "bids", analytics.get_bid_analytics, response, debug
+    )
 
-@router.get("/analytics/revenue", response_model=RevenueAnalytics)
-async def get_revenue_analytics(
-    db: AsyncSession = Depends(get_session),
-):
+@router.get(
+    "/analytics/revenue",
+    response_model=RevenueAnalytics,
+    response_model_exclude_unset=True,
+)
+async def get_revenue_analytics(response: Response, debug: bool = False):
     logger.info("Revenue analytics requested")
-    return await analytics.get_revenue_analytics(db)
+    return await _analytics_response(
+        "revenue", analytics.get_revenue_analytics, response, debug
+    )
 
-@router.get("/analytics/vendors", response_model=VendorAnalytics)
-async def get_vendor_analytics(
-    db: AsyncSession = Depends(get_session),
-):
+@router.get(
+    "/analytics/vendors",
+    response_model=VendorAnalytics,
+    response_model_exclude_unset=True,
+)
+async def get_vendor_analytics(response: Response, debug: bool = False):
     logger.info("Vendor analytics requested")
-    return await analytics.get_vendor_analytics(db)
+    return await _analytics_response(
+        "vendors", analytics.get_vendor_analytics, response, debug
+    )
 
-@router.get("/analytics/auctions/{auction_id}/participants", response_model=ParticipantAnalytics)
-async def get_auction_participant_analytics(
-    auction_id: str,
-    db: AsyncSession = Depends(get_session),
-):
+@router.get(
+    "/analytics/auctions/{auction_id}/participants",
+    response_model=ParticipantAnalytics,
+    response_model_exclude_unset=True,
+)
+async def get_auction_participant_analytics(auction_id: str, debug: bool = False):
     logger.info(f"Participant analytics requested for auction: {auction_id}")
-    return await analytics.get_participant_analytics(auction_id, db)
+    return await analytics.run(
+        analytics.get_participant_analytics, auction_id, debug=debug
+    )
@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from app.db import get_session
+from app.db import get_read_session
 from app.models import Auction
 from app.schemas import AuctionRead
 
@@ -13,7 +13,7 @@ logger = logging.getLogger("auction.routes.public")
 router = APIRouter(prefix="/auctions", tags=["public"])
 
 @router.get("/{slug}", response_model=AuctionRead)
-async def get_auction(slug: str, db: AsyncSession = Depends(get_session)):
+async def get_auction(slug: str, db: AsyncSession = Depends(get_read_session)):
     result = await db.execute(
         select(Auction).options(selectinload(Auction.lots)).where(Auction.slug == slug)
     )
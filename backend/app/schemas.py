@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
 from decimal import Decimal
 from datetime import datetime
@@ -12,12 +12,17 @@ class AuctionCreate(BaseModel):
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
 
+class AuctionBulkCreate(BaseModel):
+    auctions: List[AuctionCreate] = Field(min_length=1, max_length=1000)
+
 class LotCreate(BaseModel):
     name: str = Field(min_length=1, max_length=255)
     base_price: Decimal = Field(default=0, ge=0)
     min_increment: Decimal = Field(default=1, gt=0)
     currency: Currency = Currency.EUR
     image_url: Optional[str] = None
+    end_time: Optional[datetime] = None
+    extension_sec: int = Field(default=0, ge=0)
 
 class ParticipantCreate(BaseModel):
     vendor_id: UUID
@@ -61,6 +66,7 @@ class LotRead(BaseModel):
     current_price: Decimal
     current_leader: Optional[UUID] = None
     end_time: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
     image_url: Optional[str] = None
 
     class Config:
@@ -80,12 +86,32 @@ class AuctionRead(BaseModel):
     class Config:
         from_attributes = True
 
+# Admin listing row: aggregates instead of every lot, unless ?include=lots.
+class AuctionSummary(BaseModel):
+    id: UUID
+    slug: str
+    title: str
+    description: Optional[str]
+    status: AuctionStatus
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+    created_at: datetime
+    lot_count: int
+    bid_count: int
+    total_current_value: Decimal
+    lots: Optional[List[LotRead]] = None
+
+    class Config:
+        from_attributes = True
+
 class AuctionAnalytics(BaseModel):
     total_auctions: int
     active_auctions: int
     recent_auctions: int
     scheduled_auctions: int
     by_status: dict
+    cache_age_sec: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
 
 class BidActivityData(BaseModel):
     date: Optional[str]
@@ -97,6 +123,8 @@ class BidAnalytics(BaseModel):
     avg_bids_per_lot: float
     unique_bidders: int
     daily_activity: List[BidActivityData]
+    cache_age_sec: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
 
 class RevenueAnalytics(BaseModel):
     realized_revenue: float
@@ -108,6 +136,8 @@ class RevenueAnalytics(BaseModel):
     conversion_rate: float
     avg_winning_premium: float
     by_currency: dict
+    cache_age_sec: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
 
 class TopVendor(BaseModel):
     id: str
@@ -124,6 +154,8 @@ class VendorAnalytics(BaseModel):
     blocked_participations: int
     leading_vendors: int
     top_vendors: List[TopVendor]
+    cache_age_sec: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
 
 class ParticipantAnalytics(BaseModel):
     total_participants: int
@@ -132,6 +164,7 @@ class ParticipantAnalytics(BaseModel):
     participants_with_bids: int
     current_leaders: int
     engagement_rate: float
+    timings: Optional[Dict[str, float]] = None
 
 class DashboardSummary(BaseModel):
     auctions: AuctionAnalytics
@@ -139,6 +172,8 @@ class DashboardSummary(BaseModel):
     revenue: RevenueAnalytics
     vendors: VendorAnalytics
     generated_at: str
+    cache_age_sec: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
 
 class BidLogEntry(BaseModel):
     id: UUID
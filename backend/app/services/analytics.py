@@ -1,286 +1,338 @@
-from datetime import datetime, timedelta
-from typing import Dict, Any
-from sqlalchemy import func, select, and_, cast, Numeric
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import Auction, Lot, Bid, Participant, Vendor
-
-async def get_auction_analytics(db: AsyncSession) -> Dict[str, Any]:
-
-    status_query = select(
-        Auction.status,
-        func.count(Auction.id).label('count')
-    ).group_by(Auction.status)
-
-    status_result = await db.execute(status_query)
-    status_counts = {row.status: row.count for row in status_result}
-
-    total_auctions = sum(status_counts.values())
+import asyncio
+from time import perf_counter
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import Row, func, select, and_, cast, Numeric
+from app import metrics
+from app.config import settings
+from app.db import replica
+from app.models import (
+    Auction,
+    Lot,
+    Bid,
+    Participant,
+    Vendor,
+    BidRollupDaily,
+    BidRollupLot,
+    BidRollupParticipant,
+)
+from app.services.live_counters import live_counters
+from app.services.response_cache import CachedResponse, analytics_cache
+
+# Shared by every analytics request, so reports can never hold more than this
+# many of the engine's connections and starve the bid path (they run on the
+# replica when one is configured and current, and on the primary otherwise).
+_connections = asyncio.Semaphore(settings.analytics_max_connections)
+connection_wait = metrics.histogram("analytics.connection_wait_ms")
+
+# Independent aggregates run concurrently, each on its own pooled connection
+# (and therefore its own snapshot), instead of one after another on a session.
+class AnalyticsQueries:
+
+    def __init__(self, debug: bool = False):
+        self.timings: Optional[Dict[str, float]] = {} if debug else None
+        self._counters: Optional[asyncio.Future] = None
+
+    async def counters(self) -> Optional[Dict[str, Any]]:
+        # One Redis round trip per request, however many reports need it.
+        if self._counters is None:
+            self._counters = asyncio.ensure_future(live_counters.snapshot())
+        return await self._counters
+
+    async def all(self, name: str, stmt) -> List[Row]:
+        queued = perf_counter()
+        async with _connections:
+            started = perf_counter()
+            connection_wait.observe((started - queued) * 1000)
+            read_engine = await replica.read_engine()
+            async with read_engine.connect() as conn:
+                rows = (await conn.execute(stmt)).all()
+            if self.timings is not None:
+                self.timings[name] = round((perf_counter() - started) * 1000, 2)
+        return rows
+
+    async def one(self, name: str, stmt) -> Row:
+        return (await self.all(name, stmt))[0]
+
+    async def scalar(self, name: str, stmt) -> Any:
+        return (await self.one(name, stmt))[0]
+
+async def run(
+    report: Callable[..., Awaitable[Dict[str, Any]]], *args, debug: bool = False
+) -> Dict[str, Any]:
+    queries = AnalyticsQueries(debug)
+    started = perf_counter()
+    result = await report(*args, queries)
+    if debug:
+        result['timings'] = {
+            **queries.timings,
+            'total': round((perf_counter() - started) * 1000, 2),
+        }
+    return result
+
+async def cached(
+    key: str, report: Callable[..., Awaitable[Dict[str, Any]]]
+) -> CachedResponse:
+    return await analytics_cache.get(key, lambda: run(report))
+
+async def get_auction_analytics(queries: AnalyticsQueries) -> Dict[str, Any]:
+
+    counters = await queries.counters()
+    if counters is not None:
+        totals = counters['totals']
+        return {
+            'total_auctions': totals['auctions'],
+            'active_auctions': totals['auctions:live'] + totals['auctions:paused'],
+            'recent_auctions': counters['recent_auctions'],
+            'scheduled_auctions': totals['auctions:scheduled'],
+            'by_status': {
+                'draft': totals['auctions:draft'],
+                'live': totals['auctions:live'],
+                'paused': totals['auctions:paused'],
+                'ended': totals['auctions:ended'],
+            }
+        }
 
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_query = select(func.count(Auction.id)).where(
-        Auction.created_at >= thirty_days_ago
-    )
-    recent_result = await db.execute(recent_query)
-    recent_auctions = recent_result.scalar() or 0
-
-    active_auctions = status_counts.get('live', 0) + status_counts.get('paused', 0)
-
-    scheduled_query = select(func.count(Auction.id)).where(
-        Auction.start_time.isnot(None)
+    row = await queries.one(
+        'auctions.totals',
+        select(
+            func.count(Auction.id).label('total'),
+            *[
+                func.count(Auction.id).filter(Auction.status == status).label(status)
+                for status in ('draft', 'live', 'paused', 'ended')
+            ],
+            func.count(Auction.id).filter(
+                Auction.created_at >= thirty_days_ago
+            ).label('recent'),
+            func.count(Auction.id).filter(
+                Auction.start_time.isnot(None)
+            ).label('scheduled'),
+        ),
     )
-    scheduled_result = await db.execute(scheduled_query)
-    scheduled_auctions = scheduled_result.scalar() or 0
 
     return {
-        'total_auctions': total_auctions,
-        'active_auctions': active_auctions,
-        'recent_auctions': recent_auctions,
-        'scheduled_auctions': scheduled_auctions,
+        'total_auctions': row.total,
+        'active_auctions': row.live + row.paused,
+        'recent_auctions': row.recent,
+        'scheduled_auctions': row.scheduled,
         'by_status': {
-            'draft': status_counts.get('draft', 0),
-            'live': status_counts.get('live', 0),
-            'paused': status_counts.get('paused', 0),
-            'ended': status_counts.get('ended', 0),
+            'draft': row.draft,
+            'live': row.live,
+            'paused': row.paused,
+            'ended': row.ended,
         }
     }
 
-async def get_bid_analytics(db: AsyncSession) -> Dict[str, Any]:
-
-    total_bids_query = select(func.count(Bid.id))
-    total_bids_result = await db.execute(total_bids_query)
-    total_bids = total_bids_result.scalar() or 0
+# Live counters first (app/services/live_counters.py). Without them bid counts
+# come from the rollup tables (app/services/rollups.py), trailing live bidding
+# by up to ROLLUP_REFRESH_SEC; only the 24h window reads bids, as an index
+# range scan on placed_at.
+async def get_bid_analytics(queries: AnalyticsQueries) -> Dict[str, Any]:
+
+    counters = await queries.counters()
+    if counters is not None:
+        total_bids = counters['totals']['bids']
+        lots_with_bids = counters['lots_with_bids']
+        return {
+            'total_bids': total_bids,
+            'recent_bids_24h': counters['recent_bids_24h'],
+            'avg_bids_per_lot': round(total_bids / lots_with_bids, 2) if lots_with_bids else 0,
+            'unique_bidders': counters['unique_bidders'],
+            'daily_activity': [
+                {
+                    'date': datetime.combine(
+                        date.fromisoformat(day), time.min, tzinfo=timezone.utc
+                    ).isoformat(),
+                    'count': count
+                }
+                for day, count in counters['daily_bids']
+            ]
+        }
 
     twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-    recent_bids_query = select(func.count(Bid.id)).where(
-        Bid.placed_at >= twenty_four_hours_ago
+    totals_query = select(
+        select(func.coalesce(func.sum(BidRollupLot.bid_count), 0))
+        .scalar_subquery().label('total_bids'),
+        select(func.avg(BidRollupLot.bid_count))
+        .scalar_subquery().label('avg_bids_per_lot'),
+        select(func.count(BidRollupParticipant.participant_id))
+        .scalar_subquery().label('unique_bidders'),
+        select(func.count(Bid.id))
+        .where(Bid.placed_at >= twenty_four_hours_ago)
+        .scalar_subquery().label('recent_bids'),
     )
-    recent_bids_result = await db.execute(recent_bids_query)
-    recent_bids = recent_bids_result.scalar() or 0
 
-    bids_per_lot_subq = (
-        select(func.count(Bid.id).label('bid_count'))
-        .group_by(Bid.lot_id)
-        .subquery()
-    )
-    avg_bids_query = select(func.avg(bids_per_lot_subq.c.bid_count))
-    avg_bids_result = await db.execute(avg_bids_query)
-    avg_bids_per_lot = float(avg_bids_result.scalar() or 0)
-
-    unique_bidders_query = select(func.count(func.distinct(Bid.participant_id)))
-    unique_bidders_result = await db.execute(unique_bidders_query)
-    unique_bidders = unique_bidders_result.scalar() or 0
-
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    date_col = func.date_trunc('day', Bid.placed_at)
+    seven_days_ago = (datetime.utcnow() - timedelta(days=7)).date()
     daily_bids_query = select(
-        date_col.label('date'),
-        func.count(Bid.id).label('count')
+        BidRollupDaily.day,
+        func.sum(BidRollupDaily.bid_count).label('count')
     ).where(
-        Bid.placed_at >= seven_days_ago
+        BidRollupDaily.day >= seven_days_ago
     ).group_by(
-        date_col
-    ).order_by(date_col)
+        BidRollupDaily.day
+    ).order_by(BidRollupDaily.day)
 
-    daily_bids_result = await db.execute(daily_bids_query)
+    totals, daily_bids_rows = await asyncio.gather(
+        queries.one('bids.totals', totals_query),
+        queries.all('bids.daily', daily_bids_query),
+    )
     daily_bids = [
         {
-            'date': row.date.isoformat() if row.date else None,
-            'count': row.count
+            'date': datetime.combine(row.day, time.min, tzinfo=timezone.utc).isoformat(),
+            'count': int(row.count)
         }
-        for row in daily_bids_result
+        for row in daily_bids_rows
     ]
 
     return {
-        'total_bids': total_bids,
-        'recent_bids_24h': recent_bids,
-        'avg_bids_per_lot': round(avg_bids_per_lot, 2),
-        'unique_bidders': unique_bidders,
+        'total_bids': int(totals.total_bids),
+        'recent_bids_24h': totals.recent_bids,
+        'avg_bids_per_lot': round(float(totals.avg_bids_per_lot or 0), 2),
+        'unique_bidders': totals.unique_bidders,
         'daily_activity': daily_bids
     }
 
-async def get_revenue_analytics(db: AsyncSession) -> Dict[str, Any]:
-
-    current_value_query = select(
-        func.sum(cast(Lot.current_price, Numeric)).label('total')
-    )
-    current_value_result = await db.execute(current_value_query)
-    current_lot_value = float(current_value_result.scalar() or 0)
-
-    realized_revenue_query = select(
-        func.sum(cast(Lot.current_price, Numeric))
+async def get_revenue_analytics(queries: AnalyticsQueries) -> Dict[str, Any]:
+
+    ended = Auction.status == 'ended'
+    price = cast(Lot.current_price, Numeric)
+    base_price = cast(Lot.base_price, Numeric)
+
+    totals_query = select(
+        func.sum(price).label('current_lot_value'),
+        func.sum(price).filter(ended).label('realized_revenue'),
+        func.avg(price).filter(ended).label('avg_lot_price'),
+        func.count(Lot.id).label('total_lots'),
+        func.count(Lot.id).filter(ended).label('ended_lots'),
+        func.count(BidRollupLot.lot_id).label('lots_with_bids'),
+        func.count(BidRollupLot.lot_id).filter(ended).label('ended_lots_with_bids'),
+        func.avg((price - base_price) / base_price * 100).filter(
+            and_(ended, Lot.current_price > Lot.base_price)
+        ).label('avg_winning_premium'),
     ).select_from(Lot).join(
         Auction, Lot.auction_id == Auction.id
-    ).where(
-        Auction.status == 'ended'
+    ).outerjoin(
+        BidRollupLot, BidRollupLot.lot_id == Lot.id
     )
-    realized_revenue_result = await db.execute(realized_revenue_query)
-    realized_revenue = float(realized_revenue_result.scalar() or 0)
 
     revenue_by_currency_query = select(
         Lot.currency,
-        func.sum(cast(Lot.current_price, Numeric)).label('revenue')
+        func.sum(price).label('revenue')
     ).select_from(Lot).join(
         Auction, Lot.auction_id == Auction.id
     ).where(
-        Auction.status == 'ended'
+        ended
     ).group_by(Lot.currency)
 
-    revenue_by_currency_result = await db.execute(revenue_by_currency_query)
+    row, revenue_by_currency_rows = await asyncio.gather(
+        queries.one('revenue.totals', totals_query),
+        queries.all('revenue.by_currency', revenue_by_currency_query),
+    )
     revenue_by_currency = {
-        row.currency: float(row.revenue or 0)
-        for row in revenue_by_currency_result
+        r.currency: float(r.revenue or 0)
+        for r in revenue_by_currency_rows
     }
 
-    total_lots_query = select(func.count(Lot.id))
-    total_lots_result = await db.execute(total_lots_query)
-    total_lots = total_lots_result.scalar() or 0
-
-    lots_with_bids_query = select(
-        func.count(func.distinct(Lot.id))
-    ).select_from(Lot).join(Bid, Lot.id == Bid.lot_id)
-    lots_with_bids_result = await db.execute(lots_with_bids_query)
-    lots_with_bids = lots_with_bids_result.scalar() or 0
-
-    ended_lots_query = select(func.count(Lot.id)).select_from(Lot).join(
-        Auction, Lot.auction_id == Auction.id
-    ).where(Auction.status == 'ended')
-    ended_lots_result = await db.execute(ended_lots_query)
-    ended_lots = ended_lots_result.scalar() or 0
-
-    ended_lots_with_bids_query = select(
-        func.count(func.distinct(Lot.id))
-    ).select_from(Lot).join(
-        Auction, Lot.auction_id == Auction.id
-    ).join(
-        Bid, Lot.id == Bid.lot_id
-    ).where(Auction.status == 'ended')
-    ended_lots_with_bids_result = await db.execute(ended_lots_with_bids_query)
-    ended_lots_with_bids = ended_lots_with_bids_result.scalar() or 0
-
-    conversion_rate = (ended_lots_with_bids / ended_lots * 100) if ended_lots > 0 else 0
-
-    premium_query = select(
-        func.avg(
-            (cast(Lot.current_price, Numeric) - cast(Lot.base_price, Numeric))
-            / cast(Lot.base_price, Numeric) * 100
-        )
-    ).select_from(Lot).join(
-        Auction, Lot.auction_id == Auction.id
-    ).where(
-        and_(
-            Auction.status == 'ended',
-            Lot.current_price > Lot.base_price
-        )
-    )
-    premium_result = await db.execute(premium_query)
-    avg_winning_premium = float(premium_result.scalar() or 0)
-
-    avg_price_query = select(
-        func.avg(cast(Lot.current_price, Numeric))
-    ).select_from(Lot).join(
-        Auction, Lot.auction_id == Auction.id
-    ).where(Auction.status == 'ended')
-    avg_price_result = await db.execute(avg_price_query)
-    avg_lot_price = float(avg_price_result.scalar() or 0)
+    ended_lots = row.ended_lots
+    conversion_rate = (row.ended_lots_with_bids / ended_lots * 100) if ended_lots > 0 else 0
 
     return {
-        'realized_revenue': round(realized_revenue, 2),
-        'current_lot_value': round(current_lot_value, 2),
-        'avg_lot_price': round(avg_lot_price, 2),
-        'total_lots': total_lots,
+        'realized_revenue': round(float(row.realized_revenue or 0), 2),
+        'current_lot_value': round(float(row.current_lot_value or 0), 2),
+        'avg_lot_price': round(float(row.avg_lot_price or 0), 2),
+        'total_lots': row.total_lots,
         'ended_lots': ended_lots,
-        'lots_with_bids': lots_with_bids,
+        'lots_with_bids': row.lots_with_bids,
         'conversion_rate': round(conversion_rate, 2),
-        'avg_winning_premium': round(avg_winning_premium, 2),
+        'avg_winning_premium': round(float(row.avg_winning_premium or 0), 2),
         'by_currency': revenue_by_currency
     }
 
-async def get_vendor_analytics(db: AsyncSession) -> Dict[str, Any]:
-
-    total_vendors_query = select(func.count(Vendor.id))
-    total_vendors_result = await db.execute(total_vendors_query)
-    total_vendors = total_vendors_result.scalar() or 0
+async def _vendor_totals(queries: AnalyticsQueries, leading_vendors) -> Dict[str, Any]:
+    counters = await queries.counters()
+    if counters is not None:
+        return {
+            'total_vendors': counters['totals']['vendors'],
+            'participating_vendors': counters['participating_vendors'],
+            'bidding_vendors': counters['bidding_vendors'],
+            'total_participations': counters['totals']['participants'],
+            'blocked_participations': counters['totals']['participants:blocked'],
+            'leading_vendors': await queries.scalar(
+                'vendors.leading', select(leading_vendors)
+            ),
+        }
 
-    participating_vendors_query = select(
-        func.count(func.distinct(Participant.vendor_id))
+    row = await queries.one(
+        'vendors.totals',
+        select(
+            select(func.count(Vendor.id))
+            .scalar_subquery().label('total_vendors'),
+            select(func.count(func.distinct(Participant.vendor_id)))
+            .scalar_subquery().label('participating_vendors'),
+            select(func.count(func.distinct(BidRollupParticipant.vendor_id)))
+            .scalar_subquery().label('bidding_vendors'),
+            select(func.count(Participant.id))
+            .scalar_subquery().label('total_participations'),
+            select(func.count(Participant.id))
+            .where(Participant.blocked == True)
+            .scalar_subquery().label('blocked_participations'),
+            leading_vendors.label('leading_vendors'),
+        ),
     )
-    participating_vendors_result = await db.execute(participating_vendors_query)
-    participating_vendors = participating_vendors_result.scalar() or 0
+    return row._asdict()
 
-    bidding_vendors_query = select(
-        func.count(func.distinct(Participant.vendor_id))
-    ).select_from(Participant).join(
-        Bid, Participant.id == Bid.participant_id
-    )
-    bidding_vendors_result = await db.execute(bidding_vendors_query)
-    bidding_vendors = bidding_vendors_result.scalar() or 0
-
-    total_participations_query = select(func.count(Participant.id))
-    total_participations_result = await db.execute(total_participations_query)
-    total_participations = total_participations_result.scalar() or 0
-
-    blocked_participations_query = select(
-        func.count(Participant.id)
-    ).where(Participant.blocked == True)
-    blocked_participations_result = await db.execute(blocked_participations_query)
-    blocked_participations = blocked_participations_result.scalar() or 0
-
-    leading_vendors_query = select(
-        func.count(func.distinct(Participant.vendor_id))
-    ).select_from(Participant).join(
-        Lot, Participant.id == Lot.current_leader
+async def get_vendor_analytics(queries: AnalyticsQueries) -> Dict[str, Any]:
+
+    leading_vendors = (
+        select(func.count(func.distinct(Participant.vendor_id)))
+        .select_from(Participant)
+        .join(Lot, Participant.id == Lot.current_leader)
+        .scalar_subquery()
     )
-    leading_vendors_result = await db.execute(leading_vendors_query)
-    leading_vendors = leading_vendors_result.scalar() or 0
 
+    bid_count = func.coalesce(func.sum(BidRollupParticipant.bid_count), 0)
     top_vendors_query = select(
         Vendor.id,
         Vendor.name,
         Vendor.email,
-        func.count(func.distinct(Participant.id)).label('auction_count'),
-        func.count(Bid.id).label('bid_count')
+        func.count(Participant.id).label('auction_count'),
+        bid_count.label('bid_count')
     ).select_from(Vendor).join(
         Participant, Vendor.id == Participant.vendor_id
     ).outerjoin(
-        Bid, Participant.id == Bid.participant_id
+        BidRollupParticipant, Participant.id == BidRollupParticipant.participant_id
     ).group_by(
         Vendor.id, Vendor.name, Vendor.email
     ).order_by(
-        func.count(Bid.id).desc()
+        bid_count.desc()
     ).limit(10)
 
-    top_vendors_result = await db.execute(top_vendors_query)
+    totals, top_vendors_rows = await asyncio.gather(
+        _vendor_totals(queries, leading_vendors),
+        queries.all('vendors.top', top_vendors_query),
+    )
     top_vendors = [
         {
             'id': str(row.id),
             'name': row.name,
             'email': row.email,
             'auction_count': row.auction_count,
-            'bid_count': row.bid_count
+            'bid_count': int(row.bid_count)
         }
-        for row in top_vendors_result
+        for row in top_vendors_rows
     ]
 
-    return {
-        'total_vendors': total_vendors,
-        'participating_vendors': participating_vendors,
-        'bidding_vendors': bidding_vendors,
-        'total_participations': total_participations,
-        'blocked_participations': blocked_participations,
-        'leading_vendors': leading_vendors,
-        'top_vendors': top_vendors
-    }
+    return {**totals, 'top_vendors': top_vendors}
 
 async def get_participant_analytics(
     auction_id: str,
-    db: AsyncSession
+    queries: AnalyticsQueries
 ) -> Dict[str, Any]:
 
     total_query = select(func.count(Participant.id)).where(
         Participant.auction_id == auction_id
     )
-    total_result = await db.execute(total_query)
-    total = total_result.scalar() or 0
 
     active_query = select(func.count(Participant.id)).where(
         and_(
@@ -288,8 +340,6 @@ async def get_participant_analytics(
             Participant.blocked == False
         )
     )
-    active_result = await db.execute(active_query)
-    active = active_result.scalar() or 0
 
     with_bids_query = select(
         func.count(func.distinct(Bid.participant_id))
@@ -298,8 +348,6 @@ async def get_participant_analytics(
     ).where(
         Lot.auction_id == auction_id
     )
-    with_bids_result = await db.execute(with_bids_query)
-    with_bids = with_bids_result.scalar() or 0
 
     leaders_query = select(
         func.count(func.distinct(Lot.current_leader))
@@ -309,29 +357,38 @@ async def get_participant_analytics(
             Lot.current_leader.isnot(None)
         )
     )
-    leaders_result = await db.execute(leaders_query)
-    current_leaders = leaders_result.scalar() or 0
+
+    total, active, with_bids, current_leaders = await asyncio.gather(
+        queries.scalar('participants.total', total_query),
+        queries.scalar('participants.active', active_query),
+        queries.scalar('participants.with_bids', with_bids_query),
+        queries.scalar('participants.leaders', leaders_query),
+    )
+    total, active, with_bids = total or 0, active or 0, with_bids or 0
 
     return {
         'total_participants': total,
         'active_participants': active,
         'blocked_participants': total - active,
         'participants_with_bids': with_bids,
-        'current_leaders': current_leaders,
+        'current_leaders': current_leaders or 0,
         'engagement_rate': round((with_bids / total * 100) if total > 0 else 0, 2)
     }
 
-async def get_dashboard_summary(db: AsyncSession) -> Dict[str, Any]:
+async def get_dashboard_summary(queries: AnalyticsQueries) -> Dict[str, Any]:
 
-    auction_stats = await get_auction_analytics(db)
-    bid_stats = await get_bid_analytics(db)
-    revenue_stats = await get_revenue_analytics(db)
-    vendor_stats = await get_vendor_analytics(db)
+    generated_at = datetime.now(timezone.utc)
+    auction_stats, bid_stats, revenue_stats, vendor_stats = await asyncio.gather(
+        get_auction_analytics(queries),
+        get_bid_analytics(queries),
+        get_revenue_analytics(queries),
+        get_vendor_analytics(queries),
+    )
 
     return {
         'auctions': auction_stats,
         'bids': bid_stats,
         'revenue': revenue_stats,
         'vendors': vendor_stats,
-        'generated_at': datetime.utcnow().isoformat()
+        'generated_at': generated_at.isoformat()
     }
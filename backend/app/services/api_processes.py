@@ -0,0 +1,80 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from typing import Optional
+from uuid import uuid4
+
+import redis.asyncio as aioredis
+
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger("auction.api_processes")
+
+api_processes_seen = metrics.gauge("api_processes.count")
+
+# API processes serving the Socket.IO rooms, counted from heartbeats in the
+# message queue's Redis: a sorted set of process ids scored by their last beat,
+# where anything three beats old is gone. Whatever only holds while one process
+# serves every room (per-process state seqs, the in-memory bid engine) checks
+# alone. Without the message queue rooms are not shared, and the process counts
+# itself only.
+class ApiProcesses:
+
+    def __init__(self):
+        self.count = 1
+        self._redis: Optional[aioredis.Redis] = None
+        self._origin = uuid4().hex
+        self._key = f"{settings.socketio_channel}:api_processes"
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alone(self) -> bool:
+        return self.count <= 1
+
+    async def start(self) -> None:
+        if not settings.socketio_message_queue:
+            return
+        await self._beat()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"API processes: {self.count}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self._client().zrem(self._key, self._origin)
+        except Exception as e:
+            logger.warning(f"Leaving the API process set failed: {e}")
+
+    def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+        return self._redis
+
+    async def _beat(self) -> None:
+        now = time.time()
+        async with self._client().pipeline(transaction=True) as pipe:
+            pipe.zadd(self._key, {self._origin: now})
+            pipe.zremrangebyscore(self._key, "-inf", now - 3 * settings.api_heartbeat_sec)
+            pipe.zcard(self._key)
+            *_, count = await pipe.execute()
+        if count != self.count:
+            logger.info(f"API processes: {self.count} -> {count}")
+        self.count = count
+        api_processes_seen.set(count)
+
+    async def _run(self) -> None:
+        # A failed beat keeps the last count.
+        while True:
+            await asyncio.sleep(settings.api_heartbeat_sec)
+            try:
+                await self._beat()
+            except Exception as e:
+                logger.warning(f"API process heartbeat failed: {e}")
+
+api_processes = ApiProcesses()
@@ -1,11 +1,12 @@
 from __future__ import annotations
 from uuid import uuid4, UUID
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import select, func
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, insert, select, func, true
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import Auction, Participant, Lot
-from sqlalchemy.orm import selectinload
+from app.models import Auction, BidRollupLot, Participant, Lot, Vendor
+from app.services.live_counters import live_counters
+from app.services.pagination import Cursor, keyset
 from app.utils import generate_slug, generate_token, to_iso_string
 
 async def create_auction(
@@ -31,8 +32,108 @@ async def create_auction(
     db.add(auction)
     await db.commit()
     await db.refresh(auction)
+    live_counters.auction_created(auction.status, auction.start_time is not None)
     return auction
 
+async def create_auctions(
+    db: AsyncSession, auctions: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    # Takes title, description, start_time and end_time of each. One slug
+    # check per attempt and one multi-row INSERT for the whole batch.
+    slugs: List[str] = []
+    for attempt in range(5):
+        candidates = {generate_slug() for _ in range(len(auctions) - len(slugs))}
+        candidates.difference_update(slugs)
+        taken = set(
+            await db.scalars(select(Auction.slug).where(Auction.slug.in_(candidates)))
+        )
+        slugs += [slug for slug in candidates if slug not in taken]
+        if len(slugs) == len(auctions):
+            break
+    else:
+        raise RuntimeError("Could not generate unique slugs after 5 attempts")
+
+    rows = [
+        {
+            "id": uuid4(),
+            "slug": slug,
+            "title": auction["title"],
+            "description": auction.get("description"),
+            "start_time": auction.get("start_time"),
+            "end_time": auction.get("end_time"),
+            "status": "draft",
+        }
+        for auction, slug in zip(auctions, slugs)
+    ]
+    await db.execute(insert(Auction), rows)
+    await db.commit()
+    for row in rows:
+        live_counters.auction_created(row["status"], row["start_time"] is not None)
+    return rows
+
+def auction_summaries_query(before: Optional[Cursor] = None):
+    # Per-auction aggregates through LATERAL subqueries, evaluated only for
+    # the rows the page keeps. Bid counts come from the rollups, so they lag
+    # by up to one rollup refresh.
+    lot_stats = (
+        select(
+            func.count().label("lot_count"),
+            func.coalesce(func.sum(Lot.current_price), 0).label("total_current_value"),
+        )
+        .where(Lot.auction_id == Auction.id)
+        .lateral("lot_stats")
+    )
+    bid_stats = (
+        select(func.coalesce(func.sum(BidRollupLot.bid_count), 0).label("bid_count"))
+        .where(BidRollupLot.auction_id == Auction.id)
+        .lateral("bid_stats")
+    )
+    return keyset(
+        select(
+            Auction.id,
+            Auction.slug,
+            Auction.title,
+            Auction.description,
+            Auction.status,
+            Auction.start_time,
+            Auction.end_time,
+            Auction.created_at,
+            lot_stats.c.lot_count,
+            bid_stats.c.bid_count,
+            lot_stats.c.total_current_value,
+        )
+        .select_from(Auction)
+        .join(lot_stats, true())
+        .join(bid_stats, true()),
+        Auction.created_at,
+        Auction.id,
+        before,
+    )
+
+async def list_auction_summaries(
+    db: AsyncSession,
+    limit: int = 10,
+    before: Optional[Cursor] = None,
+    skip: int = 0,
+    include_lots: bool = False,
+) -> List[Dict[str, Any]]:
+    result = await db.execute(auction_summaries_query(before).offset(skip).limit(limit))
+    summaries = [dict(row._mapping) for row in result]
+
+    if include_lots and summaries:
+        by_auction = {summary["id"]: summary for summary in summaries}
+        for summary in summaries:
+            summary["lots"] = []
+        lots = await db.execute(
+            select(Lot.__table__)
+            .where(Lot.auction_id.in_(by_auction))
+            .order_by(Lot.auction_id, Lot.lot_number)
+        )
+        for lot in lots.mappings():
+            by_auction[lot["auction_id"]]["lots"].append(lot)
+
+    return summaries
+
 async def get_auction_by_slug(db: AsyncSession, slug: str) -> Optional[Auction]:
     return await db.scalar(select(Auction).where(Auction.slug == slug))
 
@@ -54,6 +155,7 @@ async def create_participant(
     db.add(p)
     await db.commit()
     await db.refresh(p)
+    live_counters.participant_created(vendor_id)
     return p
 
 async def create_lot(
@@ -64,14 +166,10 @@ async def create_lot(
     min_increment,
     currency: str,
     image_url: Optional[str] = None,
+    end_time=None,
+    extension_sec: int = 0,
 ) -> Lot:
-    max_lot_number = (
-        await db.execute(
-            select(func.max(Lot.lot_number)).where(Lot.auction_id == auction_id)
-        )
-    ).scalar_one()
-
-    lot_number = (max_lot_number or 0) + 1
+    lot_number = await _next_lot_number(db, auction_id)
 
     lot = Lot(
         id=uuid4(),
@@ -83,61 +181,181 @@ async def create_lot(
         currency=currency,
         current_price=base_price,
         image_url=image_url,
+        end_time=end_time,
+        extension_sec=extension_sec,
     )
     db.add(lot)
     await db.commit()
     await db.refresh(lot)
     return lot
 
+# Columns written by the lot import, in COPY order.
+LOT_COLUMNS = (
+    "id",
+    "auction_id",
+    "lot_number",
+    "name",
+    "base_price",
+    "min_increment",
+    "currency",
+    "current_price",
+    "image_url",
+    "end_time",
+    "extension_sec",
+)
+
+async def create_lots(
+    db: AsyncSession, auction_id: UUID, lots: List[Dict[str, Any]]
+) -> List[Lot]:
+    # Takes the create_lot arguments of each. Numbers are assigned in one go
+    # and the rows are written with a single COPY, in the session's
+    # transaction.
+    first = await _next_lot_number(db, auction_id)
+    created = [
+        Lot(
+            id=uuid4(),
+            auction_id=auction_id,
+            lot_number=first + i,
+            name=lot["name"],
+            base_price=lot["base_price"],
+            min_increment=lot["min_increment"],
+            currency=lot["currency"],
+            current_price=lot["base_price"],
+            image_url=lot.get("image_url"),
+            end_time=lot.get("end_time"),
+            extension_sec=lot.get("extension_sec", 0),
+        )
+        for i, lot in enumerate(lots)
+    ]
+    conn = await (await db.connection()).get_raw_connection()
+    await conn.driver_connection.copy_records_to_table(
+        Lot.__tablename__,
+        columns=LOT_COLUMNS,
+        records=[tuple(getattr(lot, c) for c in LOT_COLUMNS) for lot in created],
+    )
+    await db.commit()
+    return created
+
+async def _next_lot_number(db: AsyncSession, auction_id: UUID) -> int:
+    # Locking the auction row serializes lot creation per auction, so
+    # concurrent creates and imports never hand out the same number. NO KEY
+    # UPDATE does not block the foreign key checks of other inserts.
+    await db.execute(
+        select(Auction.id)
+        .where(Auction.id == auction_id)
+        .with_for_update(key_share=True)
+    )
+    max_lot_number = await db.scalar(
+        select(func.max(Lot.lot_number)).where(Lot.auction_id == auction_id)
+    )
+    return (max_lot_number or 0) + 1
+
 async def change_auction_status(
     db: AsyncSession, auction: Auction, status: str
 ) -> Auction:
+    previous = auction.status
     auction.status = status
     await db.commit()
     await db.refresh(auction)
+    live_counters.auction_status_changed(previous, auction.status)
     return auction
 
-async def auction_state_payload(db: AsyncSession, auction: Auction) -> dict:
-    result = await db.execute(
-        select(Auction)
-        .where(Auction.id == auction.id)
-        .options(
-            selectinload(Auction.lots),
-        )
+def lot_state(lot) -> dict:
+    return {
+        "id": str(lot.id),
+        "lot_number": lot.lot_number,
+        "name": lot.name,
+        "currency": lot.currency,
+        "current_price": str(lot.current_price),
+        "current_leader": str(lot.current_leader) if lot.current_leader else None,
+        "end_time": to_iso_string(lot.end_time),
+        "closed_at": to_iso_string(lot.closed_at),
+        "image_url": lot.image_url,
+        "base_price": str(lot.base_price),
+        "min_increment": str(lot.min_increment),
+    }
+
+# Read paths below select columns only and map rows straight to the wire
+# format: no identity map, no ORM instances. The statements are built once and
+# reused with bound parameters, so each call is a compiled-cache hit.
+STATE_AUCTION = (
+    select(
+        Auction.id,
+        Auction.slug,
+        Auction.title,
+        Auction.status,
+        Auction.start_time,
+        Auction.end_time,
+        select(func.count(Participant.id))
+        .where(Participant.auction_id == Auction.id, Participant.blocked == False)
+        .scalar_subquery()
+        .label("participants_count"),
     )
-    auction_with_data = result.scalar_one()
-
-    participants_count = (
-        await db.execute(
-            select(func.count(Participant.id)).where(
-                Participant.auction_id == auction.id,
-                Participant.blocked == False,
-            )
-        )
-    ).scalar_one()
+    .where(Auction.slug == bindparam("slug"))
+)
 
-    return {
+STATE_LOTS = (
+    select(
+        Lot.id,
+        Lot.lot_number,
+        Lot.name,
+        Lot.currency,
+        Lot.current_price,
+        Lot.current_leader,
+        Lot.end_time,
+        Lot.closed_at,
+        Lot.image_url,
+        Lot.base_price,
+        Lot.min_increment,
+    )
+    .where(Lot.auction_id == bindparam("auction_id"))
+    .order_by(Lot.lot_number)
+)
+
+async def auction_state_payload(
+    db: AsyncSession, slug: str
+) -> Optional[Tuple[UUID, dict]]:
+    auction = (await db.execute(STATE_AUCTION, {"slug": slug})).one_or_none()
+    if auction is None:
+        return None
+    lots = await db.execute(STATE_LOTS, {"auction_id": auction.id})
+
+    return auction.id, {
         "auction": {
-            "slug": auction_with_data.slug,
-            "title": auction_with_data.title,
-            "status": auction_with_data.status,
-            "start_time": to_iso_string(auction_with_data.start_time),
-            "end_time": to_iso_string(auction_with_data.end_time),
+            "slug": auction.slug,
+            "title": auction.title,
+            "status": auction.status,
+            "start_time": to_iso_string(auction.start_time),
+            "end_time": to_iso_string(auction.end_time),
         },
-        "lots": [
-            {
-                "id": str(l.id),
-                "lot_number": l.lot_number,
-                "name": l.name,
-                "currency": l.currency,
-                "current_price": str(l.current_price),
-                "current_leader": str(l.current_leader) if l.current_leader else None,
-                "end_time": to_iso_string(l.end_time),
-                "image_url": l.image_url,
-                "base_price": str(l.base_price),
-                "min_increment": str(l.min_increment),
-            }
-            for l in auction_with_data.lots
-        ],
-        "participants": {"count": int(participants_count)},
+        "lots": [lot_state(lot) for lot in lots],
+        "participants": {"count": int(auction.participants_count)},
     }
+
+PARTICIPANT_LIST = (
+    select(
+        Participant.id,
+        Participant.invite_token,
+        Vendor.id.label("vendor_id"),
+        Vendor.name.label("vendor_name"),
+        Vendor.email.label("vendor_email"),
+    )
+    .join(Vendor, Vendor.id == Participant.vendor_id)
+    .where(Participant.auction_id == bindparam("auction_id"))
+)
+
+async def list_participants(db: AsyncSession, auction_id: UUID, slug: str) -> List[dict]:
+    rows = await db.execute(PARTICIPANT_LIST, {"auction_id": auction_id})
+    return [
+        {
+            "id": str(row.id),
+            "join_url": f"/a/{slug}?t={row.invite_token}",
+            "invite_token": row.invite_token,
+            "vendor": {
+                "id": str(row.vendor_id),
+                "name": row.vendor_name,
+                "email": row.vendor_email,
+            },
+        }
+        for row in rows
+    ]
@@ -0,0 +1,299 @@
+from __future__ import annotations
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import BidSessionLocal
+from app.enums import AuctionStatus
+from app.exceptions import BidTooLowError, LotClosedError, LotNotFoundError, LotNotLiveError
+from app.models import Auction, Bid, Lot
+from app.services.api_processes import api_processes
+from app.services.bid_writer import BidWriter, PendingBid
+from app.services.bids import (
+    bid_payloads,
+    extended_end_time,
+    lot_is_closed,
+    min_required_amount,
+)
+
+logger = logging.getLogger("auction.bid_engine")
+
+@dataclass
+class LotBook:
+    id: UUID
+    auction_id: UUID
+    lot_number: int
+    name: str
+    currency: str
+    base_price: Decimal
+    min_increment: Decimal
+    current_price: Decimal
+    current_leader: Optional[UUID]
+    end_time: Optional[datetime]
+    extension_sec: int
+    closed_at: Optional[datetime]
+    image_url: Optional[str]
+
+    def min_required(self) -> Decimal:
+        return min_required_amount(
+            self.base_price, self.current_price, self.min_increment
+        )
+
+# Authoritative in-process order book: bids are validated against memory and
+# persisted write-behind. Books are rebuilt from the lots and bids tables, so
+# this is only correct while a single API process accepts bids: start() refuses
+# to run next to another one (a process starting later sees this one and
+# refuses in turn).
+class BidEngine:
+
+    def __init__(self):
+        self._books: Dict[UUID, LotBook] = {}
+        self._auction_status: Dict[UUID, str] = {}
+        self._load_locks: Dict[UUID, asyncio.Lock] = {}
+        self._pending: Dict[UUID, int] = {}
+        self._last_write: Dict[UUID, asyncio.Future] = {}
+        self._stale: Set[UUID] = set()
+        self._rolled_back: Set[UUID] = set()
+        self._corrections: Set[asyncio.Task] = set()
+        self._writer = BidWriter(
+            flush_ms=settings.bid_writer_flush_ms,
+            batch_size=settings.bid_writer_batch_size,
+        )
+        self._refresher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not api_processes.alone:
+            raise RuntimeError(
+                f"BID_ACCEPTANCE_MODE=memory needs a single API process, "
+                f"{api_processes.count} are running"
+            )
+        await self._writer.start()
+        self._refresher = asyncio.create_task(self._status_refresher())
+        logger.info("Bid engine started")
+
+    async def stop(self) -> None:
+        await self._writer.stop()
+        await asyncio.gather(*self._corrections, return_exceptions=True)
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+        logger.info("Bid engine stopped")
+
+    def set_auction_status(self, auction_id: UUID, status: str) -> None:
+        if auction_id in self._auction_status:
+            self._auction_status[auction_id] = status
+
+    def evict_auction(self, auction_id: UUID) -> None:
+        self._auction_status.pop(auction_id, None)
+        for lot_id in [l for l, b in self._books.items() if b.auction_id == auction_id]:
+            if self._pending.get(lot_id):
+                self._stale.add(lot_id)
+            else:
+                self._books.pop(lot_id, None)
+
+    async def place_bid(
+        self, lot_id: UUID, participant_id: UUID, amount: Decimal, vendor_name: str
+    ) -> Tuple[dict, dict, asyncio.Future]:
+        book = await self._get_book(lot_id)
+
+        # Validation and mutation below must not await: they run atomically
+        # with respect to every other bid on this event loop.
+        status = self._auction_status.get(book.auction_id)
+        if status != AuctionStatus.LIVE.value:
+            logger.warning(f"Bid rejected: Auction is not live (status={status})")
+            raise LotNotLiveError("Auction not live")
+
+        placed_at = datetime.now(timezone.utc)
+        if lot_is_closed(book.closed_at, book.end_time, placed_at):
+            logger.warning(f"Bid rejected: Lot {lot_id} closed")
+            raise LotClosedError("Lot closed")
+
+        min_required = book.min_required()
+        if Decimal(str(amount)) < min_required:
+            logger.warning(
+                f"Bid rejected: Amount {amount} is below minimum {min_required} for lot {lot_id}"
+            )
+            raise BidTooLowError(f"min_required={min_required}")
+
+        book.current_price = amount
+        book.current_leader = participant_id
+        book.end_time = extended_end_time(book.end_time, book.extension_sec, placed_at)
+
+        pending = PendingBid(
+            id=uuid4(),
+            lot_id=lot_id,
+            participant_id=participant_id,
+            amount=amount,
+            placed_at=placed_at,
+            end_time=book.end_time,
+        )
+        self._pending[lot_id] = self._pending.get(lot_id, 0) + 1
+        durable = self._writer.submit(pending)
+        self._last_write[lot_id] = durable
+        durable.add_done_callback(lambda f: self._settle(lot_id, f))
+
+        logger.info(
+            f"Bid accepted: Lot {lot_id}, Amount {amount}, Participant {participant_id}"
+        )
+
+        bid_accepted_payload, bid_log_entry = bid_payloads(
+            book, pending.id, participant_id, amount, placed_at, vendor_name
+        )
+        return bid_accepted_payload, bid_log_entry, durable
+
+    async def flushed(self, lot_ids: Iterable[UUID]) -> None:
+        # Waits until every bid accepted so far on these lots is stored or
+        # has failed. The writer flushes in order, so the last one is enough.
+        writes = [self._last_write[l] for l in lot_ids if l in self._last_write]
+        if writes:
+            await asyncio.wait(writes)
+
+    async def _get_book(self, lot_id: UUID) -> LotBook:
+        book = self._books.get(lot_id)
+        if book is not None:
+            return book
+
+        lock = self._load_locks.setdefault(lot_id, asyncio.Lock())
+        try:
+            async with lock:
+                book = self._books.get(lot_id)
+                if book is None:
+                    book = await self._load_book(lot_id)
+                    self._books[lot_id] = book
+        finally:
+            self._load_locks.pop(lot_id, None)
+        return book
+
+    async def _load_book(self, lot_id: UUID) -> LotBook:
+        async with BidSessionLocal() as db:
+            row = (
+                await db.execute(
+                    select(Lot, Auction.status)
+                    .join(Auction, Auction.id == Lot.auction_id)
+                    .where(Lot.id == lot_id)
+                )
+            ).one_or_none()
+            if row is None:
+                raise LotNotFoundError(f"Lot {lot_id} not found")
+            lot, status = row
+
+            top_bid = (
+                await db.execute(
+                    select(Bid.amount, Bid.participant_id)
+                    .where(Bid.lot_id == lot_id)
+                    .order_by(Bid.amount.desc(), Bid.placed_at.desc())
+                    .limit(1)
+                )
+            ).first()
+
+        current_price = Decimal(str(lot.current_price or 0))
+        current_leader = lot.current_leader
+        if top_bid and Decimal(str(top_bid.amount)) > current_price:
+            logger.warning(
+                f"Lot {lot_id} lagged behind its bids, recovering price {top_bid.amount}"
+            )
+            current_price = Decimal(str(top_bid.amount))
+            current_leader = top_bid.participant_id
+
+        self._auction_status.setdefault(lot.auction_id, status)
+        return LotBook(
+            id=lot.id,
+            auction_id=lot.auction_id,
+            lot_number=lot.lot_number,
+            name=lot.name,
+            currency=lot.currency,
+            base_price=Decimal(str(lot.base_price or 0)),
+            min_increment=Decimal(str(lot.min_increment or 1)),
+            current_price=current_price,
+            current_leader=current_leader,
+            end_time=lot.end_time,
+            extension_sec=lot.extension_sec or 0,
+            closed_at=lot.closed_at,
+            image_url=lot.image_url,
+        )
+
+    def _settle(self, lot_id: UUID, durable: asyncio.Future) -> None:
+        if durable.cancelled() or durable.exception() is not None:
+            self._stale.add(lot_id)
+            self._rolled_back.add(lot_id)
+
+        remaining = self._pending.get(lot_id, 1) - 1
+        if remaining > 0:
+            self._pending[lot_id] = remaining
+            return
+        self._pending.pop(lot_id, None)
+        self._last_write.pop(lot_id, None)
+        if lot_id in self._stale:
+            # Drop the book so the next bid rebuilds it from durable state.
+            self._stale.discard(lot_id)
+            self._books.pop(lot_id, None)
+        if lot_id in self._rolled_back:
+            self._rolled_back.discard(lot_id)
+            task = asyncio.create_task(self._correct(lot_id))
+            self._corrections.add(task)
+            task.add_done_callback(self._corrections.discard)
+
+    async def _correct(self, lot_id: UUID) -> None:
+        # The room was already shown bids that never got stored: send the
+        # lot as rebuilt, which lots_updated applies even if the price went
+        # down.
+        from app.services.auctions import lot_state
+        from app.services.state_cache import state_cache
+        from app.websocket import room_broadcaster
+
+        try:
+            book = await self._get_book(lot_id)
+            async with BidSessionLocal() as db:
+                slug = await db.scalar(
+                    select(Auction.slug).where(Auction.id == book.auction_id)
+                )
+            if slug is None:
+                return
+            state = lot_state(book)
+            seq = state_cache.patch_lot(slug, state["id"], **state)
+            event = {"lots": [state]}
+            if seq is not None:
+                event.update(state_cache.peek(slug).stamp(seq))
+            await room_broadcaster.send(slug, "lots_updated", event)
+            logger.warning(f"Lot {lot_id} rolled back to {book.current_price}")
+        except Exception as e:
+            logger.error(f"Correcting lot {lot_id} failed: {e}", exc_info=True)
+
+    async def _status_refresher(self) -> None:
+        # Status changes made by other processes (the RQ worker) only reach
+        # us through the database, so poll the auctions we hold books for.
+        while True:
+            await asyncio.sleep(settings.bid_engine_status_refresh_sec)
+            auction_ids = list(self._auction_status)
+            if not auction_ids:
+                continue
+            try:
+                async with BidSessionLocal() as db:
+                    rows = (
+                        await db.execute(
+                            select(Auction.id, Auction.status).where(
+                                Auction.id.in_(auction_ids)
+                            )
+                        )
+                    ).all()
+            except Exception as e:
+                logger.error(f"Auction status refresh failed: {e}", exc_info=True)
+                continue
+
+            found = {row.id: row.status for row in rows}
+            for auction_id in auction_ids:
+                status = found.get(auction_id)
+                if status is None or status == AuctionStatus.ENDED.value:
+                    self.evict_auction(auction_id)
+                else:
+                    self._auction_status[auction_id] = status
+
+bid_engine = BidEngine()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, update
+
+from app import metrics
+from app.db import BidSessionLocal
+from app.models import Bid, Lot
+
+logger = logging.getLogger("auction.bid_writer")
+
+batch_size_hist = metrics.histogram(
+    "bid_writer.batch_size", (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+flush_latency_hist = metrics.histogram("bid_writer.flush_latency_ms")
+flushed_bids = metrics.counter("bid_writer.flushed_bids")
+failed_bids = metrics.counter("bid_writer.failed_bids")
+
+@dataclass
+class PendingBid:
+    id: UUID
+    lot_id: UUID
+    participant_id: UUID
+    amount: Decimal
+    placed_at: datetime
+    end_time: Optional[datetime]
+
+# Group-commit pipeline: accepted bids are collected for up to flush_ms (or
+# until batch_size are waiting) and written in one transaction, with a single
+# UPDATE per lot carrying its final state. Each submit() returns a future that
+# resolves once the bid is durable.
+class BidWriter:
+
+    def __init__(self, flush_ms: int, batch_size: int):
+        self.flush_sec = flush_ms / 1000
+        self.batch_size = batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._closing = True
+        self._full.set()
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def submit(self, pending: PendingBid) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((pending, future))
+        if self._queue.qsize() >= self.batch_size:
+            self._full.set()
+        return future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if not self._closing and self._queue.qsize() < self.batch_size - 1:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_sec)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[Tuple[PendingBid, asyncio.Future]]) -> None:
+        started = time.perf_counter()
+
+        final_state: Dict[UUID, PendingBid] = {}
+        for pending, _ in batch:
+            final_state[pending.lot_id] = pending
+
+        try:
+            async with BidSessionLocal() as db:
+                await db.execute(
+                    insert(Bid),
+                    [
+                        {
+                            "id": p.id,
+                            "lot_id": p.lot_id,
+                            "participant_id": p.participant_id,
+                            "amount": p.amount,
+                            "placed_at": p.placed_at,
+                        }
+                        for p, _ in batch
+                    ],
+                )
+                # A closed lot keeps the price it was announced with.
+                await db.execute(
+                    update(Lot)
+                    .where(Lot.closed_at.is_(None))
+                    .execution_options(synchronize_session=None),
+                    [
+                        {
+                            "id": p.lot_id,
+                            "current_price": p.amount,
+                            "current_leader": p.participant_id,
+                            "end_time": p.end_time,
+                        }
+                        for p in final_state.values()
+                    ],
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to flush batch of {len(batch)} bids: {e}", exc_info=True)
+            failed_bids.inc(len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        batch_size_hist.observe(len(batch))
+        flush_latency_hist.observe(elapsed_ms)
+        flushed_bids.inc(len(batch))
+        logger.debug(
+            f"Flushed {len(batch)} bids across {len(final_state)} lots in {elapsed_ms:.1f}ms"
+        )
+
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
@@ -1,19 +1,181 @@
 from __future__ import annotations
+import asyncio
+import csv
+import io
 import logging
 from uuid import UUID, uuid4
 from decimal import Decimal
 from datetime import datetime, timezone, timedelta
-from typing import Tuple
+from typing import AsyncIterator, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from app.models import Lot, Bid, Participant
-from app.exceptions import BidTooLowError, LotNotLiveError
+from sqlalchemy import Select, select, update, insert, and_, or_, case, func, literal, true
+from app.config import settings
+from app.custom_json import dumps
+from app.db import BidSessionLocal, replica
+from app.enums import AuctionStatus
+from app.models import Auction, Lot, Bid, Participant, Vendor
+from app.exceptions import BidTooLowError, LotClosedError, LotNotFoundError, LotNotLiveError
+from app.services.live_counters import live_counters
+from app.services.lot_timer import lot_timer
+from app.services.pagination import Cursor, keyset
 
 logger = logging.getLogger("auction.bids")
 
+def min_required_amount(base_price, current_price, min_increment) -> Decimal:
+    current = Decimal(str(current_price or 0))
+    base = Decimal(str(base_price or 0))
+    step = Decimal(str(min_increment or 1))
+    return max(base, current + step)
+
+def extended_end_time(
+    end_time: Optional[datetime], extension_sec: int, now: datetime
+) -> Optional[datetime]:
+    if end_time and (extension_sec or 0) > 0:
+        remaining = (end_time - now).total_seconds()
+        if remaining < max(5, extension_sec // 2):
+            return end_time + timedelta(seconds=extension_sec)
+    return end_time
+
+def lot_is_closed(
+    closed_at: Optional[datetime], end_time: Optional[datetime], now: datetime
+) -> bool:
+    # The timer closes lots shortly after their deadline; bids are refused
+    # from the deadline on.
+    return closed_at is not None or (end_time is not None and end_time <= now)
+
+def bid_payloads(
+    lot,
+    bid_id: UUID,
+    participant_id: UUID,
+    amount: Decimal,
+    placed_at: datetime,
+    vendor_name: str,
+) -> Tuple[dict, dict]:
+    bid_accepted_payload = {
+        "type": "bid_accepted",
+        "lot_id": str(lot.id),
+        "amount": str(amount),
+        "leader": str(participant_id),
+        "ends_at": lot.end_time.isoformat() if lot.end_time else None,
+    }
+
+    bid_log_entry = {
+        "type": "bid_log_entry",
+        "id": str(bid_id),
+        "lot_id": str(lot.id),
+        "lot_number": lot.lot_number,
+        "lot_name": lot.name,
+        "vendor_name": vendor_name,
+        "amount": str(amount),
+        "currency": lot.currency,
+        "placed_at": placed_at.isoformat(),
+    }
+
+    return bid_accepted_payload, bid_log_entry
+
+def recent_bids_query(
+    auction_id: UUID, limit: int, before: Optional[Cursor] = None
+) -> Select:
+    # Newest `limit` bids per lot through ix_bids_lot_id_placed_at (index-only:
+    # it includes every column read here), then the newest overall; ordering
+    # the auction's bids directly would walk the global placed_at index across
+    # every auction. Rows carry exactly the BidLogEntry fields.
+    recent = keyset(
+        select(Bid.id, Bid.amount, Bid.placed_at, Bid.participant_id).where(
+            Bid.lot_id == Lot.id
+        ),
+        Bid.placed_at,
+        Bid.id,
+        before,
+    ).limit(limit).lateral("recent")
+    return (
+        select(
+            recent.c.id,
+            Lot.id.label("lot_id"),
+            Lot.lot_number,
+            Lot.name.label("lot_name"),
+            Vendor.name.label("vendor_name"),
+            recent.c.amount,
+            Lot.currency,
+            recent.c.placed_at,
+        )
+        .select_from(Lot)
+        .join(recent, true())
+        .join(Participant, recent.c.participant_id == Participant.id)
+        .join(Vendor, Participant.vendor_id == Vendor.id)
+        .where(Lot.auction_id == auction_id)
+        .order_by(recent.c.placed_at.desc(), recent.c.id.desc())
+        .limit(limit)
+    )
+
+EXPORT_COLUMNS = [
+    "bid_id",
+    "placed_at",
+    "lot_number",
+    "lot_name",
+    "amount",
+    "currency",
+    "participant_id",
+    "vendor_id",
+    "vendor_name",
+    "vendor_email",
+]
+
+def bid_export_query(auction_id: UUID) -> Select:
+    # Lot by lot through ix_lots_auction_id_lot_number and a backward scan of
+    # ix_bids_lot_id_placed_at, so rows come out without sorting the auction.
+    return (
+        select(
+            Bid.id.label("bid_id"),
+            Bid.placed_at,
+            Lot.lot_number,
+            Lot.name.label("lot_name"),
+            Bid.amount,
+            Lot.currency,
+            Bid.participant_id,
+            Vendor.id.label("vendor_id"),
+            Vendor.name.label("vendor_name"),
+            Vendor.email.label("vendor_email"),
+        )
+        .join(Lot, Lot.id == Bid.lot_id)
+        .join(Participant, Participant.id == Bid.participant_id)
+        .join(Vendor, Vendor.id == Participant.vendor_id)
+        .where(Lot.auction_id == auction_id)
+        .order_by(Lot.lot_number, Bid.placed_at, Bid.id)
+    )
+
+async def export_bids(auction_id: UUID, fmt: str) -> AsyncIterator[str]:
+    # Streams through a server-side cursor, one batch of rows in memory at a
+    # time, on its own connection since it outlives the request's session.
+    read_engine = await replica.read_engine()
+    async with read_engine.connect() as conn:
+        result = await conn.stream(
+            bid_export_query(auction_id).execution_options(
+                yield_per=settings.bid_export_batch_size
+            )
+        )
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            async for rows in result.partitions():
+                writer.writerows(
+                    (row.bid_id, row.placed_at.isoformat(), *row[2:]) for row in rows
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            async for rows in result.partitions():
+                yield "".join(dumps(row._asdict()) + "\n" for row in rows)
+
 async def place_bid(
-    db: AsyncSession, lot_id: UUID, participant_id: UUID, amount: Decimal
+    db: AsyncSession,
+    lot_id: UUID,
+    participant_id: UUID,
+    amount: Decimal,
+    vendor_name: str,
 ) -> Tuple[dict, dict]:
     lot = (
         await db.execute(
@@ -21,9 +183,10 @@ async def place_bid(
             .where(Lot.id == lot_id)
             .with_for_update()
         )
-    ).scalar_one()
+    ).scalar_one_or_none()
+    if lot is None:
+        raise LotNotFoundError(f"Lot {lot_id} not found")
 
-    from app.models import Auction
     auction = (
         await db.execute(select(Auction).where(Auction.id == lot.auction_id))
     ).scalar_one()
@@ -32,10 +195,14 @@ async def place_bid(
         logger.warning(f"Bid rejected: Auction is not live (status={auction.status})")
         raise LotNotLiveError("Auction not live")
 
-    current = Decimal(str(lot.current_price or 0))
-    base = Decimal(str(lot.base_price or 0))
-    step = Decimal(str(lot.min_increment or 1))
-    min_required = max(base, current + step)
+    placed_at = datetime.now(timezone.utc)
+    if lot_is_closed(lot.closed_at, lot.end_time, placed_at):
+        logger.warning(f"Bid rejected: Lot {lot_id} closed")
+        raise LotClosedError("Lot closed")
+
+    min_required = min_required_amount(
+        lot.base_price, lot.current_price, lot.min_increment
+    )
 
     if Decimal(str(amount)) < min_required:
         logger.warning(
@@ -44,7 +211,6 @@ async def place_bid(
         raise BidTooLowError(f"min_required={min_required}")
 
     bid_id = uuid4()
-    placed_at = datetime.now(timezone.utc)
     bid = Bid(
         id=bid_id,
         lot_id=lot_id,
@@ -56,45 +222,178 @@ async def place_bid(
 
     lot.current_price = amount
     lot.current_leader = participant_id
-
-    if lot.end_time and (lot.extension_sec or 0) > 0:
-        now = datetime.now(timezone.utc)
-        remaining = (lot.end_time - now).total_seconds()
-        if remaining < max(5, lot.extension_sec // 2):
-            lot.end_time = lot.end_time + timedelta(seconds=lot.extension_sec)
+    lot.end_time = extended_end_time(lot.end_time, lot.extension_sec, placed_at)
 
     await db.commit()
 
-    participant = (
+    logger.info(
+        f"Bid accepted: Lot {lot_id}, Amount {amount}, Participant {participant_id}"
+    )
+
+    return bid_payloads(lot, bid_id, participant_id, amount, placed_at, vendor_name)
+
+async def place_bid_cas(
+    db: AsyncSession,
+    lot_id: UUID,
+    participant_id: UUID,
+    amount: Decimal,
+    vendor_name: str,
+) -> Tuple[dict, dict]:
+    # One round trip: the conditional UPDATE is the whole acceptance check, the
+    # INSERT only fires if it matched, and the probe (read from the statement's
+    # snapshot) tells a missing lot, a closed auction or lot and a low bid apart.
+    bid_id = uuid4()
+    placed_at = datetime.now(timezone.utc)
+    # As min_required_amount computes it, NULLs included.
+    min_required = func.greatest(
+        func.coalesce(Lot.base_price, 0),
+        func.coalesce(Lot.current_price, 0) + func.coalesce(Lot.min_increment, 1),
+    )
+    extension = func.make_interval(0, 0, 0, 0, 0, 0, Lot.extension_sec)
+
+    lot_probe = (
+        select(
+            Auction.status,
+            Lot.closed_at,
+            Lot.end_time.label("deadline"),
+            min_required.label("min_required"),
+        )
+        .join(Auction, Auction.id == Lot.auction_id)
+        .where(Lot.id == lot_id)
+    )
+    probe = lot_probe.cte("probe")
+    accepted = (
+        update(Lot)
+        .where(
+            Lot.id == lot_id,
+            Auction.id == Lot.auction_id,
+            Auction.status == AuctionStatus.LIVE.value,
+            Lot.closed_at.is_(None),
+            or_(
+                Lot.end_time.is_(None),
+                Lot.end_time > literal(placed_at, Lot.end_time.type),
+            ),
+            literal(amount, Lot.current_price.type) >= min_required,
+        )
+        .values(
+            current_price=amount,
+            current_leader=participant_id,
+            end_time=case(
+                (
+                    and_(
+                        Lot.end_time.isnot(None),
+                        Lot.extension_sec > 0,
+                        Lot.end_time - literal(placed_at, Lot.end_time.type)
+                        < func.make_interval(
+                            0, 0, 0, 0, 0, 0, func.greatest(5, Lot.extension_sec // 2)
+                        ),
+                    ),
+                    Lot.end_time + extension,
+                ),
+                else_=Lot.end_time,
+            ),
+        )
+        .returning(Lot.id, Lot.lot_number, Lot.name, Lot.currency, Lot.end_time)
+        .cte("accepted")
+    )
+    inserted = (
+        insert(Bid)
+        .from_select(
+            ["id", "lot_id", "participant_id", "amount", "placed_at"],
+            select(
+                literal(bid_id, Bid.id.type),
+                accepted.c.id,
+                literal(participant_id, Bid.participant_id.type),
+                literal(amount, Bid.amount.type),
+                literal(placed_at, Bid.placed_at.type),
+            ),
+        )
+        .returning(Bid.id)
+        .cte("inserted")
+    )
+    row = (
         await db.execute(
-            select(Participant)
-            .where(Participant.id == participant_id)
-            .options(selectinload(Participant.vendor))
+            select(
+                probe.c.status,
+                probe.c.closed_at,
+                probe.c.deadline,
+                probe.c.min_required,
+                accepted.c.id,
+                accepted.c.lot_number,
+                accepted.c.name,
+                accepted.c.currency,
+                accepted.c.end_time,
+                inserted.c.id.label("bid_id"),
+            )
+            .select_from(probe)
+            .outerjoin(accepted, true())
+            .outerjoin(inserted, true())
         )
-    ).scalar_one()
+    ).one_or_none()
+    await db.commit()
+
+    if row is None:
+        raise LotNotFoundError(f"Lot {lot_id} not found")
+
+    if row.bid_id is None:
+        if _probe_accepts(row, amount, placed_at):
+            # The snapshot predates a bid that committed while we waited for
+            # the row lock and beat ours on the recheck: read the lot as it
+            # is now to say why.
+            row = (await db.execute(lot_probe)).one_or_none()
+            await db.commit()
+            if row is None:
+                raise LotNotFoundError(f"Lot {lot_id} not found")
+        if row.status != AuctionStatus.LIVE.value:
+            logger.warning(f"Bid rejected: Auction is not live (status={row.status})")
+            raise LotNotLiveError("Auction not live")
+        if lot_is_closed(row.closed_at, row.deadline, placed_at):
+            logger.warning(f"Bid rejected: Lot {lot_id} closed")
+            raise LotClosedError("Lot closed")
+        logger.warning(
+            f"Bid rejected: Amount {amount} is below minimum {row.min_required} for lot {lot_id}"
+        )
+        raise BidTooLowError(f"min_required={row.min_required}")
 
     logger.info(
         f"Bid accepted: Lot {lot_id}, Amount {amount}, Participant {participant_id}"
     )
 
-    bid_accepted_payload = {
-        "type": "bid_accepted",
-        "lot_id": str(lot_id),
-        "amount": str(amount),
-        "leader": str(participant_id),
-        "ends_at": lot.end_time.isoformat() if lot.end_time else None,
-    }
+    return bid_payloads(row, bid_id, participant_id, amount, placed_at, vendor_name)
 
-    bid_log_entry = {
-        "type": "bid_log_entry",
-        "id": str(bid_id),
-        "lot_id": str(lot_id),
-        "lot_number": lot.lot_number,
-        "lot_name": lot.name,
-        "vendor_name": participant.vendor.name,
-        "amount": str(amount),
-        "currency": lot.currency,
-        "placed_at": placed_at.isoformat(),
-    }
+def _probe_accepts(row, amount: Decimal, placed_at: datetime) -> bool:
+    return (
+        row.status == AuctionStatus.LIVE.value
+        and not lot_is_closed(row.closed_at, row.deadline, placed_at)
+        and Decimal(str(amount)) >= row.min_required
+    )
 
-    return bid_accepted_payload, bid_log_entry
+async def submit_bid(
+    lot_id: UUID,
+    participant_id: UUID,
+    amount: Decimal,
+    vendor_id: UUID,
+    vendor_name: str,
+) -> Tuple[dict, dict, Optional[asyncio.Future]]:
+    if settings.bid_acceptance_mode == "memory":
+        from app.services.bid_engine import bid_engine
+
+        result = await bid_engine.place_bid(lot_id, participant_id, amount, vendor_name)
+    else:
+        accept = place_bid_cas if settings.bid_acceptance_mode == "cas" else place_bid
+        async with BidSessionLocal() as db:
+            bid_accepted_payload, bid_log_entry = await accept(
+                db,
+                lot_id=lot_id,
+                participant_id=participant_id,
+                amount=amount,
+                vendor_name=vendor_name,
+            )
+        result = bid_accepted_payload, bid_log_entry, None
+
+    live_counters.bid_placed(lot_id, participant_id, vendor_id)
+    # A no-op unless the bid extended the lot.
+    ends_at = result[0]["ends_at"]
+    if ends_at is not None:
+        lot_timer.schedule(lot_id, datetime.fromisoformat(ends_at))
+    return result
@@ -0,0 +1,425 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+import redis.asyncio as aioredis
+from sqlalchemy import func, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import metrics
+from app.config import settings
+from app.models import (
+    Auction,
+    Bid,
+    BidRollupDaily,
+    BidRollupLot,
+    BidRollupParticipant,
+    Participant,
+    RollupState,
+    Vendor,
+)
+from app.services.rollups import BID_ROLLUPS
+
+logger = logging.getLogger("auction.live_counters")
+
+flushes = metrics.counter("live_counters.flushes")
+flush_errors = metrics.counter("live_counters.flush_errors")
+read_errors = metrics.counter("live_counters.read_errors")
+drift_corrections = metrics.counter("live_counters.drift_corrections")
+
+TOTALS = "analytics:totals"
+BIDS_HOURLY = "analytics:bids:hourly"
+BIDS_DAILY = "analytics:bids:daily"
+AUCTIONS_DAILY = "analytics:auctions:daily"
+BIDDERS = "analytics:bidders"
+LOTS_WITH_BIDS = "analytics:lots_with_bids"
+PARTICIPATING_VENDORS = "analytics:participating_vendors"
+BIDDING_VENDORS = "analytics:bidding_vendors"
+
+AUCTION_STATUSES = ("draft", "live", "paused", "ended")
+BID_HOURS = 24
+BID_DAYS = 8
+AUCTION_DAYS = 31
+HLL_CHUNK = 1000
+
+def _hour(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y%m%d%H")
+
+def _hours(now: datetime) -> List[str]:
+    return [_hour(now - timedelta(hours=i)) for i in range(BID_HOURS - 1, -1, -1)]
+
+def _days(now: datetime, count: int) -> List[str]:
+    today = now.astimezone(timezone.utc).date()
+    return [(today - timedelta(days=i)).isoformat() for i in range(count - 1, -1, -1)]
+
+def _day_start(day: str) -> datetime:
+    return datetime.combine(date.fromisoformat(day), dt_time.min, tzinfo=timezone.utc)
+
+# Analytics counters kept in Redis: hashes for totals and hourly/daily
+# buckets, HyperLogLogs for distinct bidders, lots and vendors. Services record
+# events as they commit; increments are buffered in-process for flush_ms and
+# written in one pipeline, so the bid path never waits on Redis. Anything
+# missed (Redis down, cascaded deletes, direct SQL) is corrected by the
+# periodic reconcile() against Postgres.
+class LiveCounters:
+
+    def __init__(self, redis_url: str, flush_ms: int, enabled: bool = True):
+        self.redis_url = redis_url
+        self.flush_sec = flush_ms / 1000
+        self.enabled = enabled
+        self._redis: Optional[aioredis.Redis] = None
+        self._hashes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._members: Dict[str, Set[str]] = defaultdict(set)
+        self._flusher: Optional[asyncio.Task] = None
+
+    def client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.redis_url, decode_responses=True, socket_timeout=1.0
+            )
+        return self._redis
+
+    def bid_placed(self, lot_id: UUID, participant_id: UUID, vendor_id: UUID) -> None:
+        now = datetime.now(timezone.utc)
+        self._incr(TOTALS, "bids")
+        self._incr(BIDS_HOURLY, _hour(now))
+        self._incr(BIDS_DAILY, now.date().isoformat())
+        self._add(BIDDERS, participant_id)
+        self._add(LOTS_WITH_BIDS, lot_id)
+        self._add(BIDDING_VENDORS, vendor_id)
+
+    def auction_created(self, status: str, scheduled: bool) -> None:
+        self._incr(TOTALS, "auctions")
+        self._incr(TOTALS, f"auctions:{status}")
+        if scheduled:
+            self._incr(TOTALS, "auctions:scheduled")
+        self._incr(AUCTIONS_DAILY, datetime.now(timezone.utc).date().isoformat())
+
+    def auction_deleted(self, status: str, scheduled: bool) -> None:
+        self._incr(TOTALS, "auctions", -1)
+        self._incr(TOTALS, f"auctions:{status}", -1)
+        if scheduled:
+            self._incr(TOTALS, "auctions:scheduled", -1)
+
+    def auction_status_changed(self, old: str, new: str) -> None:
+        if old != new:
+            self._incr(TOTALS, f"auctions:{old}", -1)
+            self._incr(TOTALS, f"auctions:{new}")
+
+    def auction_scheduled(self) -> None:
+        self._incr(TOTALS, "auctions:scheduled")
+
+    def participant_created(self, vendor_id: UUID) -> None:
+        self._incr(TOTALS, "participants")
+        self._add(PARTICIPATING_VENDORS, vendor_id)
+
+    def participant_deleted(self, blocked: bool) -> None:
+        self._incr(TOTALS, "participants", -1)
+        if blocked:
+            self._incr(TOTALS, "participants:blocked", -1)
+
+    def vendor_created(self) -> None:
+        self._incr(TOTALS, "vendors")
+
+    def vendor_deleted(self) -> None:
+        self._incr(TOTALS, "vendors", -1)
+
+    def _incr(self, key: str, field: str, amount: int = 1) -> None:
+        if self.enabled:
+            self._hashes[key][field] += amount
+            self._schedule()
+
+    def _add(self, key: str, member: Any) -> None:
+        if self.enabled:
+            self._members[key].add(str(member))
+            self._schedule()
+
+    def _schedule(self) -> None:
+        if self._flusher is not None and not self._flusher.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flusher = loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_sec)
+        await self.flush()
+
+    async def flush(self) -> None:
+        hashes, members = self._hashes, self._members
+        if not hashes and not members:
+            return
+        self._hashes = defaultdict(lambda: defaultdict(int))
+        self._members = defaultdict(set)
+
+        try:
+            async with self.client().pipeline(transaction=False) as pipe:
+                for key, fields in hashes.items():
+                    for field, amount in fields.items():
+                        if amount:
+                            pipe.hincrby(key, field, amount)
+                for key, values in members.items():
+                    pipe.pfadd(key, *values)
+                await pipe.execute()
+            flushes.inc()
+        except Exception as e:
+            # Dropped on purpose: the next reconcile restores the totals.
+            flush_errors.inc()
+            logger.warning(f"Failed to flush live counters: {e}")
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def snapshot(self) -> Optional[Dict[str, Any]]:
+        # None means "ask Postgres": counters disabled, Redis unreachable, or
+        # never reconciled (fresh Redis, flushed keys).
+        if not self.enabled:
+            return None
+
+        now = datetime.now(timezone.utc)
+        bid_days = _days(now, BID_DAYS)
+        try:
+            async with self.client().pipeline(transaction=False) as pipe:
+                pipe.hgetall(TOTALS)
+                pipe.hmget(BIDS_HOURLY, _hours(now))
+                pipe.hmget(BIDS_DAILY, bid_days)
+                pipe.hmget(AUCTIONS_DAILY, _days(now, AUCTION_DAYS))
+                for key in (BIDDERS, LOTS_WITH_BIDS, PARTICIPATING_VENDORS, BIDDING_VENDORS):
+                    pipe.pfcount(key)
+                (
+                    totals,
+                    hourly,
+                    daily,
+                    auctions_daily,
+                    bidders,
+                    lots_with_bids,
+                    participating_vendors,
+                    bidding_vendors,
+                ) = await pipe.execute()
+        except Exception as e:
+            read_errors.inc()
+            logger.warning(f"Failed to read live counters: {e}")
+            return None
+
+        reconciled_at = totals.pop("reconciled_at", None)
+        if reconciled_at is None:
+            return None
+
+        return {
+            "totals": defaultdict(int, {k: int(v) for k, v in totals.items()}),
+            "recent_bids_24h": sum(int(v or 0) for v in hourly),
+            "daily_bids": [
+                (day, int(count)) for day, count in zip(bid_days, daily) if count and int(count)
+            ],
+            "recent_auctions": sum(int(v or 0) for v in auctions_daily),
+            "unique_bidders": bidders,
+            "lots_with_bids": lots_with_bids,
+            "participating_vendors": participating_vendors,
+            "bidding_vendors": bidding_vendors,
+            "reconciled_at": reconciled_at,
+        }
+
+    async def reconcile(self, db: AsyncSession) -> Dict[str, Any]:
+        started = time.perf_counter()
+        await self.flush()
+
+        redis = self.client()
+        now = datetime.now(timezone.utc)
+        hours = _hours(now)
+        bid_days = _days(now, BID_DAYS)
+        auction_days = _days(now, AUCTION_DAYS)
+
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in (TOTALS, BIDS_HOURLY, BIDS_DAILY, AUCTIONS_DAILY):
+                pipe.hgetall(key)
+            for key in (BIDDERS, LOTS_WITH_BIDS, PARTICIPATING_VENDORS, BIDDING_VENDORS):
+                pipe.pfcount(key)
+            before = await pipe.execute()
+
+        truth = await _postgres_counts(db, now, hours, bid_days, auction_days)
+
+        # Apply the difference between Postgres and what Redis held before the
+        # queries ran, so increments recorded meanwhile are kept.
+        drift: Dict[str, int] = {}
+        async with redis.pipeline(transaction=False) as pipe:
+            for key, held in zip((TOTALS, BIDS_HOURLY, BIDS_DAILY, AUCTIONS_DAILY), before):
+                held.pop("reconciled_at", None)
+                expected = truth[key]
+                for field in set(held) - set(expected):
+                    pipe.hdel(key, field)
+                for field, value in expected.items():
+                    diff = value - int(held.get(field, 0))
+                    if diff:
+                        pipe.hincrby(key, field, diff)
+                        drift[f"{key}:{field}"] = diff
+
+            for key, held_count in zip(
+                (BIDDERS, LOTS_WITH_BIDS, PARTICIPATING_VENDORS, BIDDING_VENDORS), before[4:]
+            ):
+                members = truth[key]
+                if not members:
+                    pipe.delete(key)
+                    continue
+                rebuilt = f"{key}:rebuild"
+                pipe.delete(rebuilt)
+                for i in range(0, len(members), HLL_CHUNK):
+                    pipe.pfadd(rebuilt, *members[i : i + HLL_CHUNK])
+                pipe.rename(rebuilt, key)
+                if abs(len(members) - held_count) > 0.02 * len(members):
+                    drift[key] = len(members) - held_count
+
+            pipe.hset(TOTALS, "reconciled_at", now.isoformat())
+            await pipe.execute()
+
+        drift_corrections.inc(len(drift))
+        return {
+            "drift": drift,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+async def _ids(db: AsyncSession, stmt) -> List[str]:
+    return [str(v) for v in (await db.execute(stmt)).scalars()]
+
+# Bid figures are the rollup tables plus bids placed since their watermark,
+# which the placed_at index serves without scanning history.
+async def _postgres_counts(
+    db: AsyncSession,
+    now: datetime,
+    hours: Iterable[str],
+    bid_days: List[str],
+    auction_days: List[str],
+) -> Dict[str, Any]:
+    watermark = await db.scalar(
+        select(RollupState.watermark).where(RollupState.name == BID_ROLLUPS)
+    )
+    since = watermark or datetime(1970, 1, 1, tzinfo=timezone.utc)
+    tail = Bid.placed_at >= since
+
+    row = (
+        await db.execute(
+            select(
+                select(func.count(Auction.id)).scalar_subquery().label("auctions"),
+                *[
+                    select(func.count(Auction.id))
+                    .where(Auction.status == status)
+                    .scalar_subquery()
+                    .label(status)
+                    for status in AUCTION_STATUSES
+                ],
+                select(func.count(Auction.id))
+                .where(Auction.start_time.isnot(None))
+                .scalar_subquery()
+                .label("scheduled"),
+                select(func.count(Vendor.id)).scalar_subquery().label("vendors"),
+                select(func.count(Participant.id)).scalar_subquery().label("participants"),
+                select(func.count(Participant.id))
+                .where(Participant.blocked == True)
+                .scalar_subquery()
+                .label("blocked"),
+                (
+                    select(func.coalesce(func.sum(BidRollupLot.bid_count), 0)).scalar_subquery()
+                    + select(func.count(Bid.id)).where(tail).scalar_subquery()
+                ).label("bids"),
+            )
+        )
+    ).one()
+
+    totals = {
+        "auctions": row.auctions,
+        **{f"auctions:{status}": getattr(row, status) for status in AUCTION_STATUSES},
+        "auctions:scheduled": row.scheduled,
+        "vendors": row.vendors,
+        "participants": row.participants,
+        "participants:blocked": row.blocked,
+        "bids": int(row.bids),
+    }
+
+    hour_col = func.date_trunc("hour", func.timezone("UTC", Bid.placed_at))
+    hourly = {hour: 0 for hour in hours}
+    for bucket, count in await db.execute(
+        select(hour_col, func.count(Bid.id))
+        .where(
+            Bid.placed_at
+            >= now.replace(minute=0, second=0, microsecond=0)
+            - timedelta(hours=BID_HOURS - 1)
+        )
+        .group_by(hour_col)
+    ):
+        key = bucket.strftime("%Y%m%d%H")
+        if key in hourly:
+            hourly[key] += count
+
+    day_col = func.date(func.timezone("UTC", Bid.placed_at))
+    first_bid_day = _day_start(bid_days[0])
+    daily = {day: 0 for day in bid_days}
+    for day, count in await db.execute(
+        select(BidRollupDaily.day, func.sum(BidRollupDaily.bid_count))
+        .where(BidRollupDaily.day >= first_bid_day.date())
+        .group_by(BidRollupDaily.day)
+    ):
+        daily[day.isoformat()] += int(count)
+    for day, count in await db.execute(
+        select(day_col, func.count(Bid.id))
+        .where(tail, Bid.placed_at >= first_bid_day)
+        .group_by(day_col)
+    ):
+        if day.isoformat() in daily:
+            daily[day.isoformat()] += count
+
+    created_day = func.date(func.timezone("UTC", Auction.created_at))
+    auctions_daily = {day: 0 for day in auction_days}
+    for day, count in await db.execute(
+        select(created_day, func.count(Auction.id))
+        .where(Auction.created_at >= _day_start(auction_days[0]))
+        .group_by(created_day)
+    ):
+        if day.isoformat() in auctions_daily:
+            auctions_daily[day.isoformat()] = count
+
+    return {
+        TOTALS: totals,
+        BIDS_HOURLY: hourly,
+        BIDS_DAILY: daily,
+        AUCTIONS_DAILY: auctions_daily,
+        BIDDERS: await _ids(
+            db,
+            union(
+                select(BidRollupParticipant.participant_id),
+                select(Bid.participant_id).where(tail),
+            ),
+        ),
+        LOTS_WITH_BIDS: await _ids(
+            db,
+            union(select(BidRollupLot.lot_id), select(Bid.lot_id).where(tail)),
+        ),
+        PARTICIPATING_VENDORS: await _ids(db, select(Participant.vendor_id).distinct()),
+        BIDDING_VENDORS: await _ids(
+            db,
+            union(
+                select(BidRollupParticipant.vendor_id),
+                select(Participant.vendor_id)
+                .join(Bid, Bid.participant_id == Participant.id)
+                .where(tail),
+            ),
+        ),
+    }
+
+live_counters = LiveCounters(
+    settings.redis_url,
+    flush_ms=settings.live_counters_flush_ms,
+    enabled=settings.live_counters,
+)
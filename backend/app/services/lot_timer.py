@@ -0,0 +1,291 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+import redis.asyncio as aioredis
+from sqlalchemy import Select, bindparam, select, update
+
+from app import custom_json, metrics
+from app.config import settings
+from app.db import engine
+from app.enums import AuctionStatus
+from app.models import Auction, Lot
+from app.services.state_cache import state_cache
+from app.utils import to_iso_string
+
+logger = logging.getLogger("auction.lot_timer")
+
+lots_scheduled = metrics.gauge("lot_timer.scheduled")
+heap_entries = metrics.gauge("lot_timer.heap_entries")
+lots_rescheduled = metrics.counter("lot_timer.rescheduled")
+lots_closed = metrics.counter("lot_timer.closed")
+lots_missed = metrics.counter("lot_timer.missed")
+close_lag_ms = metrics.histogram("lot_timer.close_lag_ms")
+
+# Stale heap entries tolerated beyond the live ones before the heap is rebuilt.
+COMPACT_SLACK = 1024
+
+# Timed lots that are still open, in auctions that are live.
+OPEN_LOTS = (
+    select(Lot.id, Lot.end_time)
+    .join(Auction, Auction.id == Lot.auction_id)
+    .where(
+        Auction.status == AuctionStatus.LIVE.value,
+        Lot.closed_at.is_(None),
+        Lot.end_time.isnot(None),
+    )
+)
+
+# The deadline is re-checked under the row lock, so a bid that extended the
+# lot in another process wins, and of several processes only one closes it.
+CLOSE_LOTS = (
+    update(Lot)
+    .where(
+        Lot.id.in_(bindparam("lot_ids", expanding=True)),
+        Auction.id == Lot.auction_id,
+        Auction.status == AuctionStatus.LIVE.value,
+        Lot.closed_at.is_(None),
+        Lot.end_time <= bindparam("now"),
+    )
+    .values(closed_at=bindparam("now"))
+    .returning(Lot.id, Auction.slug, Lot.end_time, Lot.current_price, Lot.current_leader)
+)
+
+# Deadlines of every timed lot in live auctions, kept in one min-heap served
+# by a single task that sleeps until the earliest one. Extensions push a new
+# entry and the old one is skipped when it surfaces (the lot's current
+# deadline lives in a dict), so rescheduling is O(log n) and nothing is ever
+# searched for. Lots are closed in batches by a conditional UPDATE and
+# announced with lot_closed. Every API process runs one and rebuilds it from
+# the lots table on startup. Auctions started anywhere (the worker, the sweep,
+# an admin) are announced on a Redis channel so every process loads their lots
+# at once; a periodic resync catches whatever else changed in the database
+# (extensions from bids accepted elsewhere are also found when the close
+# misses).
+class LotTimer:
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, UUID]] = []
+        self._deadlines: Dict[UUID, datetime] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._redis: Optional[aioredis.Redis] = None
+        self._origin = uuid4().hex
+        self._channel = f"{settings.socketio_channel}:lot_timer"
+
+    async def start(self) -> None:
+        self._wake = asyncio.Event()
+        loaded = await self._load(OPEN_LOTS)
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._resync()),
+        ]
+        if settings.socketio_message_queue:
+            self._tasks.append(asyncio.create_task(self._listen()))
+        logger.info(f"Lot timer started: {loaded} timed lots")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Lot timer stopped")
+
+    def schedule(self, lot_id: UUID, end_time: Optional[datetime]) -> None:
+        if self._wake is None:
+            return
+        current = self._deadlines.get(lot_id)
+        if end_time is None:
+            self._deadlines.pop(lot_id, None)
+        elif end_time != current:
+            if current is not None:
+                lots_rescheduled.inc()
+            self._push(lot_id, end_time)
+        lots_scheduled.set(len(self._deadlines))
+
+    async def load_auctions(self, auction_ids: List[UUID]) -> int:
+        if self._wake is None:
+            return 0
+        return await self._load(OPEN_LOTS.where(Lot.auction_id.in_(auction_ids)))
+
+    async def auctions_started(self, auction_ids: List[UUID]) -> None:
+        # Loaded here (if this process runs a timer) and by every other API
+        # process when the message arrives.
+        await self.load_auctions(auction_ids)
+        if not settings.socketio_message_queue:
+            return
+        message = {"origin": self._origin, "auctions": [str(a) for a in auction_ids]}
+        try:
+            await self._client().publish(self._channel, custom_json.dumps(message))
+        except Exception as e:
+            logger.warning(f"Announcing started auctions failed, left to resync: {e}")
+
+    def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+        return self._redis
+
+    def _push(self, lot_id: UUID, end_time: datetime) -> None:
+        self._deadlines[lot_id] = end_time
+        entry = (end_time, lot_id)
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._deadlines) + COMPACT_SLACK:
+            self._heap = [(d, l) for l, d in self._deadlines.items()]
+            heapq.heapify(self._heap)
+        heap_entries.set(len(self._heap))
+        if self._heap[0] == entry:
+            self._wake.set()
+
+    def _next_deadline(self) -> Optional[datetime]:
+        while self._heap:
+            end_time, lot_id = self._heap[0]
+            if self._deadlines.get(lot_id) == end_time:
+                return end_time
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now: datetime) -> List[Tuple[datetime, UUID]]:
+        due = []
+        while len(due) < settings.lot_timer_batch_size:
+            end_time = self._next_deadline()
+            if end_time is None or end_time > now:
+                break
+            entry = heapq.heappop(self._heap)
+            del self._deadlines[entry[1]]
+            due.append(entry)
+        lots_scheduled.set(len(self._deadlines))
+        heap_entries.set(len(self._heap))
+        return due
+
+    async def _load(self, stmt: Select) -> int:
+        # The database is authoritative: a deadline moved earlier there (edited
+        # by hand) is taken as is. A bid extension we hold that is not stored
+        # yet is not lost, since the close re-checks end_time under the row
+        # lock and reschedules the lot when it misses.
+        count = 0
+        async with engine.connect() as conn:
+            result = await conn.stream(
+                stmt.execution_options(yield_per=settings.lot_timer_batch_size)
+            )
+            async for rows in result.partitions():
+                for row in rows:
+                    current = self._deadlines.get(row.id)
+                    if row.end_time != current:
+                        self._push(row.id, row.end_time)
+                count += len(rows)
+        lots_scheduled.set(len(self._deadlines))
+        return count
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            deadline = self._next_deadline()
+            if deadline is None:
+                await self._wake.wait()
+                continue
+            delay = (deadline - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = self._pop_due(datetime.now(timezone.utc))
+            try:
+                await self._close([lot_id for _, lot_id in due])
+            except Exception as e:
+                logger.error(f"Closing {len(due)} lots failed: {e}", exc_info=True)
+                # Back on the heap with their own deadlines, unless a bid
+                # rescheduled them meanwhile; retried after a pause.
+                for end_time, lot_id in due:
+                    if lot_id not in self._deadlines:
+                        self._push(lot_id, end_time)
+                await asyncio.sleep(1)
+
+    async def _close(self, lot_ids: List[UUID]) -> None:
+        if settings.bid_acceptance_mode == "memory":
+            from app.services.bid_engine import bid_engine
+
+            # Bids accepted before the deadline may still be on their way to
+            # the database; the engine takes no more once it has passed, so
+            # after these land the row holds the winning price and extension.
+            await bid_engine.flushed(lot_ids)
+        now = datetime.now(timezone.utc)
+        async with engine.begin() as conn:
+            closed = (
+                await conn.execute(CLOSE_LOTS, {"lot_ids": lot_ids, "now": now})
+            ).all()
+            closed_ids = {row.id for row in closed}
+            missed = [lot_id for lot_id in lot_ids if lot_id not in closed_ids]
+            # Extended by a bid in another process, or closed by another
+            # timer, or the auction is no longer live.
+            reopened = (
+                (await conn.execute(OPEN_LOTS.where(Lot.id.in_(missed)))).all()
+                if missed
+                else []
+            )
+
+        lots_missed.inc(len(missed))
+        for row in reopened:
+            self.schedule(row.id, row.end_time)
+
+        by_slug = defaultdict(list)
+        for row in closed:
+            close_lag_ms.observe((now - row.end_time).total_seconds() * 1000)
+            by_slug[row.slug].append(row)
+        lots_closed.inc(len(closed))
+        for slug, rows in by_slug.items():
+            await self._announce(slug, rows, now)
+
+    async def _announce(self, slug: str, rows, closed_at: datetime) -> None:
+        from app.websocket import room_broadcaster
+
+        lots = [
+            {
+                "id": str(row.id),
+                "closed_at": to_iso_string(closed_at),
+                "current_price": str(row.current_price),
+                "current_leader": str(row.current_leader) if row.current_leader else None,
+            }
+            for row in rows
+        ]
+        seq = state_cache.patch_lots(
+            slug, {lot["id"]: {"closed_at": lot["closed_at"]} for lot in lots}
+        )
+        event = {"lots": lots}
+        if seq is not None:
+            event.update(state_cache.peek(slug).stamp(seq))
+        await room_broadcaster.send(slug, "lot_closed", event)
+        logger.info(f"Lots closed: slug={slug}, count={len(lots)}")
+
+    async def _resync(self) -> None:
+        while True:
+            await asyncio.sleep(settings.lot_timer_resync_sec)
+            try:
+                await self._load(OPEN_LOTS)
+            except Exception as e:
+                logger.error(f"Lot timer resync failed: {e}", exc_info=True)
+
+    async def _listen(self) -> None:
+        # Messages lost while Redis is away are covered by the resync.
+        while True:
+            try:
+                async with self._client().pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self._channel)
+                    async for message in pubsub.listen():
+                        data = custom_json.loads(message["data"])
+                        if data["origin"] != self._origin:
+                            await self.load_auctions([UUID(a) for a in data["auctions"]])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Lot timer subscription failed: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+lot_timer = LotTimer()
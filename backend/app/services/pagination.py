@@ -0,0 +1,40 @@
+import base64
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import Select, tuple_
+
+# Keyset pagination, newest first, on (timestamp, id). A cursor is the key of
+# the last row of the previous page, so each page is an index range scan
+# however deep it is, and rows inserted meanwhile never shift later pages.
+Cursor = Tuple[datetime, UUID]
+
+def encode_cursor(at: datetime, row_id: UUID) -> str:
+    raw = f"{at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        at, row_id = raw.split("|")
+        return datetime.fromisoformat(at), UUID(row_id)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def keyset(stmt: Select, at_col, id_col, before: Optional[Cursor]) -> Select:
+    if before is not None:
+        at, row_id = before
+        # The plain at_col bound is redundant but lets the planner narrow an
+        # index on at_col alone; the row comparison breaks ties on id.
+        bound = tuple_(at, row_id, types=[at_col.type, id_col.type])
+        stmt = stmt.where(at_col <= at, tuple_(at_col, id_col) < bound)
+    return stmt.order_by(at_col.desc(), id_col.desc())
+
+def next_cursor(
+    rows: Sequence[Any], limit: int, key: Callable[[Any], Cursor]
+) -> Optional[str]:
+    # A short page is the last one.
+    if len(rows) < limit:
+        return None
+    return encode_cursor(*key(rows[-1]))
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app import metrics
+from app.config import settings
+from app.db import BidSessionLocal, WebsocketSessionLocal
+from app.models import Participant, Vendor
+
+cache_hits = metrics.counter("participant_cache.hits")
+cache_misses = metrics.counter("participant_cache.misses")
+
+@dataclass(frozen=True)
+class ParticipantIdentity:
+    participant_id: UUID
+    auction_id: UUID
+    vendor_id: UUID
+    vendor_name: str
+    blocked: bool
+    invite_token: str
+
+# LRU of everything websocket auth and bid handling need to know about a
+# participant, keyed by id with a token index. Admin routes invalidate entries
+# they change; the TTL bounds how long changes made by other processes (or
+# straight in the database) go unnoticed.
+class ParticipantCache:
+
+    def __init__(self, max_size: int, ttl_sec: float):
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self._entries: OrderedDict[UUID, Tuple[float, ParticipantIdentity]] = OrderedDict()
+        self._id_by_token: Dict[str, UUID] = {}
+
+    async def by_token(self, token: str) -> Optional[ParticipantIdentity]:
+        participant_id = self._id_by_token.get(token)
+        identity = self._cached(participant_id) if participant_id else None
+        if identity is not None:
+            return identity
+        cache_misses.inc()
+        return await self._load(WebsocketSessionLocal, Participant.invite_token == token)
+
+    async def by_id(self, participant_id: UUID) -> Optional[ParticipantIdentity]:
+        identity = self._cached(participant_id)
+        if identity is not None:
+            return identity
+        cache_misses.inc()
+        return await self._load(BidSessionLocal, Participant.id == participant_id)
+
+    def invalidate(self, participant_id: UUID) -> None:
+        entry = self._entries.pop(participant_id, None)
+        if entry is not None:
+            self._id_by_token.pop(entry[1].invite_token, None)
+
+    def invalidate_auction(self, auction_id: UUID) -> None:
+        for participant_id in [
+            pid for pid, (_, i) in self._entries.items() if i.auction_id == auction_id
+        ]:
+            self.invalidate(participant_id)
+
+    def invalidate_vendor(self, vendor_id: UUID) -> None:
+        for participant_id in [
+            pid for pid, (_, i) in self._entries.items() if i.vendor_id == vendor_id
+        ]:
+            self.invalidate(participant_id)
+
+    def _cached(self, participant_id: UUID) -> Optional[ParticipantIdentity]:
+        entry = self._entries.get(participant_id)
+        if entry is None:
+            return None
+        expires_at, identity = entry
+        if time.monotonic() > expires_at:
+            self.invalidate(participant_id)
+            return None
+        self._entries.move_to_end(participant_id)
+        cache_hits.inc()
+        return identity
+
+    async def _load(
+        self, session_factory, criterion
+    ) -> Optional[ParticipantIdentity]:
+        # Token lookups come from websocket connects, id lookups from bids.
+        async with session_factory() as db:
+            row = (
+                await db.execute(
+                    select(
+                        Participant.id,
+                        Participant.auction_id,
+                        Participant.vendor_id,
+                        Participant.blocked,
+                        Participant.invite_token,
+                        Vendor.name,
+                    )
+                    .join(Vendor, Vendor.id == Participant.vendor_id)
+                    .where(criterion)
+                )
+            ).one_or_none()
+        if row is None:
+            return None
+
+        identity = ParticipantIdentity(
+            participant_id=row.id,
+            auction_id=row.auction_id,
+            vendor_id=row.vendor_id,
+            vendor_name=row.name,
+            blocked=bool(row.blocked),
+            invite_token=row.invite_token,
+        )
+        self.invalidate(identity.participant_id)
+        self._entries[identity.participant_id] = (
+            time.monotonic() + self.ttl_sec,
+            identity,
+        )
+        self._id_by_token[identity.invite_token] = identity.participant_id
+        while len(self._entries) > self.max_size:
+            self.invalidate(next(iter(self._entries)))
+        return identity
+
+participant_cache = ParticipantCache(
+    max_size=settings.participant_cache_size,
+    ttl_sec=settings.participant_cache_ttl_sec,
+)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+
+import redis.asyncio as aioredis
+
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger("auction.response_cache")
+
+cache_hits = metrics.counter("response_cache.hits")
+cache_stale_hits = metrics.counter("response_cache.stale_hits")
+cache_misses = metrics.counter("response_cache.misses")
+cache_refreshes = metrics.counter("response_cache.refreshes")
+cache_remote_invalidations = metrics.counter("response_cache.remote_invalidations")
+
+@dataclass
+class CachedResponse:
+    value: Any
+    computed_at: float
+    generation: int
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.computed_at
+
+# Per-process cache for expensive read-only responses. At most one computation
+# per key runs at a time (single flight): callers holding an entry younger than
+# ttl + stale get it straight away while a refresh runs in the background, the
+# rest wait for that refresh. invalidate() drops everything, and results of
+# computations started before it are discarded. Entries never leave the
+# process: invalidate_everywhere() (callable from the RQ worker too) only
+# publishes the invalidation on the Socket.IO message queue's Redis, and each
+# API process drops its own entries. Without it, other processes catch up when
+# their entries age out.
+class ResponseCache:
+
+    def __init__(self, name: str, ttl_sec: float, stale_sec: float):
+        self.ttl_sec = ttl_sec
+        self.stale_sec = stale_sec
+        self._entries: Dict[str, CachedResponse] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._generation = 0
+        self._redis: Optional[aioredis.Redis] = None
+        self._origin = uuid4().hex
+        self._channel = f"{settings.socketio_channel}:{name}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if settings.socketio_message_queue:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def get(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> CachedResponse:
+        entry = self._entries.get(key)
+        if entry is not None and entry.age < self.ttl_sec:
+            cache_hits.inc()
+            return entry
+
+        refresh = self._inflight.get(key)
+        if refresh is None:
+            refresh = self._inflight[key] = asyncio.ensure_future(
+                self._compute(key, compute, self._generation)
+            )
+            refresh.add_done_callback(self._log_failure)
+
+        if entry is not None and entry.age < self.ttl_sec + self.stale_sec:
+            cache_stale_hits.inc()
+            return entry
+
+        cache_misses.inc()
+        # Shielded so a client hanging up does not cancel everyone's refresh.
+        return await asyncio.shield(refresh)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._inflight.clear()
+
+    async def invalidate_everywhere(self) -> None:
+        self.invalidate()
+        if not settings.socketio_message_queue:
+            return
+        try:
+            await self._client().publish(self._channel, self._origin)
+        except Exception as e:
+            logger.warning(f"Publishing a cache invalidation failed: {e}")
+
+    def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+        return self._redis
+
+    async def _listen(self) -> None:
+        # While this is down, entries can be up to ttl + stale old, as before.
+        while True:
+            try:
+                async with self._client().pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self._channel)
+                    async for message in pubsub.listen():
+                        if message["data"] != self._origin:
+                            cache_remote_invalidations.inc()
+                            self.invalidate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Response cache subscription failed: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]], generation: int
+    ) -> CachedResponse:
+        # Aged from when the computation started: that is when its queries
+        # began reading.
+        started = time.monotonic()
+        try:
+            value = await compute()
+            cache_refreshes.inc()
+            entry = CachedResponse(value, started, generation)
+            if generation == self._generation:
+                self._entries[key] = entry
+            return entry
+        finally:
+            if generation == self._generation:
+                self._inflight.pop(key, None)
+
+    @staticmethod
+    def _log_failure(refresh: asyncio.Future) -> None:
+        if not refresh.cancelled() and refresh.exception() is not None:
+            logger.error(
+                f"Response cache refresh failed: {refresh.exception()}",
+                exc_info=refresh.exception(),
+            )
+
+analytics_cache = ResponseCache(
+    "analytics",
+    ttl_sec=settings.analytics_cache_ttl_sec,
+    stale_sec=settings.analytics_cache_stale_sec,
+)
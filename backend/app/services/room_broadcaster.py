@@ -0,0 +1,153 @@
+from __future__ import annotations
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app import metrics
+
+logger = logging.getLogger("auction.room_broadcaster")
+
+coalesced_bids = metrics.counter("broadcast.bid_accepted.coalesced")
+sent_bids = metrics.counter("broadcast.bid_accepted.sent")
+log_batches = metrics.counter("broadcast.bid_log.batches")
+log_entries = metrics.counter("broadcast.bid_log.entries")
+
+# Longest seq gap we are willing to scan when deciding whether a message
+# continues the room's sequence.
+MAX_SEQ_GAP = 10_000
+
+Emit = Callable[[str, Any, str, str], Awaitable[None]]
+
+@dataclass
+class RoomQueue:
+    bids: Dict[str, dict] = field(default_factory=dict)
+    superseded: Set[Tuple[Optional[str], int]] = field(default_factory=set)
+    log: List[dict] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    task: Optional[asyncio.Task] = None
+    users: int = 0
+
+    def idle(self) -> bool:
+        return not (self.bids or self.log or self.task or self.users)
+
+# Per-room broadcast scheduler. bid_accepted events are held for one tick and
+# only the latest per lot goes out; admin bid log entries are sent as one
+# batch per tick. Every sequenced message is stamped with from_seq when the
+# seqs just before it were all superseded bids, so clients can keep following
+# the stream across coalesced updates. A room only exists while it has
+# something queued or in flight.
+class RoomBroadcaster:
+
+    def __init__(self, tick_ms: int, emit: Emit, room_ns: str, admin_ns: str):
+        self.tick_sec = tick_ms / 1000
+        self._emit = emit
+        self._room_ns = room_ns
+        self._admin_ns = admin_ns
+        self._rooms: Dict[str, RoomQueue] = {}
+
+    async def bid_accepted(self, slug: str, payload: dict, log_entry: dict) -> None:
+        room = self._room(slug)
+        room.log.append(log_entry)
+        previous = room.bids.get(payload["lot_id"])
+        if previous is not None:
+            coalesced_bids.inc()
+            # Handlers can finish out of order; keep the highest price.
+            if Decimal(payload["amount"]) <= Decimal(previous["amount"]):
+                payload, previous = previous, payload
+            if previous.get("seq") is not None:
+                room.superseded.add((previous.get("epoch"), previous["seq"]))
+        room.bids[payload["lot_id"]] = payload
+
+        if self.tick_sec <= 0:
+            await self.flush(slug)
+        elif room.task is None:
+            room.task = asyncio.create_task(self._flush_later(slug))
+
+    async def send(self, slug: str, event: str, payload: dict) -> None:
+        # Anything else sequenced for the room goes out right away, after the
+        # bids it may depend on.
+        room = self._room(slug)
+        room.users += 1
+        try:
+            async with room.lock:
+                await self._drain(slug, room)
+                await self._emit(event, payload, slug, self._room_ns)
+        finally:
+            room.users -= 1
+            self._release(slug, room)
+
+    async def flush(self, slug: str) -> None:
+        room = self._rooms.get(slug)
+        if room is None:
+            return
+        room.users += 1
+        try:
+            async with room.lock:
+                await self._drain(slug, room)
+        finally:
+            room.users -= 1
+            self._release(slug, room)
+
+    async def close(self) -> None:
+        for slug, room in list(self._rooms.items()):
+            if room.task is not None:
+                room.task.cancel()
+                room.task = None
+            await self.flush(slug)
+
+    def _room(self, slug: str) -> RoomQueue:
+        room = self._rooms.get(slug)
+        if room is None:
+            room = self._rooms[slug] = RoomQueue()
+        return room
+
+    def _release(self, slug: str, room: RoomQueue) -> None:
+        if room.idle() and self._rooms.get(slug) is room:
+            del self._rooms[slug]
+
+    async def _flush_later(self, slug: str) -> None:
+        await asyncio.sleep(self.tick_sec)
+        room = self._rooms.get(slug)
+        if room is not None:
+            room.task = None
+        try:
+            await self.flush(slug)
+        except Exception as e:
+            logger.error(f"Room flush failed for {slug}: {e}", exc_info=True)
+
+    async def _drain(self, slug: str, room: RoomQueue) -> None:
+        bids = sorted(room.bids.values(), key=lambda p: p.get("seq") or 0)
+        superseded = room.superseded
+        log = room.log
+        room.bids, room.superseded, room.log = {}, set(), []
+
+        for payload in bids:
+            await self._emit(
+                "bid_accepted", self._chain(payload, superseded), slug, self._room_ns
+            )
+        sent_bids.inc(len(bids))
+
+        if log:
+            await self._emit(
+                "bid_log_entries", {"entries": log}, f"admin:{slug}", self._admin_ns
+            )
+            log_batches.inc()
+            log_entries.inc(len(log))
+
+    @staticmethod
+    def _chain(payload: dict, superseded: Set[Tuple[Optional[str], int]]) -> dict:
+        # Everything before seq that was never sent because a later bid
+        # replaced it is skipped over; where that run ends is the last seq
+        # the room actually saw (or one it never did, which clients ignore).
+        seq = payload.get("seq")
+        if seq is None:
+            return payload
+        epoch = payload.get("epoch")
+        start = seq - 1
+        while (epoch, start) in superseded and seq - start <= MAX_SEQ_GAP:
+            start -= 1
+        if start == seq - 1:
+            return payload
+        return {**payload, "from_seq": start}
@@ -0,0 +1,168 @@
+from __future__ import annotations
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Integer, bindparam, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app import metrics
+from app.config import settings
+from app.db import engine
+from app.enums import AuctionStatus
+from app.models import Auction
+from app.services.bid_engine import bid_engine
+from app.services.live_counters import live_counters
+from app.services.lot_timer import lot_timer
+from app.services.response_cache import analytics_cache
+from app.services.state_cache import state_cache
+from app.utils import to_iso_string
+
+logger = logging.getLogger("auction.schedule_sweep")
+
+sweep_leader = metrics.gauge("schedule_sweep.leader")
+auctions_started = metrics.counter("schedule_sweep.started")
+auctions_ended = metrics.counter("schedule_sweep.ended")
+sweep_lag_ms = metrics.histogram("schedule_sweep.lag_ms")
+
+# Session advisory lock held by the leader; any constant every process shares.
+LEADER_LOCK = 0x61756374696F6E
+TRY_LOCK = text("SELECT pg_try_advisory_lock(:key)")
+
+def _due(status: str, due_at):
+    # The oldest due auctions, skipping rows another transaction holds.
+    return (
+        select(Auction.id, due_at.label("due_at"))
+        .where(Auction.status == status, due_at <= bindparam("now"))
+        .order_by(due_at)
+        .limit(bindparam("batch", type_=Integer))
+        .with_for_update(skip_locked=True)
+    )
+
+def _transition(due, to_status: str, **values):
+    # One statement per batch; RETURNING brings back what the announcement
+    # needs.
+    due = due.cte("due")
+    return (
+        update(Auction)
+        .where(Auction.id == due.c.id)
+        .values(status=to_status, **values)
+        .returning(Auction.id, Auction.slug, due.c.due_at)
+    )
+
+DUE_DRAFTS = _due(AuctionStatus.DRAFT.value, Auction.start_time)
+DUE_LIVE = _due(AuctionStatus.LIVE.value, Auction.end_time)
+
+# start_time becomes the actual start, as when the worker starts one.
+START_DUE = _transition(
+    DUE_DRAFTS, AuctionStatus.LIVE.value, start_time=bindparam("now")
+)
+END_DUE = _transition(DUE_LIVE, AuctionStatus.ENDED.value)
+
+# Starts and ends auctions from the start_time and end_time in the auctions
+# table, with no per-auction Redis state: edits and deletes need no
+# bookkeeping, and a Redis flush loses nothing. Every API process runs one;
+# the one holding the advisory lock polls both partial indexes each
+# schedule_sweep_interval_sec, so a tick costs O(due auctions). The lock lives
+# as long as its connection, so a leader that dies or loses the database hands
+# over on the next tick of another process.
+class ScheduleSweep:
+
+    def __init__(self):
+        self._conn: Optional[AsyncConnection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info("Schedule sweep started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._resign()
+        logger.info("Schedule sweep stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._conn is None:
+                    await self._elect()
+                if self._conn is not None:
+                    await self._sweep()
+            except Exception as e:
+                logger.error(f"Schedule sweep failed: {e}", exc_info=True)
+                await self._resign()
+            await asyncio.sleep(settings.schedule_sweep_interval_sec)
+
+    async def _elect(self) -> None:
+        conn = await engine.connect()
+        try:
+            leader = await conn.scalar(TRY_LOCK, {"key": LEADER_LOCK})
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        if not leader:
+            await conn.close()
+            return
+        self._conn = conn
+        sweep_leader.set(1)
+        logger.info("Schedule sweep leadership acquired")
+
+    async def _resign(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        sweep_leader.set(0)
+        # A pooled connection would keep the lock; dropping it releases it.
+        try:
+            await conn.invalidate()
+            await conn.close()
+        except Exception as e:
+            logger.warning(f"Closing the schedule sweep connection failed: {e}")
+        logger.info("Schedule sweep leadership released")
+
+    async def _sweep(self) -> None:
+        for stmt, status in (
+            (START_DUE, AuctionStatus.LIVE.value),
+            (END_DUE, AuctionStatus.ENDED.value),
+        ):
+            while True:
+                now = datetime.now(timezone.utc)
+                params = {"now": now, "batch": settings.schedule_sweep_batch_size}
+                async with self._conn.begin():
+                    rows = (await self._conn.execute(stmt, params)).all()
+                if rows:
+                    await self._announce(rows, status, now)
+                if len(rows) < settings.schedule_sweep_batch_size:
+                    break
+
+    async def _announce(self, rows, status: str, now: datetime) -> None:
+        from app.websocket import room_broadcaster
+
+        started = status == AuctionStatus.LIVE.value
+        previous = AuctionStatus.DRAFT.value if started else AuctionStatus.LIVE.value
+        for row in rows:
+            sweep_lag_ms.observe((now - row.due_at).total_seconds() * 1000)
+            live_counters.auction_status_changed(previous, status)
+        await live_counters.flush()
+        await analytics_cache.invalidate_everywhere()
+        (auctions_started if started else auctions_ended).inc(len(rows))
+        if started:
+            await lot_timer.auctions_started([row.id for row in rows])
+
+        for row in rows:
+            bid_engine.set_auction_status(row.id, status)
+            seq = await state_cache.status_changed(row.id, status)
+            event = {"status": status}
+            if started:
+                event["started_at"] = to_iso_string(now)
+            if seq is not None:
+                event.update(state_cache.peek_by_id(row.id).stamp(seq))
+            await room_broadcaster.send(row.slug, "status", event)
+        logger.info(f"Auctions {'started' if started else 'ended'}: count={len(rows)}")
+
+schedule_sweep = ScheduleSweep()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from redis.client import Pipeline
+from redis.exceptions import WatchError
+from rq import Queue
+from rq.job import Job, JobStatus
+
+from app import metrics
+from app.config import settings
+from app.jobs import activate_auction, end_auction, get_queue, schedule_job
+
+logger = logging.getLogger("auction.scheduling")
+
+jobs_scheduled = metrics.counter("scheduling.jobs_scheduled")
+jobs_canceled = metrics.counter("scheduling.jobs_canceled")
+swap_retries = metrics.counter("scheduling.swap_retries")
+
+# (auction id, start time, end time); no time means no job.
+AuctionSchedule = Tuple[UUID, Optional[datetime], Optional[datetime]]
+
+# (job id, job function, auction id, run at); no time cancels the job.
+_Entry = Tuple[str, object, UUID, Optional[datetime]]
+
+# Jobs that have not run and can still be called off.
+PENDING = {JobStatus.SCHEDULED, JobStatus.QUEUED, JobStatus.DEFERRED}
+
+def start_job_id(auction_id) -> str:
+    return f"auction_{auction_id}"
+
+def end_job_id(auction_id) -> str:
+    return f"auction_end_{auction_id}"
+
+# Start and end jobs of auctions, written through one Redis pipeline per call
+# instead of a fetch, cancel and enqueue round trip per job. Job ids are fixed
+# per auction, so writing a schedule again replaces its jobs and never adds
+# any: reschedule is idempotent. With scheduler_mode "sweep" the times in the
+# auctions table are all there is, and nothing is written here.
+class AuctionScheduler:
+
+    def schedule(self, auctions: Iterable[AuctionSchedule]) -> None:
+        # New auctions have no jobs yet, so nothing is read: one MULTI/EXEC.
+        if settings.scheduler_mode != "jobs":
+            return
+        queue = get_queue()
+        with queue.connection.pipeline() as pipe:
+            for auction_id, start_time, end_time in auctions:
+                if start_time:
+                    job_id = start_job_id(auction_id)
+                    self._add(pipe, queue, job_id, activate_auction, auction_id, start_time)
+                if end_time:
+                    job_id = end_job_id(auction_id)
+                    self._add(pipe, queue, job_id, end_auction, auction_id, end_time)
+            pipe.execute()
+
+    def reschedule(self, auctions: Iterable[AuctionSchedule]) -> None:
+        # An end time already past leaves the end job alone rather than
+        # ending the auction at once.
+        now = datetime.now(timezone.utc)
+        entries: List[_Entry] = []
+        for auction_id, start_time, end_time in auctions:
+            entries.append(
+                (start_job_id(auction_id), activate_auction, auction_id, start_time)
+            )
+            if end_time is None or end_time > now:
+                entries.append(
+                    (end_job_id(auction_id), end_auction, auction_id, end_time)
+                )
+        self._swap(entries)
+
+    def cancel(
+        self, auction_ids: Iterable[UUID], start: bool = True, end: bool = True
+    ) -> None:
+        entries: List[_Entry] = []
+        for auction_id in auction_ids:
+            if start:
+                entries.append((start_job_id(auction_id), activate_auction, auction_id, None))
+            if end:
+                entries.append((end_job_id(auction_id), end_auction, auction_id, None))
+        self._swap(entries)
+
+    def _swap(self, entries: List[_Entry]) -> None:
+        # The current jobs are read in one round trip and replaced in one
+        # transaction, so the scheduler never sees an auction with both its
+        # old and new job, or neither. The job keys are watched: if the
+        # worker moves one in between (it came due, or started), the swap is
+        # redone against its new state.
+        if not entries or settings.scheduler_mode != "jobs":
+            return
+        queue = get_queue()
+        job_ids = [entry[0] for entry in entries]
+        with queue.connection.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*(Job.key_for(job_id) for job_id in job_ids))
+                    current = Job.fetch_many(job_ids, connection=queue.connection)
+                    pipe.multi()
+                    for (job_id, func, auction_id, at), job in zip(entries, current):
+                        self._replace(pipe, queue, job_id, func, auction_id, at, job)
+                    pipe.execute()
+                    return
+                except WatchError:
+                    swap_retries.inc()
+
+    def _replace(
+        self,
+        pipe: Pipeline,
+        queue: Queue,
+        job_id: str,
+        func,
+        auction_id: UUID,
+        at: Optional[datetime],
+        job: Optional[Job],
+    ) -> None:
+        if job is not None:
+            status = job.get_status(refresh=False)
+            if status == JobStatus.STARTED:
+                # Already running; it checks the auction's status itself.
+                logger.warning(f"Job {job_id} is running, leaving it in place")
+                return
+            if at is None:
+                if status in PENDING:
+                    self._unlist(pipe, queue, job_id)
+                    job.set_status(JobStatus.CANCELED, pipeline=pipe)
+                    queue.canceled_job_registry.add(job, pipeline=pipe)
+                    jobs_canceled.inc()
+                return
+            self._unlist(pipe, queue, job_id)
+            pipe.delete(job.key)
+        if at is not None:
+            self._add(pipe, queue, job_id, func, auction_id, at)
+
+    @staticmethod
+    def _unlist(pipe: Pipeline, queue: Queue, job_id: str) -> None:
+        # Wherever the job sits now. Removing a missing member is a no-op, so
+        # this needs no reads, unlike RQ's own Job.cancel and Job.delete.
+        pipe.lrem(queue.key, 0, job_id)
+        for registry in (
+            queue.scheduled_job_registry,
+            queue.deferred_job_registry,
+            queue.finished_job_registry,
+            queue.failed_job_registry,
+            queue.canceled_job_registry,
+        ):
+            pipe.zrem(registry.key, job_id)
+
+    @staticmethod
+    def _add(
+        pipe: Pipeline, queue: Queue, job_id: str, func, auction_id: UUID, at: datetime
+    ) -> None:
+        # A time in the past runs on the scheduler's next pass.
+        schedule_job(pipe, queue, at, func, str(auction_id), job_id=job_id)
+        jobs_scheduled.inc()
+
+auction_scheduler = AuctionScheduler()
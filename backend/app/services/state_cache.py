@@ -0,0 +1,323 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Deque, Dict, List, Optional
+from uuid import UUID, uuid4
+
+import redis.asyncio as aioredis
+
+from app import custom_json, metrics
+from app.custom_json import RawJSON, encode_once
+from app.config import settings
+from app.db import WebsocketSessionLocal
+from app.services.api_processes import api_processes
+from app.services.auctions import auction_state_payload
+
+logger = logging.getLogger("auction.state_cache")
+
+cache_hits = metrics.counter("state_cache.hits")
+cache_misses = metrics.counter("state_cache.misses")
+
+# Prices are Numeric(12, 2); a rebuilt snapshot renders them like this.
+CENTS = Decimal("0.01")
+
+def catchup() -> bool:
+    return settings.state_catchup and api_processes.alone
+
+@dataclass
+class StateDelta:
+    seq: int
+    lots: Dict[str, dict]
+    status: Optional[str] = None
+
+@dataclass
+class AuctionSnapshot:
+    auction_id: UUID
+    slug: str
+    payload: dict
+    epoch: str = field(default_factory=lambda: uuid4().hex[:12])
+    version: int = 0
+    built_at: float = field(default_factory=time.monotonic)
+    lot_index: Dict[str, int] = field(default_factory=dict)
+    deltas: Deque[StateDelta] = field(
+        default_factory=lambda: deque(maxlen=settings.state_delta_buffer)
+    )
+    _encoded: Optional[RawJSON] = field(default=None, repr=False)
+    _encoded_version: int = field(default=-1, repr=False)
+    _encoded_stamped: bool = field(default=False, repr=False)
+
+    @property
+    def status(self) -> str:
+        return self.payload["auction"]["status"]
+
+    def encoded(self) -> RawJSON:
+        # Every connect between two changes gets the same serialized payload.
+        stamped = catchup()
+        if (
+            self._encoded is None
+            or self._encoded_version != self.version
+            or self._encoded_stamped != stamped
+        ):
+            payload = self.payload
+            if not stamped:
+                payload = {k: v for k, v in payload.items() if k not in ("epoch", "seq")}
+            self._encoded = encode_once(payload)
+            self._encoded_version = self.version
+            self._encoded_stamped = stamped
+        return self._encoded
+
+    def expired(self) -> bool:
+        return time.monotonic() - self.built_at > settings.state_cache_ttl_sec
+
+    def record(self, lots: List[dict], status: Optional[str] = None) -> int:
+        self.version += 1
+        self.deltas.append(
+            StateDelta(self.version, {lot["id"]: dict(lot) for lot in lots}, status)
+        )
+        self.payload["seq"] = self.version
+        return self.version
+
+    def delta_since(self, epoch: Optional[str], since: Optional[int]) -> Optional[dict]:
+        # None means the caller is on another lineage or too far behind and
+        # needs the full snapshot.
+        if not catchup():
+            return None
+        if epoch != self.epoch or since is None or since > self.version:
+            return None
+        if since < self.version and (not self.deltas or self.deltas[0].seq > since + 1):
+            return None
+
+        lots: Dict[str, dict] = {}
+        status = None
+        for delta in self.deltas:
+            if delta.seq <= since:
+                continue
+            lots.update(delta.lots)
+            status = delta.status or status
+
+        payload = {
+            "epoch": self.epoch,
+            "from_seq": since,
+            "seq": self.version,
+            "lots": list(lots.values()),
+        }
+        if status:
+            payload["auction"] = {"status": status}
+        return payload
+
+    def stamp(self, seq: Optional[int]) -> dict:
+        if seq is None or not catchup():
+            return {}
+        return {"epoch": self.epoch, "seq": seq}
+
+# Per-auction `state` payloads, built once and then patched in place by the
+# bid path and admin routes so connect storms are served without DB work.
+# Every change bumps the snapshot's seq and lands in a bounded ring buffer of
+# deltas, so clients that know (epoch, seq) can catch up cheaply. Changes made
+# by other processes are picked up as a delta when the TTL expires. Epochs and
+# seqs are per process, so while more than one API process serves the rooms
+# (or state_catchup is off) nothing is stamped and every reconnect gets the
+# full state: clients would otherwise see stamps from lineages they do not
+# follow. Status changes are published on the Socket.IO message queue's Redis
+# (status_changed) and patched into every API process's snapshot, wherever
+# they happen.
+class StateCache:
+
+    def __init__(self):
+        self._by_slug: Dict[str, AuctionSnapshot] = {}
+        self._slug_by_id: Dict[UUID, str] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._redis: Optional[aioredis.Redis] = None
+        self._origin = uuid4().hex
+        self._channel = f"{settings.socketio_channel}:state"
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if settings.socketio_message_queue:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def get(self, slug: str) -> Optional[AuctionSnapshot]:
+        snapshot = self._by_slug.get(slug)
+        if snapshot is not None and not snapshot.expired():
+            cache_hits.inc()
+            return snapshot
+
+        lock = self._locks.setdefault(slug, asyncio.Lock())
+        try:
+            async with lock:
+                snapshot = self._by_slug.get(slug)
+                if snapshot is None or snapshot.expired():
+                    cache_misses.inc()
+                    snapshot = await self._build(slug)
+                else:
+                    cache_hits.inc()
+        finally:
+            self._locks.pop(slug, None)
+        return snapshot
+
+    def peek(self, slug: str) -> Optional[AuctionSnapshot]:
+        return self._by_slug.get(slug)
+
+    def peek_by_id(self, auction_id: UUID) -> Optional[AuctionSnapshot]:
+        return self._get_by_id(auction_id)
+
+    def patch_lot(self, slug: str, lot_id: str, **fields) -> Optional[int]:
+        return self.patch_lots(slug, {lot_id: fields})
+
+    def patch_lots(self, slug: str, updates: Dict[str, dict]) -> Optional[int]:
+        # All of them under one seq.
+        snapshot = self._by_slug.get(slug)
+        if snapshot is None:
+            return None
+        lots = []
+        for lot_id, fields in updates.items():
+            index = snapshot.lot_index.get(lot_id)
+            if index is None:
+                self.invalidate_slug(slug)
+                return None
+            lots.append(snapshot.payload["lots"][index])
+        for lot, fields in zip(lots, updates.values()):
+            lot.update(fields)
+        return snapshot.record(lots)
+
+    def apply_bid(self, slug: str, bid_accepted_payload: dict) -> Optional[int]:
+        snapshot = self._by_slug.get(slug)
+        if snapshot is None:
+            return None
+        index = snapshot.lot_index.get(bid_accepted_payload["lot_id"])
+        amount = Decimal(bid_accepted_payload["amount"])
+        if index is not None:
+            # Bid handlers finish out of order; prices only ever go up.
+            current = snapshot.payload["lots"][index]["current_price"]
+            if amount <= Decimal(current):
+                return None
+        return self.patch_lot(
+            slug,
+            bid_accepted_payload["lot_id"],
+            current_price=str(amount.quantize(CENTS, ROUND_HALF_UP)),
+            current_leader=bid_accepted_payload["leader"],
+            end_time=bid_accepted_payload["ends_at"],
+        )
+
+    def add_lot(self, auction_id: UUID, lot_state: dict) -> Optional[int]:
+        return self.add_lots(auction_id, [lot_state])
+
+    def add_lots(self, auction_id: UUID, lot_states: List[dict]) -> Optional[int]:
+        snapshot = self._get_by_id(auction_id)
+        if snapshot is None:
+            return None
+        for lot_state in lot_states:
+            snapshot.lot_index[lot_state["id"]] = len(snapshot.payload["lots"])
+            snapshot.payload["lots"].append(lot_state)
+        return snapshot.record(lot_states)
+
+    def patch_status(self, auction_id: UUID, status: str) -> Optional[int]:
+        snapshot = self._get_by_id(auction_id)
+        if snapshot is None:
+            return None
+        snapshot.payload["auction"]["status"] = status
+        return snapshot.record([], status=status)
+
+    async def status_changed(self, auction_id: UUID, status: str) -> Optional[int]:
+        # From the RQ worker, which holds no snapshots, this only publishes.
+        seq = self.patch_status(auction_id, status)
+        if not settings.socketio_message_queue:
+            return seq
+        message = {"origin": self._origin, "auction": str(auction_id), "status": status}
+        try:
+            await self._client().publish(self._channel, custom_json.dumps(message))
+        except Exception as e:
+            logger.warning(f"Publishing a status change failed, left to the TTL: {e}")
+        return seq
+
+    def invalidate(self, auction_id: UUID) -> None:
+        slug = self._slug_by_id.get(auction_id)
+        if slug is not None:
+            self.invalidate_slug(slug)
+
+    def invalidate_slug(self, slug: str) -> None:
+        snapshot = self._by_slug.pop(slug, None)
+        if snapshot is not None:
+            self._slug_by_id.pop(snapshot.auction_id, None)
+
+    def _get_by_id(self, auction_id: UUID) -> Optional[AuctionSnapshot]:
+        slug = self._slug_by_id.get(auction_id)
+        return self._by_slug.get(slug) if slug is not None else None
+
+    async def _build(self, slug: str) -> Optional[AuctionSnapshot]:
+        previous = self._by_slug.get(slug)
+        async with WebsocketSessionLocal() as db:
+            state = await auction_state_payload(db, slug)
+        if state is None:
+            self.invalidate_slug(slug)
+            return None
+        auction_id, payload = state
+
+        snapshot = AuctionSnapshot(
+            auction_id=auction_id,
+            slug=slug,
+            payload=payload,
+            lot_index={lot["id"]: i for i, lot in enumerate(payload["lots"])},
+        )
+        if previous is not None and previous.auction_id == auction_id:
+            self._carry_over(previous, snapshot)
+        snapshot.payload["epoch"] = snapshot.epoch
+        snapshot.payload["seq"] = snapshot.version
+        self._purge_expired()
+        self._by_slug[slug] = snapshot
+        self._slug_by_id[auction_id] = slug
+        logger.debug(f"State snapshot built: slug={slug}, lots={len(payload['lots'])}")
+        return snapshot
+
+    def _carry_over(self, previous: AuctionSnapshot, snapshot: AuctionSnapshot) -> None:
+        # Keep the lineage of an expired snapshot and record whatever changed
+        # behind our back as one more delta.
+        snapshot.epoch = previous.epoch
+        snapshot.version = previous.version
+        snapshot.deltas = previous.deltas
+
+        old_lots = {lot["id"]: lot for lot in previous.payload["lots"]}
+        changed = [
+            lot for lot in snapshot.payload["lots"] if old_lots.get(lot["id"]) != lot
+        ]
+        old_status = previous.status
+        status = snapshot.status if snapshot.status != old_status else None
+        if changed or status:
+            snapshot.record(changed, status=status)
+
+    def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+        return self._redis
+
+    async def _listen(self) -> None:
+        # Changes missed while Redis is away show up when the TTL expires.
+        while True:
+            try:
+                async with self._client().pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self._channel)
+                    async for message in pubsub.listen():
+                        data = custom_json.loads(message["data"])
+                        if data["origin"] != self._origin:
+                            self.patch_status(UUID(data["auction"]), data["status"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"State cache subscription failed: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    def _purge_expired(self) -> None:
+        for slug in [s for s, snap in self._by_slug.items() if snap.expired()]:
+            self.invalidate_slug(slug)
+
+state_cache = StateCache()
@@ -4,6 +4,8 @@ from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models import Vendor
+from app.services.live_counters import live_counters
+from app.services.pagination import Cursor, keyset
 
 async def create_vendor(
     db: AsyncSession, name: str, email: str, comment: Optional[str] = None
@@ -17,16 +19,22 @@ async def create_vendor(
     db.add(vendor)
     await db.commit()
     await db.refresh(vendor)
+    live_counters.vendor_created()
     return vendor
 
 async def get_vendor_by_id(db: AsyncSession, vendor_id: UUID) -> Optional[Vendor]:
     return await db.scalar(select(Vendor).where(Vendor.id == vendor_id))
 
 async def list_vendors(
-    db: AsyncSession, skip: int = 0, limit: int = 100
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    before: Optional[Cursor] = None,
 ) -> List[Vendor]:
     result = await db.execute(
-        select(Vendor).order_by(Vendor.created_at.desc()).offset(skip).limit(limit)
+        keyset(select(Vendor), Vendor.created_at, Vendor.id, before)
+        .offset(skip)
+        .limit(limit)
     )
     return list(result.scalars().all())
 
@@ -59,4 +67,5 @@ async def delete_vendor(db: AsyncSession, vendor_id: UUID) -> bool:
 
     await db.delete(vendor)
     await db.commit()
+    live_counters.vendor_deleted()
     return True
@@ -1,35 +1,55 @@
-import json
 import logging
 from decimal import Decimal
 from uuid import UUID
 from urllib.parse import parse_qs
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import socketio
 
-from app.custom_json import CustomJSONEncoder
+from app import custom_json
 from app.config import settings
-from app.db import SessionLocal
-from app.services.auctions import (
-    get_auction_by_slug,
-    get_participant_by_token,
-    auction_state_payload,
+from app.services.bids import submit_bid
+from app.services.participant_cache import participant_cache
+from app.services.room_broadcaster import RoomBroadcaster
+from app.services.state_cache import AuctionSnapshot, state_cache
+from app.exceptions import (
+    BidTooLowError,
+    LotClosedError,
+    LotNotFoundError,
+    LotNotLiveError,
 )
-from app.services.bids import place_bid
-from app.exceptions import BidTooLowError, LotNotLiveError
 
 logger = logging.getLogger("auction.websocket")
 
+client_manager = (
+    socketio.AsyncRedisManager(
+        settings.redis_url, channel=settings.socketio_channel, json=custom_json
+    )
+    if settings.socketio_message_queue
+    else None
+)
+
 sio = socketio.AsyncServer(
     async_mode="asgi",
     cors_allowed_origins="*",
-    json=json,
-    json_dumps_options={"cls": CustomJSONEncoder},
+    client_manager=client_manager,
+    json=custom_json,
 )
 
 AUCTION_NS = "/auction"
 ADMIN_NS = "/admin"
 
+async def broadcast(event: str, payload: Any, room: str, namespace: str = AUCTION_NS):
+    # Serialize once: the manager builds one packet per room emit around the
+    # pre-encoded payload, and the message queue carries the same text.
+    await sio.emit(
+        event, custom_json.encode_once(payload), room=room, namespace=namespace
+    )
+
+room_broadcaster = RoomBroadcaster(
+    settings.broadcast_tick_ms, broadcast, room_ns=AUCTION_NS, admin_ns=ADMIN_NS
+)
+
 @sio.event(namespace=AUCTION_NS)
 async def connect(sid: str, environ: Dict[str, Any], auth: Dict[str, Any]):
     qs = parse_qs(environ.get("QUERY_STRING", ""))
@@ -40,42 +60,63 @@ async def connect(sid: str, environ: Dict[str, Any], auth: Dict[str, Any]):
         logger.warning(f"Connection rejected: No slug provided (sid={sid})")
         return False
 
-    async with SessionLocal() as db:
-        auction = await get_auction_by_slug(db, slug)
-        if not auction:
-            logger.warning(f"Connection rejected: Auction '{slug}' not found (sid={sid})")
+    snapshot = await state_cache.get(slug)
+    if not snapshot:
+        logger.warning(f"Connection rejected: Auction '{slug}' not found (sid={sid})")
+        return False
+
+    participant = None
+    if token:
+        participant = await participant_cache.by_token(token)
+        if (
+            not participant
+            or participant.auction_id != snapshot.auction_id
+            or participant.blocked
+        ):
+            logger.warning(
+                f"Connection rejected: Invalid/blocked participant token (sid={sid})"
+            )
             return False
 
-        participant = None
-        if token:
-            participant = await get_participant_by_token(db, token)
-            if (
-                not participant
-                or participant.auction_id != auction.id
-                or participant.blocked
-            ):
-                logger.warning(
-                    f"Connection rejected: Invalid/blocked participant token (sid={sid})"
-                )
-                return False
-
-        await sio.save_session(
-            sid,
-            {
-                "slug": slug,
-                "participant_id": str(participant.id) if participant else None,
-            },
-            namespace=AUCTION_NS,
-        )
-        await sio.enter_room(sid, slug, namespace=AUCTION_NS)
+    await sio.save_session(
+        sid,
+        {
+            "slug": slug,
+            "participant_id": str(participant.participant_id) if participant else None,
+        },
+        namespace=AUCTION_NS,
+    )
+    await sio.enter_room(sid, slug, namespace=AUCTION_NS)
 
-        logger.info(
-            f"Client connected: sid={sid}, slug={slug}, "
-            f"participant={participant.id if participant else 'viewer'}"
-        )
+    logger.info(
+        f"Client connected: sid={sid}, slug={slug}, "
+        f"participant={participant.participant_id if participant else 'viewer'}"
+    )
+
+    auth = auth or {}
+    await emit_state(sid, snapshot, auth.get("epoch"), auth.get("since"))
+
+async def emit_state(sid: str, snapshot: AuctionSnapshot, epoch: Optional[str], since: Any):
+    try:
+        since = int(since) if since is not None else None
+    except (TypeError, ValueError):
+        since = None
 
-        payload = await auction_state_payload(db, auction)
-        await sio.emit("state", payload, to=sid, namespace=AUCTION_NS)
+    delta = snapshot.delta_since(epoch, since)
+    if delta is not None:
+        await sio.emit("state_delta", delta, to=sid, namespace=AUCTION_NS, ignore_queue=True)
+    else:
+        await sio.emit("state", snapshot.encoded(), to=sid, namespace=AUCTION_NS, ignore_queue=True)
+
+@sio.on("sync", namespace=AUCTION_NS)
+async def sync_evt(sid: str, data: Dict[str, Any]):
+    sess = await sio.get_session(sid, namespace=AUCTION_NS)
+    if not sess:
+        return
+    snapshot = await state_cache.get(sess["slug"])
+    if snapshot:
+        data = data or {}
+        await emit_state(sid, snapshot, data.get("epoch"), data.get("since"))
 
 @sio.event(namespace=AUCTION_NS)
 async def disconnect(sid: str):
@@ -105,26 +146,66 @@ async def place_bid_evt(sid: str, data: Dict[str, Any]):
         f"Bid attempt: lot={lot_id}, amount={amount}, participant={participant_id}"
     )
 
-    async with SessionLocal() as db:
-        try:
-            bid_accepted_payload, bid_log_entry = await place_bid(
-                db, lot_id=lot_id, participant_id=participant_id, amount=amount
-            )
-            await sio.emit("bid_accepted", bid_accepted_payload, room=slug, namespace=AUCTION_NS)
-            await sio.emit("bid_log_entry", bid_log_entry, room=f"admin:{slug}", namespace=ADMIN_NS)
-        except BidTooLowError as e:
-            await sio.emit(
-                "bid_rejected", {"reason": str(e)}, to=sid, namespace=AUCTION_NS
-            )
-        except LotNotLiveError:
-            await sio.emit(
-                "bid_rejected", {"reason": "Lot not live"}, to=sid, namespace=AUCTION_NS
-            )
-        except Exception as e:
-            logger.error(f"Error processing bid: {e}", exc_info=True)
-            await sio.emit(
-                "error", {"detail": "Internal error"}, to=sid, namespace=AUCTION_NS
-            )
+    participant = await participant_cache.by_id(participant_id)
+    if not participant or participant.blocked:
+        logger.warning(f"Bid rejected: participant {participant_id} removed or blocked")
+        await sio.emit(
+            "bid_rejected", {"reason": "Not allowed to bid"}, to=sid, namespace=AUCTION_NS
+        )
+        return
+
+    try:
+        bid_accepted_payload, bid_log_entry, durable = await submit_bid(
+            lot_id=lot_id,
+            participant_id=participant_id,
+            amount=amount,
+            vendor_id=participant.vendor_id,
+            vendor_name=participant.vendor_name,
+        )
+        if durable is not None and settings.bid_ack_durable:
+            await durable
+            durable = None
+
+        seq = state_cache.apply_bid(slug, bid_accepted_payload)
+        stamp = state_cache.peek(slug).stamp(seq) if seq is not None else {}
+        # The room only sees the latest price per tick; the bidder hears back
+        # right away.
+        await room_broadcaster.bid_accepted(
+            slug, {**bid_accepted_payload, **stamp}, bid_log_entry
+        )
+        await sio.emit(
+            "bid_accepted", bid_accepted_payload, to=sid, namespace=AUCTION_NS, ignore_queue=True
+        )
+
+        if durable is not None:
+            await durable
+        await sio.emit(
+            "bid_persisted",
+            {"id": bid_log_entry["id"], "lot_id": bid_log_entry["lot_id"]},
+            to=sid,
+            namespace=AUCTION_NS,
+        )
+    except BidTooLowError as e:
+        await sio.emit(
+            "bid_rejected", {"reason": str(e)}, to=sid, namespace=AUCTION_NS
+        )
+    except LotClosedError:
+        await sio.emit(
+            "bid_rejected", {"reason": "Lot closed"}, to=sid, namespace=AUCTION_NS
+        )
+    except LotNotLiveError:
+        await sio.emit(
+            "bid_rejected", {"reason": "Lot not live"}, to=sid, namespace=AUCTION_NS
+        )
+    except LotNotFoundError:
+        await sio.emit(
+            "bid_rejected", {"reason": "Lot not found"}, to=sid, namespace=AUCTION_NS
+        )
+    except Exception as e:
+        logger.error(f"Error processing bid: {e}", exc_info=True)
+        await sio.emit(
+            "error", {"detail": "Internal error"}, to=sid, namespace=AUCTION_NS
+        )
 
 @sio.event(namespace=ADMIN_NS)
 async def connect(sid: str, environ: Dict[str, Any], auth: Dict[str, Any]):
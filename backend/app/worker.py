@@ -1,52 +1,215 @@
 import asyncio
+import logging
 import signal
-import sys
+import threading
+from typing import List, Optional
+
 import redis
-from rq import Worker, Queue
+from rq import Queue, SimpleWorker
 from rq.job import Job
+from rq.scheduler import RQScheduler
+from rq.timeouts import BaseDeathPenalty, JobTimeoutException
+from rq.utils import now
 
 from app import jobs
 from app.config import settings
+from app.db import engine
+from app.logging_config import setup_logging
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger("auction.worker")
+
+# Each slot holds a connection while it waits for a job and uses one more
+# at times; redis-py caps a pool at 100 otherwise.
+conn = redis.from_url(
+    settings.redis_url, max_connections=2 * settings.worker_concurrency + 10
+)
 
-conn = redis.from_url(settings.redis_url)
+# One event loop for the life of the worker, on its own thread. Every job
+# coroutine runs on it, so the asyncpg pool, the Socket.IO emitter and the
+# live counter client are opened once and shared by concurrent jobs.
+class JobLoop:
 
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
 
-class AsyncWorker(Worker):
+    def start(self) -> None:
+        self.loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="job-loop", daemon=True
+        )
+        self._thread.start()
+        self.call(self._warm_pool())
 
-    def execute_job(self, job: Job, queue: Queue):
+    def stop(self) -> None:
+        if self.loop is None:
+            return
         try:
-            loop = asyncio.get_event_loop()
+            self.call(self._cancel_and_close(), timeout=10)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self.loop.close()
+            self.loop = None
 
-            if asyncio.iscoroutinefunction(job.func):
-                loop.run_until_complete(job.func(*job.args, **job.kwargs))
-            else:
-                job.func(*job.args, **job.kwargs)
-        except Exception as e:
-            print(f"[WORKER ERROR] {e}")
-            raise
+    def call(self, coro, timeout=None):
+        # Blocks the calling thread, never the loop.
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
 
+    def run_job(self, coro, timeout):
+        return self.call(self._with_timeout(coro, timeout))
 
-def main():
-    queues = [Queue("scheduler", connection=conn)]
-    worker = AsyncWorker(queues, connection=conn)
-    print(f"🚀 Async RQ worker started on queues: {[q.name for q in queues]}")
+    @staticmethod
+    async def _with_timeout(coro, timeout):
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            raise JobTimeoutException(
+                f"Task exceeded maximum timeout value ({timeout} seconds)"
+            )
+
+    @staticmethod
+    async def _cancel_and_close() -> None:
+        # Jobs still running on a cold shutdown fail through RQ's usual path
+        # instead of leaving their slots waiting on a stopped loop.
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await engine.dispose()
+
+    @staticmethod
+    async def _warm_pool() -> None:
+        # Connect up front so the first due job does not.
+        async with engine.connect():
+            pass
+
+job_loop = JobLoop()
+
+class AsyncJob(Job):
+
+    def _execute(self):
+        result = self.func(*self.args, **self.kwargs)
+        if asyncio.iscoroutine(result):
+            timeout = self.timeout or Queue.DEFAULT_TIMEOUT
+            return job_loop.run_job(result, None if timeout == -1 else timeout)
+        return result
+
+class LoopDeathPenalty(BaseDeathPenalty):
+    # Coroutine jobs are timed out on the loop (JobLoop.run_job); signal based
+    # penalties only work on the main thread, which never runs jobs here.
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    def setup_death_penalty(self):
+        pass
 
-    try:
-        worker.work(with_scheduler=True)
-    finally:
-        loop.close()
+    def cancel_death_penalty(self):
+        pass
 
+# One concurrency slot: a whole RQ worker of its own (registration, state,
+# current job, heartbeats, results) on its own thread, running one job at a
+# time. worker_concurrency of them dequeue side by side and wait on the shared
+# loop, so that many coroutine jobs run at once. Signals are handled on the
+# main thread, which asks every slot to stop after its current job.
+class SlotWorker(SimpleWorker):
+    job_class = AsyncJob
+    death_penalty_class = LoopDeathPenalty
 
-def shutdown(sig, frame):
-    print("\n🛑 Worker shutting down...")
-    sys.exit(0)
+    # How often an idle slot looks up from its blocking dequeue to see
+    # whether it should stop.
+    STOP_POLL_SEC = 2
 
+    def _install_signal_handlers(self):
+        pass
 
-signal.signal(signal.SIGINT, shutdown)
-signal.signal(signal.SIGTERM, shutdown)
+    def request_warm_stop(self) -> None:
+        if self._stop_requested:
+            return
+        self._shutdown_requested_date = now()
+        self.set_shutdown_requested_date()
+        self._stop_requested = True
+
+    def dequeue_job_and_maintain_ttl(self, timeout, max_idle_time=None):
+        while not self._stop_requested:
+            result = super().dequeue_job_and_maintain_ttl(
+                timeout, max_idle_time=self.STOP_POLL_SEC
+            )
+            if result is not None or timeout is None:
+                return result
+        return None
+
+# The RQ scheduler, in the main thread rather than a forked process (forking
+# next to the loop and slot threads is unsafe); signals go to the worker.
+class MainThreadScheduler(RQScheduler):
+
+    def _install_signal_handlers(self):
+        pass
+
+class AsyncWorker:
+
+    def __init__(self, queues: List[Queue], concurrency: int):
+        self.slots = [
+            SlotWorker(queues, connection=conn) for _ in range(concurrency)
+        ]
+        self.scheduler = MainThreadScheduler(queues, connection=conn)
+        self._threads: List[threading.Thread] = []
+
+    def work(self) -> None:
+        job_loop.start()
+        signal.signal(signal.SIGINT, self._warm_stop)
+        signal.signal(signal.SIGTERM, self._warm_stop)
+        try:
+            for i, slot in enumerate(self.slots):
+                thread = threading.Thread(
+                    target=slot.work, name=f"rq-slot-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            try:
+                self.scheduler.work()
+            finally:
+                for slot in self.slots:
+                    slot.request_warm_stop()
+            for thread in self._threads:
+                thread.join()
+            logger.info("All jobs finished")
+        finally:
+            # After a cold stop, cancelling what still runs on the loop fails
+            # those jobs; their slots get a moment to record it.
+            job_loop.stop()
+            for thread in self._threads:
+                thread.join(timeout=5)
+
+    def _warm_stop(self, signum, frame) -> None:
+        # Slots finish their current job; a second signal stops right away.
+        logger.info("Warm shutdown requested, waiting for running jobs")
+        signal.signal(signal.SIGINT, self._cold_stop)
+        signal.signal(signal.SIGTERM, self._cold_stop)
+        self.scheduler.request_stop()
+        for slot in self.slots:
+            slot.request_warm_stop()
+
+    def _cold_stop(self, signum, frame) -> None:
+        logger.warning("Cold shutdown requested, failing running jobs")
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        raise SystemExit(1)
+
+def main():
+    setup_logging()
+    queues = [Queue("scheduler", connection=conn)]
+    jobs.schedule_periodic(jobs.refresh_rollups)
+    jobs.schedule_periodic(jobs.reconcile_live_counters)
+    logger.info(
+        f"Async RQ worker started on queues {[q.name for q in queues]}: "
+        f"concurrency={settings.worker_concurrency}, "
+        f"loop={'uvloop' if uvloop else 'asyncio'}"
+    )
+    AsyncWorker(queues, settings.worker_concurrency).work()
 
 if __name__ == "__main__":
     main()
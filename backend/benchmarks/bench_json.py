@@ -0,0 +1,115 @@
+"""Encode cost of Socket.IO payloads per JSON backend.
+
+    python -m benchmarks.bench_json [--number 200]
+
+Run from backend/. For each backend it times one `bid_accepted` payload and
+the `state` payload at 10/100/1000 lots, both as the app builds them (values
+already stringified) and with native Decimal/UUID/datetime values that go
+through the encoder's fallback hook. The last column is the full socketio
+packet for a room broadcast when the payload arrives pre-encoded.
+"""
+import argparse
+import os
+import timeit
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://bench@localhost/bench")
+os.environ.setdefault("ADMIN_TOKEN", "bench")
+
+from socketio import packet  # noqa: E402
+
+from app import custom_json  # noqa: E402
+from app.custom_json import RawJSON  # noqa: E402
+from app.services.auctions import lot_state  # noqa: E402
+from app.services.bids import bid_payloads  # noqa: E402
+
+LOT_COUNTS = (10, 100, 1000)
+
+def make_lots(n: int):
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            lot_number=i + 1,
+            name=f"Lot {i + 1}",
+            currency="EUR",
+            current_price=Decimal("1250.00") + i,
+            current_leader=uuid4() if i % 2 else None,
+            end_time=now + timedelta(minutes=i),
+            closed_at=None,
+            image_url=f"https://cdn.example.com/lots/{i + 1}.jpg",
+            base_price=Decimal("1000.00"),
+            min_increment=Decimal("50.00"),
+        )
+        for i in range(n)
+    ]
+
+def state_payload(lots, native: bool) -> dict:
+    if native:
+        lot_dicts = [dict(vars(lot)) for lot in lots]
+    else:
+        lot_dicts = [lot_state(lot) for lot in lots]
+    return {
+        "auction": {
+            "slug": "bench",
+            "title": "Benchmark auction",
+            "status": "live",
+            "start_time": datetime.now(timezone.utc).isoformat(),
+            "end_time": None,
+        },
+        "lots": lot_dicts,
+        "participants": {"count": 250},
+        "epoch": "0123456789ab",
+        "seq": 42,
+    }
+
+def available_backends():
+    backends = {}
+    for name in custom_json.BACKENDS:
+        try:
+            backends[name] = custom_json.load_backend(name)[0]
+        except ImportError:
+            continue
+    return backends
+
+def time_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    lot = make_lots(1)[0]
+    bid_accepted, _ = bid_payloads(
+        lot, uuid4(), uuid4(), Decimal("1300.00"), datetime.now(timezone.utc), "Vendor"
+    )
+    cases = [("bid_accepted", bid_accepted, bid_accepted)]
+    for n in LOT_COUNTS:
+        lots = make_lots(n)
+        cases.append((f"state {n} lots", state_payload(lots, False), state_payload(lots, True)))
+
+    print(f"{'backend':<8} {'payload':<16} {'app us':>10} {'native us':>10} {'packet us':>10} {'bytes':>8}")
+    for name, dumps in available_backends().items():
+        packet.Packet.json = SimpleNamespace(dumps=dumps, loads=None)
+        for label, payload, native in cases:
+            number = max(1, args.number // (len(native.get("lots", [])) // 100 + 1))
+            app_us = time_us(lambda: dumps(payload, separators=(",", ":")), number)
+            native_us = time_us(lambda: dumps(native, separators=(",", ":")), number)
+            raw = RawJSON(dumps(payload, separators=(",", ":")))
+            packet_us = time_us(
+                lambda: packet.Packet(
+                    packet.EVENT, namespace="/auction", data=["state", raw]
+                ).encode(),
+                number,
+            )
+            print(
+                f"{name:<8} {label:<16} {app_us:>10.1f} {native_us:>10.1f} "
+                f"{packet_us:>10.1f} {len(raw.text):>8}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Latency and allocations of the read paths, ORM entities vs column rows.
+
+    python -m benchmarks.bench_rows [--rows 1000] [--number 50]
+
+Run from backend/ against a migrated database (DATABASE_URL). One throwaway
+auction is generated with --rows lots, participants and bids, and deleted
+again at the end. For each read path the "orm" variant is the previous
+implementation (full entities through the identity map, then copied into
+dicts or Pydantic models) and "core" is the current one, both producing the
+same wire output. Latency is the median per call; allocations are the
+tracemalloc peak of one call. Both are scaled to 1k rows.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import func, select, text, true
+from sqlalchemy.orm import aliased, selectinload
+
+from app.db import SessionLocal, engine
+from app.models import Auction, Bid, Lot, Participant, Vendor
+from app.schemas import BidLogEntry
+from app.services.auctions import auction_state_payload, list_participants, lot_state
+from app.services.bids import recent_bids_query
+from app.utils import to_iso_string
+
+SEED = [
+    """
+    INSERT INTO auctions (id, slug, title, status)
+    VALUES (gen_random_uuid(), :slug, 'Row bench', 'live')
+    """,
+    """
+    INSERT INTO vendors (id, name, email)
+    SELECT gen_random_uuid(), 'bench vendor ' || g, :slug || '-' || g || '@example.com'
+    FROM generate_series(1, :rows) g
+    """,
+    """
+    INSERT INTO lots (id, auction_id, lot_number, name, base_price, min_increment,
+                      currency, current_price, extension_sec)
+    SELECT gen_random_uuid(), a.id, g, 'Lot ' || g, 100, 1, 'EUR', 100 + g, 0
+    FROM auctions a, generate_series(1, :rows) g
+    WHERE a.slug = :slug
+    """,
+    """
+    INSERT INTO participants (id, auction_id, vendor_id, invite_token, blocked)
+    SELECT gen_random_uuid(), a.id, v.id, md5(random()::text || v.id::text), false
+    FROM auctions a, vendors v
+    WHERE a.slug = :slug AND v.email LIKE :slug || '-%'
+    """,
+    """
+    WITH l AS (
+        SELECT l.id, l.lot_number FROM lots l
+        JOIN auctions a ON a.id = l.auction_id WHERE a.slug = :slug
+    ), p AS (
+        SELECT p.id, row_number() OVER (ORDER BY p.id) AS rn FROM participants p
+        JOIN auctions a ON a.id = p.auction_id WHERE a.slug = :slug
+    )
+    INSERT INTO bids (id, lot_id, participant_id, amount, placed_at)
+    SELECT gen_random_uuid(), l.id, p.id, 100 + l.lot_number,
+           now() - l.lot_number * interval '1 second'
+    FROM l JOIN p ON p.rn = l.lot_number
+    """,
+    "ANALYZE lots",
+    "ANALYZE bids",
+    "ANALYZE participants",
+]
+
+CLEANUP = [
+    "DELETE FROM auctions WHERE slug = :slug",
+    "DELETE FROM vendors WHERE email LIKE :slug || '-%'",
+]
+
+# Previous implementations, kept here as the baseline.
+
+async def state_orm(db, auction):
+    auction_with_data = (
+        await db.execute(
+            select(Auction)
+            .where(Auction.id == auction.id)
+            .options(selectinload(Auction.lots))
+        )
+    ).scalar_one()
+    participants_count = (
+        await db.execute(
+            select(func.count(Participant.id)).where(
+                Participant.auction_id == auction.id,
+                Participant.blocked == False,
+            )
+        )
+    ).scalar_one()
+    return {
+        "auction": {
+            "slug": auction_with_data.slug,
+            "title": auction_with_data.title,
+            "status": auction_with_data.status,
+            "start_time": to_iso_string(auction_with_data.start_time),
+            "end_time": to_iso_string(auction_with_data.end_time),
+        },
+        "lots": [lot_state(l) for l in auction_with_data.lots],
+        "participants": {"count": int(participants_count)},
+    }
+
+async def state_core(db, auction):
+    return (await auction_state_payload(db, auction.slug))[1]
+
+async def bid_log_orm(db, auction, limit):
+    recent = (
+        select(Bid)
+        .where(Bid.lot_id == Lot.id)
+        .order_by(Bid.placed_at.desc())
+        .limit(limit)
+        .lateral("recent")
+    )
+    recent_bid = aliased(Bid, recent)
+    result = await db.execute(
+        select(recent_bid, Lot, Participant, Vendor)
+        .select_from(Lot)
+        .join(recent, true())
+        .join(Participant, recent_bid.participant_id == Participant.id)
+        .join(Vendor, Participant.vendor_id == Vendor.id)
+        .where(Lot.auction_id == auction.id)
+        .order_by(recent_bid.placed_at.desc())
+        .limit(limit)
+    )
+    return [
+        BidLogEntry(
+            id=bid.id,
+            lot_id=lot.id,
+            lot_number=lot.lot_number,
+            lot_name=lot.name,
+            vendor_name=vendor.name,
+            amount=bid.amount,
+            currency=lot.currency,
+            placed_at=bid.placed_at,
+        ).model_dump(mode="json")
+        for bid, lot, participant, vendor in result.all()
+    ]
+
+async def bid_log_core(db, auction, limit):
+    rows = (await db.execute(recent_bids_query(auction.id, limit))).all()
+    # What the route's response_model does with them.
+    return [BidLogEntry.model_validate(row).model_dump(mode="json") for row in rows]
+
+async def participants_orm(db, auction):
+    participants = (
+        await db.execute(
+            select(Participant)
+            .where(Participant.auction_id == auction.id)
+            .options(selectinload(Participant.vendor))
+        )
+    ).scalars().all()
+    return [
+        {
+            "id": str(p.id),
+            "join_url": f"/a/{auction.slug}?t={p.invite_token}",
+            "invite_token": p.invite_token,
+            "vendor": {
+                "id": str(p.vendor.id),
+                "name": p.vendor.name,
+                "email": p.vendor.email,
+            },
+        }
+        for p in participants
+    ]
+
+async def participants_core(db, auction):
+    return await list_participants(db, auction.id, auction.slug)
+
+async def measure(call, number: int, count=len):
+    # Fresh session per call, as a request would have.
+    async def once():
+        async with SessionLocal() as db:
+            return await call(db)
+
+    rows = count(await once())
+    latencies = []
+    for _ in range(number):
+        started = time.perf_counter()
+        await once()
+        latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    await once()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    scale = 1000 / max(rows, 1)
+    return {
+        "rows": rows,
+        "ms_per_1k_rows": round(statistics.median(latencies) * 1000 * scale, 2),
+        "peak_kib_per_1k_rows": round(peak / 1024 * scale, 1),
+    }
+
+async def run(args) -> dict:
+    params = {"slug": f"bench-rows-{int(time.time())}", "rows": args.rows}
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in SEED:
+            await conn.execute(text(statement), params)
+
+    report = {"rows": args.rows, "paths": {}}
+    try:
+        async with SessionLocal() as db:
+            auction = (
+                await db.execute(select(Auction).where(Auction.slug == params["slug"]))
+            ).scalar_one()
+            db.expunge(auction)
+
+        paths = {
+            "state payload": (state_orm, state_core, (), lambda p: len(p["lots"])),
+            "bid log": (bid_log_orm, bid_log_core, (args.rows,), len),
+            "participants": (participants_orm, participants_core, (), len),
+        }
+        for name, (before, after, extra, count) in paths.items():
+            orm = await measure(lambda db: before(db, auction, *extra), args.number, count)
+            core = await measure(lambda db: after(db, auction, *extra), args.number, count)
+            report["paths"][name] = {
+                "orm": orm,
+                "core": core,
+                "speedup": round(orm["ms_per_1k_rows"] / core["ms_per_1k_rows"], 2),
+            }
+    finally:
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in CLEANUP:
+                await conn.execute(text(statement), params)
+        await engine.dispose()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
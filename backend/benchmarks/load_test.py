@@ -0,0 +1,415 @@
+"""Load test for the bid and broadcast hot path.
+
+    python -m benchmarks.load_test --viewers 200 --bidders 20 --lots 10 --duration 30
+    python -m benchmarks.load_test --scenario snipe --bidders 50 --lots 5 --output snipe.json
+
+Run from backend/ with DATABASE_URL and ADMIN_TOKEN set (.env works). A fresh
+live auction is seeded straight into the database, `app.main:sio_app` is
+started under uvicorn unless --url points at a running server, and viewers and
+bidders connect with python-socketio clients. Results are printed as JSON
+(and written to --output) so runs of different versions can be diffed.
+
+Scenarios:
+  steady  bidders keep outbidding each other on random lots for --duration.
+  snipe   every lot closes --snipe-window seconds after the start with
+          --extension-sec anti-sniping. Bidders keep bidding on open lots
+          until each lot is past its (extended) end or above their budget,
+          and the report counts the extensions viewers saw.
+
+The clients share one event loop, so on a single machine client overhead is
+part of the latency; point --url at another host for cleaner numbers.
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import aiohttp
+import socketio
+from sqlalchemy import delete, insert
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.enums import AuctionStatus
+from app.models import Auction, Lot, Participant, Vendor
+from app.utils import generate_slug, generate_token
+
+AUCTION_NS = "/auction"
+
+@dataclass
+class Seeded:
+    auction_id: object
+    slug: str
+    lot_ids: List[str]
+    tokens: List[str]
+    vendor_ids: List[object]
+    ends_at: Optional[datetime]
+
+@dataclass
+class Stats:
+    ack_ms: List[float] = field(default_factory=list)
+    lag_ms: List[float] = field(default_factory=list)
+    accepted: int = 0
+    rejected: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    sent_at: Dict[Tuple[str, str], float] = field(default_factory=dict)
+    ends_at: Dict[str, set] = field(default_factory=dict)
+
+def percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": pct(50),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": round(ordered[-1], 3),
+    }
+
+async def seed(args) -> Seeded:
+    now = datetime.now(timezone.utc)
+    ends_at = now + timedelta(seconds=args.snipe_window) if args.scenario == "snipe" else None
+    auction_id = uuid4()
+    slug = generate_slug()
+    lots = [
+        {
+            "id": uuid4(),
+            "auction_id": auction_id,
+            "lot_number": i + 1,
+            "name": f"Load test lot {i + 1}",
+            "base_price": Decimal("100"),
+            "min_increment": Decimal("1"),
+            "current_price": Decimal("100"),
+            "currency": "EUR",
+            "end_time": ends_at,
+            "extension_sec": args.extension_sec if args.scenario == "snipe" else 0,
+        }
+        for i in range(args.lots)
+    ]
+    vendors = [
+        {"id": uuid4(), "name": f"Load vendor {i}", "email": f"load-{uuid4().hex}@example.com"}
+        for i in range(args.bidders)
+    ]
+    participants = [
+        {
+            "id": uuid4(),
+            "auction_id": auction_id,
+            "vendor_id": v["id"],
+            "invite_token": generate_token(),
+        }
+        for v in vendors
+    ]
+
+    async with SessionLocal() as db:
+        await db.execute(
+            insert(Auction).values(
+                id=auction_id,
+                slug=slug,
+                title="Load test",
+                status=AuctionStatus.LIVE.value,
+                start_time=now,
+            )
+        )
+        await db.execute(insert(Lot), lots)
+        await db.execute(insert(Vendor), vendors)
+        await db.execute(insert(Participant), participants)
+        await db.commit()
+
+    return Seeded(
+        auction_id=auction_id,
+        slug=slug,
+        lot_ids=[str(lot["id"]) for lot in lots],
+        tokens=[p["invite_token"] for p in participants],
+        vendor_ids=[v["id"] for v in vendors],
+        ends_at=ends_at,
+    )
+
+async def cleanup(seeded: Seeded) -> None:
+    async with SessionLocal() as db:
+        await db.execute(delete(Auction).where(Auction.id == seeded.auction_id))
+        await db.execute(delete(Vendor).where(Vendor.id.in_(seeded.vendor_ids)))
+        await db.commit()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def start_server(args) -> Tuple[str, Optional[subprocess.Popen]]:
+    if args.url:
+        return args.url.rstrip("/"), None
+    port = free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:sio_app",
+            "--port", str(port), "--log-level", "warning", "--no-access-log",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.server_logs else subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    async with aiohttp.ClientSession() as http:
+        for _ in range(100):
+            try:
+                async with http.get(f"{url}/health") as resp:
+                    if resp.status == 200:
+                        return url, proc
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not come up")
+
+async def server_metrics(url: str) -> dict:
+    async with aiohttp.ClientSession() as http:
+        async with http.get(
+            f"{url}/admin/metrics", headers={"x-admin-token": settings.admin_token}
+        ) as resp:
+            return await resp.json() if resp.status == 200 else {}
+
+def counter_delta(before: dict, after: dict) -> Dict[str, float]:
+    out = {}
+    for name, metric in after.items():
+        if metric.get("type") == "counter":
+            out[name] = metric["value"] - before.get(name, {}).get("value", 0)
+    return out
+
+def db_statements(counters: Dict[str, float], stats: Stats) -> Optional[dict]:
+    # Counted server side for the whole run, so background work (cache
+    # rebuilds, status polling) is amortized over the bids.
+    if "db.statements" not in counters:
+        return None
+    total = counters["db.statements"]
+    sent = stats.accepted + stats.rejected + stats.errors
+    return {
+        "total": total,
+        "per_bid": round(total / sent, 3) if sent else None,
+        "per_accepted_bid": round(total / stats.accepted, 3) if stats.accepted else None,
+    }
+
+async def connect(url: str, slug: str, token: Optional[str], on_event) -> socketio.AsyncClient:
+    # engineio appends its own ?t=<timestamp>, which the server would read as
+    # an invite token.
+    client = socketio.AsyncClient(reconnection=False, timestamp_requests=False)
+    client.on("*", on_event, namespace=AUCTION_NS)
+    auth = {"slug": slug}
+    if token:
+        auth["t"] = token
+    await client.connect(url, namespaces=[AUCTION_NS], auth=auth, transports=["websocket"])
+    return client
+
+async def run_viewer(url: str, seeded: Seeded, stats: Stats) -> socketio.AsyncClient:
+    async def on_event(event: str, data):
+        if event != "bid_accepted" or "seq" not in data:
+            return
+        sent = stats.sent_at.get((data["lot_id"], data["amount"]))
+        if sent is not None:
+            stats.lag_ms.append((time.perf_counter() - sent) * 1000)
+        if data.get("ends_at"):
+            stats.ends_at.setdefault(data["lot_id"], set()).add(data["ends_at"])
+
+    return await connect(url, seeded.slug, None, on_event)
+
+async def run_bidder(url: str, seeded: Seeded, token: str, stats: Stats, deadline: float, args):
+    prices: Dict[str, Decimal] = {lot_id: Decimal("100") for lot_id in seeded.lot_ids}
+    ends: Dict[str, Optional[datetime]] = {lot_id: seeded.ends_at for lot_id in seeded.lot_ids}
+    budget = {
+        lot_id: Decimal(100 + random.randint(args.budget // 2, args.budget))
+        for lot_id in seeded.lot_ids
+    } if args.scenario == "snipe" else {}
+    pending: dict = {}
+
+    async def on_event(event: str, data):
+        if event == "state":
+            for lot in data["lots"]:
+                prices[lot["id"]] = Decimal(lot["current_price"])
+        elif event == "bid_accepted":
+            amount = Decimal(data["amount"])
+            prices[data["lot_id"]] = max(prices.get(data["lot_id"], amount), amount)
+            if data.get("ends_at"):
+                ends[data["lot_id"]] = datetime.fromisoformat(data["ends_at"])
+            waiter = pending.get("ack")
+            if waiter and not waiter.done() and pending["key"] == (data["lot_id"], data["amount"]):
+                waiter.set_result("accepted")
+        elif event in ("bid_rejected", "error"):
+            reason = data.get("reason") or data.get("detail") or ""
+            if reason.startswith("min_required="):
+                lot_id = pending.get("key", (None,))[0]
+                if lot_id:
+                    prices[lot_id] = max(prices[lot_id], Decimal(reason.split("=", 1)[1]) - 1)
+            waiter = pending.get("ack")
+            if waiter and not waiter.done():
+                waiter.set_result("rejected" if event == "bid_rejected" else "error")
+
+    def open_lots() -> List[str]:
+        now = datetime.now(timezone.utc)
+        return [
+            lot_id
+            for lot_id in seeded.lot_ids
+            if (ends[lot_id] is None or ends[lot_id] > now)
+            and (lot_id not in budget or prices[lot_id] + 1 <= budget[lot_id])
+        ]
+
+    client = await connect(url, seeded.slug, token, on_event)
+    loop = asyncio.get_running_loop()
+    try:
+        while time.perf_counter() < deadline:
+            candidates = open_lots()
+            if not candidates:
+                break
+            lot_id = random.choice(candidates)
+            amount = str(prices[lot_id] + random.randint(1, 3))
+            waiter = loop.create_future()
+            pending.update(ack=waiter, key=(lot_id, amount))
+
+            started = time.perf_counter()
+            stats.sent_at[(lot_id, amount)] = started
+            await client.emit("place_bid", {"lot_id": lot_id, "amount": amount}, namespace=AUCTION_NS)
+            try:
+                outcome = await asyncio.wait_for(waiter, args.ack_timeout)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                continue
+            stats.ack_ms.append((time.perf_counter() - started) * 1000)
+            if outcome == "accepted":
+                stats.accepted += 1
+            elif outcome == "rejected":
+                stats.rejected += 1
+            else:
+                stats.errors += 1
+            if args.think_ms:
+                await asyncio.sleep(random.uniform(0, args.think_ms) / 1000)
+    finally:
+        await client.disconnect()
+
+async def gather_limited(coros, limit: int):
+    sem = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+async def main_async(args) -> dict:
+    seeded = await seed(args)
+    url, proc = await start_server(args)
+    stats = Stats()
+    viewers: List[socketio.AsyncClient] = []
+    try:
+        before = await server_metrics(url)
+        viewers = await gather_limited(
+            [run_viewer(url, seeded, stats) for _ in range(args.viewers)], 50
+        )
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(run_bidder(url, seeded, token, stats, deadline, args) for token in seeded.tokens)
+        )
+        elapsed = time.perf_counter() - started
+        # Let the last coalesced broadcasts land before counting deliveries.
+        await asyncio.sleep(max(0.5, settings.broadcast_tick_ms / 1000 * 4))
+        after = await server_metrics(url)
+    finally:
+        for viewer in viewers:
+            await viewer.disconnect()
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+        if not args.keep:
+            await cleanup(seeded)
+        await engine.dispose()
+
+    counters = counter_delta(before, after)
+    result = {
+        "scenario": args.scenario,
+        "config": {
+            "viewers": args.viewers,
+            "bidders": args.bidders,
+            "lots": args.lots,
+            "duration_sec": round(elapsed, 3),
+            "bid_acceptance_mode": settings.bid_acceptance_mode,
+            "broadcast_tick_ms": settings.broadcast_tick_ms,
+            "json_backend": settings.json_backend,
+            "url": args.url or "spawned",
+        },
+        "bids": {
+            "sent": stats.accepted + stats.rejected + stats.errors + stats.timeouts,
+            "accepted": stats.accepted,
+            "rejected": stats.rejected,
+            "errors": stats.errors,
+            "timeouts": stats.timeouts,
+            "accepted_per_sec": round(stats.accepted / elapsed, 2) if elapsed else 0,
+        },
+        "bid_ack_ms": percentiles(stats.ack_ms),
+        "broadcast_lag_ms": percentiles(stats.lag_ms),
+        "db_statements": db_statements(counters, stats),
+        "server_counters": counters,
+    }
+    if args.scenario == "snipe":
+        extended = {
+            lot_id: sorted(datetime.fromisoformat(e) for e in ends if datetime.fromisoformat(e) != seeded.ends_at)
+            for lot_id, ends in stats.ends_at.items()
+        }
+        result["snipe"] = {
+            "window_sec": args.snipe_window,
+            "extension_sec": args.extension_sec,
+            "budget": args.budget,
+            "lots_extended": sum(1 for e in extended.values() if e),
+            "extensions_seen": sum(len(e) for e in extended.values()),
+            "max_overtime_sec": max(
+                ((e[-1] - seeded.ends_at).total_seconds() for e in extended.values() if e),
+                default=0,
+            ),
+        }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=("steady", "snipe"), default="steady")
+    parser.add_argument("--viewers", type=int, default=100)
+    parser.add_argument("--bidders", type=int, default=10)
+    parser.add_argument("--lots", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=20, help="bidding time limit")
+    parser.add_argument("--snipe-window", type=float, default=10)
+    parser.add_argument("--extension-sec", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=2000, help="snipe: max markup per bidder and lot")
+    parser.add_argument("--think-ms", type=float, default=0, help="max random pause between bids")
+    parser.add_argument("--ack-timeout", type=float, default=5)
+    parser.add_argument("--url", help="use a running server instead of spawning uvicorn")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded auction")
+    parser.add_argument("--server-logs", action="store_true")
+    parser.add_argument("--seed", type=int, help="random seed for bid choices")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    result = asyncio.run(main_async(args))
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
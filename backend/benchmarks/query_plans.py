@@ -0,0 +1,284 @@
+"""Check that the hot read paths are served by their indexes.
+
+    python -m benchmarks.query_plans --bids 10000000
+
+Run from backend/ against a migrated database (DATABASE_URL). A throwaway
+dataset is generated with generate_series, committed and vacuumed so the
+planner sees realistic statistics and visibility, and deleted again at the end
+(unless --keep). Each query is EXPLAINed and the report lists the indexes its
+plan uses. The exit status is 1 when an expected index is missing, so this
+can guard migrations in CI.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.db import engine
+from app.enums import AuctionStatus
+from app.models import Auction, Bid, Lot, Participant, Vendor
+from app.services.auctions import auction_summaries_query
+from app.services.bids import bid_export_query, recent_bids_query
+from app.services.lot_timer import OPEN_LOTS
+from app.services.pagination import keyset
+from app.services.schedule_sweep import DUE_DRAFTS, DUE_LIVE
+
+SEED = [
+    """
+    INSERT INTO vendors (id, name, email)
+    SELECT gen_random_uuid(), 'plan vendor ' || g, 'plan-' || :run || '-' || g || '@example.com'
+    FROM generate_series(1, :vendors) g
+    """,
+    """
+    INSERT INTO auctions (id, slug, title, status, start_time, end_time)
+    SELECT gen_random_uuid(), 'plan-' || :run || '-' || g, 'Plan check',
+           CASE WHEN g % 100 = 0 THEN 'live' WHEN g % 100 = 1 THEN 'draft' ELSE 'ended' END,
+           now() + (g - :auctions) * interval '1 minute',
+           now() + g * interval '1 minute'
+    FROM generate_series(1, :auctions) g
+    """,
+    """
+    CREATE TEMP TABLE plan_auctions AS
+    SELECT row_number() OVER (ORDER BY id) AS rn, id FROM auctions
+    WHERE slug LIKE 'plan-' || :run || '-%'
+    """,
+    """
+    CREATE TEMP TABLE plan_vendors AS
+    SELECT row_number() OVER (ORDER BY id) AS rn, id FROM vendors
+    WHERE email LIKE 'plan-' || :run || '-%'
+    """,
+    """
+    INSERT INTO lots (id, auction_id, lot_number, name, base_price, min_increment,
+                      currency, current_price, extension_sec, end_time, closed_at)
+    SELECT gen_random_uuid(), a.id, n, 'Lot ' || n, 100, 1, 'EUR', 100, 0,
+           au.end_time + n * interval '1 second',
+           CASE WHEN au.status = 'ended' THEN au.end_time END
+    FROM plan_auctions a
+    JOIN auctions au ON au.id = a.id, generate_series(1, :lots_per_auction) n
+    """,
+    """
+    INSERT INTO participants (id, auction_id, vendor_id, invite_token, blocked)
+    SELECT gen_random_uuid(), a.id, v.id, md5(random()::text || a.id::text || n), n % 10 = 0
+    FROM plan_auctions a, generate_series(1, :participants_per_auction) n
+    JOIN LATERAL (
+        SELECT id FROM plan_vendors
+        WHERE rn = 1 + (n * 7919) % :vendors
+    ) v ON true
+    """,
+    """
+    CREATE TEMP TABLE plan_lots AS
+    SELECT row_number() OVER (ORDER BY l.id) AS rn, l.id, l.auction_id FROM lots l
+    JOIN plan_auctions a ON a.id = l.auction_id
+    """,
+    """
+    CREATE TEMP TABLE plan_participants AS
+    SELECT row_number() OVER (ORDER BY p.id) AS rn, p.id FROM participants p
+    JOIN plan_auctions a ON a.id = p.auction_id
+    """,
+    """
+    INSERT INTO bids (id, lot_id, participant_id, amount, placed_at)
+    SELECT gen_random_uuid(), l.id, p.id, 100 + (g % 5000),
+           now() - random() * interval '365 days'
+    FROM generate_series(1, :bids) g
+    JOIN plan_lots l ON l.rn = 1 + g % (SELECT count(*) FROM plan_lots)
+    JOIN plan_participants p ON p.rn = 1 + (g * 31) % (SELECT count(*) FROM plan_participants)
+    """,
+    """
+    UPDATE lots SET current_leader = p.id
+    FROM plan_lots pl
+    JOIN plan_participants p ON p.rn = pl.rn
+    WHERE lots.id = pl.id AND pl.rn % 2 = 0
+    """,
+    "VACUUM ANALYZE vendors",
+    "VACUUM ANALYZE auctions",
+    "VACUUM ANALYZE participants",
+    "VACUUM ANALYZE lots",
+    "VACUUM ANALYZE bids",
+]
+
+CLEANUP = [
+    "DELETE FROM auctions WHERE id IN (SELECT id FROM plan_auctions)",
+    "DELETE FROM vendors WHERE id IN (SELECT id FROM plan_vendors)",
+]
+
+def checks(auction_id, lot_id, participant_id):
+    now = datetime.now(timezone.utc)
+    cursor = (now - timedelta(days=30), participant_id)
+    return [
+        (
+            "admin bid log (get_auction_bids)",
+            "ix_bids_lot_id_placed_at",
+            recent_bids_query(auction_id, 50),
+        ),
+        (
+            "admin bid log, later page",
+            "ix_bids_lot_id_placed_at",
+            recent_bids_query(auction_id, 50, cursor),
+        ),
+        (
+            "bid export",
+            "ix_bids_lot_id_placed_at",
+            bid_export_query(auction_id),
+        ),
+        (
+            "admin auction list, later page",
+            "ix_auctions_created_at_id",
+            keyset(select(Auction), Auction.created_at, Auction.id, cursor).limit(10),
+        ),
+        (
+            "admin auction summaries",
+            "ix_lots_auction_id_lot_number",
+            auction_summaries_query(cursor).limit(10),
+        ),
+        (
+            "admin vendor list, later page",
+            "ix_vendors_created_at_id",
+            keyset(select(Vendor), Vendor.created_at, Vendor.id, cursor).limit(100),
+        ),
+        (
+            "top bid per lot (bid engine recovery)",
+            "ix_bids_lot_id_amount",
+            select(Bid.amount, Bid.participant_id)
+            .where(Bid.lot_id == lot_id)
+            .order_by(Bid.amount.desc(), Bid.placed_at.desc())
+            .limit(1),
+        ),
+        (
+            "next lot number (create_lot)",
+            "ix_lots_auction_id_lot_number",
+            select(func.max(Lot.lot_number)).where(Lot.auction_id == auction_id),
+        ),
+        (
+            "active participants (state payload, analytics)",
+            "ix_participants_auction_id_blocked",
+            select(func.count(Participant.id)).where(
+                Participant.auction_id == auction_id, Participant.blocked == False
+            ),
+        ),
+        (
+            "bids by participant",
+            "ix_bids_participant_id",
+            select(func.count(Bid.id)).where(Bid.participant_id == participant_id),
+        ),
+        (
+            "bids in the last 24h (dashboard)",
+            "ix_bids_placed_at",
+            select(func.count(Bid.id)).where(Bid.placed_at >= now - timedelta(hours=24)),
+        ),
+        (
+            "lots led by a participant",
+            "ix_lots_current_leader",
+            select(Lot.id).where(Lot.current_leader == participant_id),
+        ),
+        (
+            "live auctions due to end",
+            "ix_auctions_live_end_time",
+            select(Auction.id).where(
+                Auction.status == AuctionStatus.LIVE.value, Auction.end_time <= now
+            ),
+        ),
+        (
+            "drafts due to start (schedule sweep)",
+            "ix_auctions_draft_start_time",
+            DUE_DRAFTS.params(now=now, batch=500),
+        ),
+        (
+            "live auctions due to end (schedule sweep)",
+            "ix_auctions_live_end_time",
+            DUE_LIVE.params(now=now, batch=500),
+        ),
+        (
+            "open timed lots (lot timer rebuild)",
+            "ix_lots_open_end_time",
+            OPEN_LOTS,
+        ),
+    ]
+
+def index_names(plan: dict) -> set:
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= index_names(child)
+    return names
+
+async def run(args) -> dict:
+    params = {
+        "run": str(int(time.time())),
+        "vendors": args.vendors,
+        "auctions": args.auctions,
+        "lots_per_auction": args.lots_per_auction,
+        "participants_per_auction": args.participants_per_auction,
+        "bids": args.bids,
+    }
+    report = {"dataset": {k: v for k, v in params.items() if k != "run"}, "checks": []}
+
+    async with engine.connect() as conn:
+        # VACUUM refuses to run inside a transaction block.
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            started = time.perf_counter()
+            for statement in SEED:
+                await conn.execute(text(statement), params)
+            report["dataset"]["seed_sec"] = round(time.perf_counter() - started, 1)
+
+            sample = (
+                await conn.execute(
+                    text(
+                        """
+                        SELECT pa.id AS auction_id, pl.id AS lot_id, pp.id AS participant_id
+                        FROM plan_auctions pa, plan_lots pl, plan_participants pp
+                        WHERE pa.rn = 1 AND pl.auction_id = pa.id AND pp.rn = 2
+                        LIMIT 1
+                        """
+                    )
+                )
+            ).one()
+
+            for name, expected, stmt in checks(*sample):
+                sql = stmt.compile(
+                    dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+                )
+                plan = (
+                    await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+                ).scalar_one()[0]["Plan"]
+                used = sorted(index_names(plan))
+                report["checks"].append(
+                    {
+                        "query": name,
+                        "expected_index": expected,
+                        "indexes_used": used,
+                        "ok": expected in used,
+                        "total_cost": plan["Total Cost"],
+                    }
+                )
+        finally:
+            if not args.keep:
+                for statement in CLEANUP:
+                    await conn.execute(text(statement))
+    await engine.dispose()
+
+    report["ok"] = all(c["ok"] for c in report["checks"])
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bids", type=int, default=1_000_000)
+    parser.add_argument("--auctions", type=int, default=1_000)
+    parser.add_argument("--lots-per-auction", type=int, default=20)
+    parser.add_argument("--participants-per-auction", type=int, default=50)
+    parser.add_argument("--vendors", type=int, default=5_000)
+    parser.add_argument("--keep", action="store_true", help="keep the generated rows")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, default=str))
+    sys.exit(0 if report["ok"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -43,14 +43,17 @@ mkdir -p logs
 
 # Number of workers (default to CPU count)
 WORKERS=${WORKERS:-4}
+# The in-memory bid engine keeps its order books in one process
+if [ "$WORKERS" -gt 1 ] && grep -q "^BID_ACCEPTANCE_MODE=memory" .env 2>/dev/null; then
+    echo -e "${RED}ERROR: BID_ACCEPTANCE_MODE=memory needs WORKERS=1${NC}"
+    exit 1
+fi
 PORT=${PORT:-8000}
 
-# Start RQ worker in background (production uses multiple workers)
-echo "Starting RQ workers (4 workers)..."
-for i in {1..4}; do
-    python app/worker.py > logs/rq-worker-$i.log 2>&1 &
-    echo "  Worker $i started (PID: $!)"
-done
+# Start the RQ worker in background (up to WORKER_CONCURRENCY jobs at once)
+echo "Starting RQ worker (${WORKER_CONCURRENCY:-32} concurrent jobs)..."
+python app/worker.py > logs/rq-worker.log 2>&1 &
+echo "  Worker started (PID: $!)"
 
 sleep 2
 
@@ -68,7 +68,8 @@ function LotCard({
     const suggested = useMemo(() => (current + (Number.isFinite(minInc) ? minInc : 0)).toFixed(2), [current, minInc]);
 
     const live = auctionStatus === 'live';
-    const canBid = connected && amount.trim().length > 0;
+    const closed = Boolean(lot.closed_at);
+    const canBid = connected && !closed && amount.trim().length > 0;
 
     const nudge = (delta: number) => {
         const next = Number(amount || suggested) + delta;
@@ -101,7 +102,9 @@ function LotCard({
                             #{lot.lot_number} — {lot.name}
                         </CardTitle>
                     </div>
-                    <Badge variant={live ? 'default' : 'outline'}>{live ? 'Bidding Open' : 'Auction Not Live'}</Badge>
+                    <Badge variant={live && !closed ? 'default' : 'outline'}>
+                        {closed ? 'Lot Closed' : live ? 'Bidding Open' : 'Auction Not Live'}
+                    </Badge>
                 </div>
             </CardHeader>
 
@@ -4,7 +4,7 @@ import Link from 'next/link';
 import { Plus, ChevronRight, Trash2 } from 'lucide-react';
 import { Card, CardHeader, CardTitle, CardDescription, CardContent, CardFooter } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
-import type { Auction, AuctionStatus } from '@/types/auction';
+import type { AuctionStatus, AuctionSummary } from '@/types/auction';
 import { adminDelete } from '@/lib/api';
 import { toast } from 'sonner';
 import { useQueryClient } from '@tanstack/react-query';
@@ -36,9 +36,9 @@ function formatWhen(start?: string | null, end?: string | null) {
     return 'Unscheduled';
 }
 
-function AuctionCard({ auction }: { auction: Auction }) {
+function AuctionCard({ auction }: { auction: AuctionSummary }) {
     const href = `/admin/${auction.slug}`;
-    const parts = auction.lots?.length ?? 0;
+    const parts = auction.lot_count;
     const queryClient = useQueryClient();
 
     const handleDelete = async (e: React.MouseEvent) => {
@@ -116,7 +116,7 @@ function CreateNewCard() {
     );
 }
 
-export function AuctionCards({ auctions }: { auctions: Auction[] }) {
+export function AuctionCards({ auctions }: { auctions: AuctionSummary[] }) {
     return (
         <div className="*:data-[slot=card]:from-primary/5 *:data-[slot=card]:to-card dark:*:data-[slot=card]:bg-card grid grid-cols-1 gap-4 *:data-[slot=card]:bg-gradient-to-t *:data-[slot=card]:shadow-xs @xl/main:grid-cols-2 @5xl/main:grid-cols-4">
             {auctions.map((a) => (
@@ -55,10 +55,11 @@ export function useAdminBidLog(slug: string) {
             setConnected(false);
         });
 
-        socket.on('bid_log_entry', (entry: BidLogEntry) => {
+        socket.on('bid_log_entries', ({ entries }: { entries: BidLogEntry[] }) => {
+            const newest = [...entries].reverse();
             queryClient.setQueryData<BidLogEntry[]>(
                 bidLogKeys.byAuction(slug),
-                (old) => (old ? [entry, ...old] : [entry])
+                (old) => (old ? [...newest, ...old] : newest)
             );
         });
 
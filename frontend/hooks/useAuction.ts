@@ -4,7 +4,20 @@ import { useEffect, useMemo, useRef, useState } from 'react';
 import { toast } from 'sonner';
 import { getAuction } from '@/lib/api';
 import { connectAuctionSocket } from '@/lib/socket';
-import type { Auction, Lot, StateSnapshot, BidAccepted, BidRejected, StatusEvent, ErrorEvent } from '@/types/auction';
+import type {
+    Auction,
+    Lot,
+    LotState,
+    LotsUpdated,
+    LotClosed,
+    Sequenced,
+    StateDelta,
+    StateSnapshot,
+    BidAccepted,
+    BidRejected,
+    StatusEvent,
+    ErrorEvent,
+} from '@/types/auction';
 
 type State = {
     auction?: Auction;
@@ -18,6 +31,28 @@ function errorMessage(e: unknown): string {
     return e instanceof Error ? e.message : 'Load failed';
 }
 
+function mergeLot(prev: Lot | undefined, l: LotState): Lot {
+    return {
+        id: l.id,
+        lot_number: l.lot_number,
+        name: l.name,
+        base_price: l.base_price ?? prev?.base_price ?? '0',
+        min_increment: l.min_increment ?? prev?.min_increment ?? '1',
+        currency: l.currency,
+        current_price: l.current_price,
+        current_leader: l.current_leader,
+        end_time: l.end_time,
+        closed_at: l.closed_at ?? prev?.closed_at ?? null,
+        image_url: l.image_url,
+    };
+}
+
+function mergeLots(lots: Record<string, Lot>, updates: LotState[]): Record<string, Lot> {
+    const next = { ...lots };
+    for (const l of updates) next[l.id] = mergeLot(lots[l.id], l);
+    return next;
+}
+
 export function useAuction(slug: string, inviteToken?: string) {
     const [state, setState] = useState<State>({ lots: {}, connected: false });
     const socketRef = useRef<ReturnType<typeof connectAuctionSocket> | null>(null);
@@ -41,40 +76,82 @@ export function useAuction(slug: string, inviteToken?: string) {
     }, [slug]);
 
     useEffect(() => {
-        const socket = connectAuctionSocket(slug, inviteToken);
+        // Last contiguous (epoch, seq) seen from the server, sent back on
+        // reconnect so the server can answer with a delta instead of a snapshot.
+        const position: { epoch?: string; since?: number } = {};
+        // A sync is out; the state or state_delta answering it resets this.
+        let syncing = false;
+
+        const socket = connectAuctionSocket(slug, inviteToken, () => position);
         socketRef.current = socket;
 
+        const track = (msg: Sequenced) => {
+            if (msg.seq === undefined || position.since === undefined) return;
+            if (msg.epoch === position.epoch) {
+                if (msg.seq <= position.since) return;
+                // from_seq marks seqs skipped because a later bid superseded them.
+                if ((msg.from_seq ?? msg.seq - 1) <= position.since) {
+                    position.since = msg.seq;
+                    return;
+                }
+            }
+            // A missed seq or another lineage: ask for what changed since our
+            // position now rather than on the next reconnect.
+            if (!syncing) {
+                syncing = true;
+                socket.emit('sync', { ...position });
+            }
+        };
+
         socket.on('connect', () => setState((s) => ({ ...s, connected: true })));
         socket.on('disconnect', () => setState((s) => ({ ...s, connected: false })));
 
         socket.on('state', (msg: StateSnapshot) => {
+            syncing = false;
+            position.epoch = msg.epoch;
+            position.since = msg.seq;
             setState((s) => ({
                 ...s,
                 status: msg.auction.status,
-                lots: Object.fromEntries(
-                    msg.lots.map((l) => [
-                        l.id,
-                        {
-                            id: l.id,
-                            lot_number: l.lot_number,
-                            name: l.name,
-                            base_price: l.base_price ?? s.lots[l.id]?.base_price ?? '0',
-                            min_increment: l.min_increment ?? s.lots[l.id]?.min_increment ?? '1',
-                            currency: l.currency,
-                            current_price: l.current_price,
-                            current_leader: l.current_leader,
-                            end_time: l.end_time,
-                            image_url: l.image_url,
-                        },
-                    ])
-                ),
+                lots: Object.fromEntries(msg.lots.map((l) => [l.id, mergeLot(s.lots[l.id], l)])),
             }));
         });
 
+        socket.on('state_delta', (msg: StateDelta) => {
+            syncing = false;
+            position.epoch = msg.epoch;
+            position.since = msg.seq;
+            setState((s) => ({
+                ...s,
+                status: msg.auction?.status ?? s.status,
+                lots: mergeLots(s.lots, msg.lots),
+            }));
+        });
+
+        socket.on('lots_updated', (msg: LotsUpdated) => {
+            track(msg);
+            setState((s) => ({ ...s, lots: mergeLots(s.lots, msg.lots) }));
+        });
+
+        socket.on('lot_closed', (msg: LotClosed) => {
+            track(msg);
+            setState((s) => {
+                const lots = { ...s.lots };
+                for (const c of msg.lots) {
+                    const lot = lots[c.id];
+                    if (lot) lots[c.id] = { ...lot, ...c };
+                }
+                return { ...s, lots };
+            });
+        });
+
         socket.on('bid_accepted', (payload: BidAccepted) => {
+            track(payload);
             setState((s) => {
                 const lot = s.lots[payload.lot_id];
                 if (!lot) return s;
+                // Broadcasts can arrive out of order; prices only go up.
+                if (Number(payload.amount) <= Number(lot.current_price)) return s;
                 toast.success(`Bid accepted: ${payload.amount} ${lot.currency}`, {
                     id: `bid-${payload.lot_id}-${payload.amount}`,
                 });
@@ -100,7 +177,10 @@ export function useAuction(slug: string, inviteToken?: string) {
             });
             setState((s) => ({ ...s, lastError: reason }));
         });
-        socket.on('status', (p: StatusEvent) => setState((s) => ({ ...s, status: p.status })));
+        socket.on('status', (p: StatusEvent) => {
+            track(p);
+            setState((s) => ({ ...s, status: p.status }));
+        });
         socket.on('error', (p: ErrorEvent) => setState((s) => ({ ...s, lastError: p.detail || 'Error' })));
 
         return () => {
@@ -3,10 +3,10 @@
 import { useQuery } from '@tanstack/react-query';
 import { auctionsKeys } from '@/lib/queryKeys';
 import { listAuctions } from '@/lib/api';
-import type { Auction } from '@/types/auction';
+import type { AuctionSummary } from '@/types/auction';
 
 export function useAuctionsQuery() {
-    return useQuery<Auction[]>({
+    return useQuery<AuctionSummary[]>({
         queryKey: auctionsKeys.list(),
         queryFn: () => listAuctions(),
         placeholderData: (prev) => prev,
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { Auction } from '@/types/auction';
+import type { Auction, AuctionSummary } from '@/types/auction';
 import type { Vendor, VendorCreate } from '@/types/vendor';
 
 export const api = axios.create({
@@ -31,8 +31,8 @@ export async function getAuction(slug: string): Promise<Auction> {
     return data as Auction;
 }
 
-export async function listAuctions(): Promise<Auction[]> {
-    const { data } = await axios.get<Auction[]>('/api/auctions', {
+export async function listAuctions(): Promise<AuctionSummary[]> {
+    const { data } = await axios.get<AuctionSummary[]>('/api/auctions', {
         headers: getAuthHeaders(),
     });
     return data;
@@ -71,6 +71,7 @@ export interface DashboardSummary {
   revenue: RevenueAnalytics;
   vendors: VendorAnalytics;
   generated_at: string;
+  cache_age_sec?: number;
 }
 
 export const analyticsApi = {
@@ -1,5 +1,5 @@
 import { apiClient, adminClient } from './client';
-import type { Auction, AuctionStatus } from '@/types/auction';
+import type { Auction, AuctionStatus, AuctionSummary } from '@/types/auction';
 
 export const auctionsApi = {
     getAuction: async (slug: string): Promise<Auction> => {
@@ -7,8 +7,8 @@ export const auctionsApi = {
         return data;
     },
 
-    listAuctions: async (): Promise<Auction[]> => {
-        const { data } = await adminClient.get<Auction[]>('/../auctions');
+    listAuctions: async (): Promise<AuctionSummary[]> => {
+        const { data } = await adminClient.get<AuctionSummary[]>('/../auctions');
         return data;
     },
 
@@ -1,6 +1,8 @@
 import { io, Socket } from 'socket.io-client';
 
-export function connectAuctionSocket(slug: string, inviteToken?: string) {
+export type SyncPosition = { epoch?: string; since?: number };
+
+export function connectAuctionSocket(slug: string, inviteToken?: string, getPosition?: () => SyncPosition) {
     const url = process.env.NEXT_PUBLIC_API_BASE_URL!;
     const socket: Socket = io(url + '/auction', {
         path: '/socket.io',
@@ -8,7 +10,8 @@ export function connectAuctionSocket(slug: string, inviteToken?: string) {
         reconnection: true,
         reconnectionAttempts: Infinity,
         reconnectionDelay: 500,
-        auth: { slug, t: inviteToken },
+        // Evaluated on every (re)connect so the server can answer with a delta.
+        auth: (cb) => cb({ slug, t: inviteToken, ...(getPosition?.() ?? {}) }),
         extraHeaders: {
             'ngrok-skip-browser-warning': 'true',
         },
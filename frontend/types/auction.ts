@@ -12,6 +12,7 @@ export type Lot = {
     current_price: string;
     current_leader: UUID | null;
     end_time: string | null;
+    closed_at?: string | null;
     image_url?: string | null;
 };
 
@@ -27,7 +28,34 @@ export type Auction = {
     lots: Lot[];
 };
 
-export type StateSnapshot = {
+export type AuctionSummary = Omit<Auction, 'lots'> & {
+    lot_count: number;
+    bid_count: number;
+    total_current_value: string;
+    lots?: Lot[];
+};
+
+export type LotState = {
+    id: UUID;
+    lot_number: number;
+    name: string;
+    currency: string;
+    current_price: string;
+    current_leader: UUID | null;
+    end_time: string | null;
+    closed_at?: string | null;
+    image_url?: string | null;
+    base_price: string;
+    min_increment: string;
+};
+
+export type Sequenced = {
+    epoch?: string;
+    seq?: number;
+    from_seq?: number;
+};
+
+export type StateSnapshot = Sequenced & {
     type?: 'state';
     auction: {
         slug: string;
@@ -36,22 +64,30 @@ export type StateSnapshot = {
         start_time: string | null;
         end_time: string | null;
     };
-    lots: Array<{
+    lots: LotState[];
+    participants: { count: number };
+};
+
+export type StateDelta = Sequenced & {
+    from_seq: number;
+    lots: LotState[];
+    auction?: { status: AuctionStatus };
+};
+
+export type LotsUpdated = Sequenced & {
+    lots: LotState[];
+};
+
+export type LotClosed = Sequenced & {
+    lots: {
         id: UUID;
-        lot_number: number;
-        name: string;
-        currency: string;
+        closed_at: string;
         current_price: string;
         current_leader: UUID | null;
-        end_time: string | null;
-        image_url?: string | null;
-        base_price: string;
-        min_increment: string;
-    }>;
-    participants: { count: number };
+    }[];
 };
 
-export type BidAccepted = {
+export type BidAccepted = Sequenced & {
     type?: 'bid_accepted';
     lot_id: UUID;
     amount: string;
@@ -64,7 +100,7 @@ export type BidRejected = {
     reason: string;
 };
 
-export type StatusEvent = {
+export type StatusEvent = Sequenced & {
     type?: 'status';
     status: AuctionStatus;
 };